@@ -0,0 +1 @@
+"""Benchmarks for the WebP Python bindings."""
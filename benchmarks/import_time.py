@@ -0,0 +1,77 @@
+"""Measure how long `import webp` takes in a fresh interpreter.
+
+Run `python -m benchmarks.import_time --help` from the repository root for usage. Each sample
+starts a new Python process, so the result includes loading numpy and the cffi extension module,
+but not Pillow, which is only imported when the PIL API is first used.
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+import webp
+
+_CODE = """\
+import sys, time
+start = time.perf_counter()
+import webp
+elapsed = time.perf_counter() - start
+print(elapsed, "PIL" in sys.modules)
+"""
+
+
+def sample(code: str = _CODE) -> float:
+    """Return the time taken to import the package in a new interpreter, in seconds."""
+    # Make sure that the same package as in this process is imported.
+    package_dir = str(Path(webp.__file__).parent.parent)
+    result = subprocess.run(  # noqa: S603
+        [sys.executable, "-c", f"import sys; sys.path.insert(0, {package_dir!r})\n{code}"],
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    elapsed, pil_loaded = result.stdout.split()
+    if pil_loaded != "False":
+        msg = "`import webp` loaded Pillow"
+        raise RuntimeError(msg)
+    return float(elapsed)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Run the import time benchmark from the command line."""
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.import_time", description=__doc__)
+    parser.add_argument("-o", "--output", type=Path, help="write results to this JSON file")
+    parser.add_argument("-b", "--baseline", type=Path, help="compare against results from a previous run")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=1.2,
+        help="slowdown factor that counts as a regression (default: %(default)s)",
+    )
+    parser.add_argument("--samples", type=int, default=20, help="number of interpreters to start")
+    args = parser.parse_args(argv)
+
+    samples: List[float] = [sample() for _ in range(args.samples)]
+    median = statistics.median(samples)
+    print(f"import webp: median {median * 1e3:.1f} ms, min {min(samples) * 1e3:.1f} ms")
+
+    if args.output is not None:
+        results = {"import_webp": {"min": min(samples), "median": median, "calls": len(samples)}}
+        args.output.write_text(json.dumps({"results": results}, indent=2) + "\n")
+
+    if args.baseline is not None:
+        base = json.loads(args.baseline.read_text())["results"]["import_webp"]["median"]
+        ratio = median / base
+        print(f"baseline {base * 1e3:.1f} ms -> {median * 1e3:.1f} ms  x{ratio:.2f}")
+        if ratio > args.threshold:
+            print(f"import time regressed by more than x{args.threshold}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,316 @@
+"""Measure encoding and decoding throughput.
+
+Run `python -m benchmarks.run --help` from the repository root for usage. Images are synthesised
+(or loaded from `tests/data`), so no network access is needed. Results are written as JSON, and
+can be compared against a previous run to catch regressions.
+"""
+
+import argparse
+import json
+import platform
+import re
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+from PIL import Image
+
+import webp
+
+DATA_DIR = Path(__file__).parent.parent / "tests" / "data"
+DEFAULT_SIZES = (256, 1024)
+DEFAULT_CLIP_FRAMES = 300
+CLIP_SIZE = 128
+
+
+class Benchmark(NamedTuple):
+    """A single timed operation.
+
+    `setup` is called (untimed) before every call to `func`, and its result is passed to `func`.
+    This allows operations which consume their input, such as encoding a picture, to be timed on
+    fresh input each time.
+    """
+
+    name: str
+    func: Callable[[Any], Any]
+    setup: Callable[[], Any]
+    pixels: int
+
+
+class Result(NamedTuple):
+    """Timings of a benchmark, in seconds per call."""
+
+    min: float
+    median: float
+    calls: int
+    megapixels_per_second: float
+
+
+def synthetic_image(width: int, height: int, channels: int = 3, seed: int = 0) -> "np.ndarray[Any, np.dtype[np.uint8]]":
+    """Return a photo-like test image: smooth gradients with some high-frequency detail and noise."""
+    rng = np.random.RandomState(seed)
+    y, x = np.mgrid[0:height, 0:width].astype(np.float32)
+    base = np.stack(
+        [128 + 100 * np.sin(x / 37 + c) * np.cos(y / 53 - c) + 20 * np.sin((x + y) / (3 + c)) for c in range(channels)],
+        axis=-1,
+    )
+    base += rng.normal(0, 6, base.shape)
+    if channels == 4:  # noqa: PLR2004
+        base[..., 3] = 255 * (x / max(width - 1, 1))
+    return np.clip(base, 0, 255).astype(np.uint8)
+
+
+def synthetic_clip(frames: int, size: int = CLIP_SIZE) -> List["np.ndarray[Any, np.dtype[np.uint8]]"]:
+    """Return an animation of a gradient scrolling across a static background."""
+    background = synthetic_image(size, size)
+    sprite = synthetic_image(size // 4, size // 4, seed=1)
+    clip = []
+    for i in range(frames):
+        frame = background.copy()
+        offset = (i * 3) % (size - sprite.shape[0])
+        frame[offset : offset + sprite.shape[0], offset : offset + sprite.shape[1]] = sprite
+        clip.append(frame)
+    return clip
+
+
+def _no_setup() -> None:
+    return None
+
+
+def _import_benchmarks(name: str, img: "np.ndarray[Any, np.dtype[np.uint8]]") -> Iterator[Benchmark]:
+    pixels = img.shape[0] * img.shape[1]
+    pilmode = "RGBA" if img.shape[-1] == 4 else "RGB"  # noqa: PLR2004
+    yield Benchmark(
+        f"import/from_numpy/{pilmode}/{name}", lambda _: webp.WebPPicture.from_numpy(img), _no_setup, pixels
+    )
+    pil_img = Image.fromarray(img)
+    yield Benchmark(
+        f"import/from_pil/{pilmode}/{name}", lambda _: webp.WebPPicture.from_pil(pil_img), _no_setup, pixels
+    )
+    palette_img = pil_img.quantize(64)
+    yield Benchmark(f"import/from_pil/P/{name}", lambda _: webp.WebPPicture.from_pil(palette_img), _no_setup, pixels)
+
+
+def _encode_benchmarks(name: str, img: "np.ndarray[Any, np.dtype[np.uint8]]") -> Iterator[Benchmark]:
+    pixels = img.shape[0] * img.shape[1]
+
+    def setup() -> webp.WebPPicture:
+        # Lossy encoding converts the picture to YUV in place, so every call needs a fresh import.
+        return webp.WebPPicture.from_numpy(img)
+
+    def encode(config: webp.WebPConfig) -> Callable[[webp.WebPPicture], webp.WebPData]:
+        return lambda pic: pic.encode(config)
+
+    for preset in webp.WebPPreset:
+        config = webp.WebPConfig.new(preset=preset)
+        yield Benchmark(f"encode/preset={preset.name}/{name}", encode(config), setup, pixels)
+    for method in range(7):
+        config = webp.WebPConfig.new(method=method)
+        yield Benchmark(f"encode/method={method}/{name}", encode(config), setup, pixels)
+    for level in range(10):
+        config = webp.WebPConfig.new(lossless=True, lossless_preset=level)
+        yield Benchmark(f"encode/lossless_preset={level}/{name}", encode(config), setup, pixels)
+
+
+def _decode_benchmarks(name: str, img: "np.ndarray[Any, np.dtype[np.uint8]]") -> Iterator[Benchmark]:
+    pixels = img.shape[0] * img.shape[1]
+    for kind, config in (("lossy", webp.WebPConfig.new()), ("lossless", webp.WebPConfig.new(lossless=True))):
+        webp_data = webp.WebPPicture.from_numpy(img).encode(config)
+        for color_mode in webp.WebPColorMode:
+            try:
+                _ = color_mode.bytes_per_pixel
+            except webp.WebPError:
+                continue  # Not supported by the numpy API
+            for use_threads in (False, True):
+                decoder = webp.Decoder(color_mode)
+                decoder.dec_config.options.use_threads = int(use_threads)
+                yield Benchmark(
+                    f"decode/{kind}/{color_mode.name}/threads={int(use_threads)}/{name}",
+                    lambda _, decoder=decoder, webp_data=webp_data: decoder.decode(webp_data),
+                    _no_setup,
+                    pixels,
+                )
+
+
+def _atlas_benchmarks(tile_size: int = 32, tiles_per_row: int = 16) -> Iterator[Benchmark]:
+    size = tile_size * tiles_per_row
+    img = synthetic_image(size, size, channels=4)
+    layout = [(x, y) for y in range(0, size, tile_size) for x in range(0, size, tile_size)]
+    tiles = [np.ascontiguousarray(img[y : y + tile_size, x : x + tile_size]) for x, y in layout]
+    for kind, config in (("lossy", webp.WebPConfig.new()), ("lossless", webp.WebPConfig.new(lossless=True))):
+        buffers = [bytes(webp.WebPPicture.from_numpy(tile).encode(config).buffer()) for tile in tiles]
+
+        def decode_loop(_: None, buffers: List[bytes] = buffers) -> "np.ndarray[Any, np.dtype[np.uint8]]":
+            out = np.zeros((size, size, 4), dtype=np.uint8)
+            decoder = webp.Decoder()
+            for buf, (x, y) in zip(buffers, layout):
+                out[y : y + tile_size, x : x + tile_size] = decoder.decode(buf)
+            return out
+
+        name = f"{len(tiles)}x{tile_size}x{tile_size}"
+        yield Benchmark(f"atlas/decoder_loop/{kind}/{name}", decode_loop, _no_setup, size * size)
+        yield Benchmark(
+            f"atlas/decode_into_atlas/{kind}/{name}",
+            lambda _, buffers=buffers: webp.decode_into_atlas(buffers, layout, max_workers=1),
+            _no_setup,
+            size * size,
+        )
+
+
+def _anim_benchmarks(frames: int, tmpdir: Path) -> Iterator[Benchmark]:
+    clip = synthetic_clip(frames)
+    pixels = frames * CLIP_SIZE * CLIP_SIZE
+    for kind, kwargs in (("lossy", {}), ("lossless", {"lossless": True})):
+        file_path = tmpdir / f"clip_{kind}.webp"
+        webp.mimwrite(file_path, clip, fps=30, **kwargs)
+        yield Benchmark(
+            f"anim/mimwrite/{kind}/{frames}f",
+            lambda _, file_path=file_path, kwargs=kwargs: webp.mimwrite(file_path, clip, fps=30, **kwargs),
+            _no_setup,
+            pixels,
+        )
+        yield Benchmark(
+            f"anim/mimread/{kind}/{frames}f",
+            lambda _, file_path=file_path: webp.mimread(file_path),
+            _no_setup,
+            pixels,
+        )
+
+
+def collect(sizes: Sequence[int], clip_frames: int, tmpdir: Path) -> Iterator[Benchmark]:
+    """Yield every benchmark for the given image sizes and animation length."""
+    images = {}
+    for size in sizes:
+        images[f"{size}x{size}"] = synthetic_image(size, size)
+        images[f"{size}x{size}a"] = synthetic_image(size, size, channels=4)
+    with Image.open(DATA_DIR / "bars_palette_opaque.png") as img:
+        images["bars_palette"] = np.asarray(img.convert("RGB"))
+
+    for name, img in images.items():
+        yield from _import_benchmarks(name, img)
+    for name, img in images.items():
+        if img.shape[-1] == 3:  # noqa: PLR2004
+            yield from _encode_benchmarks(name, img)
+    for name, img in images.items():
+        yield from _decode_benchmarks(name, img)
+    yield from _atlas_benchmarks()
+    if clip_frames > 0:
+        yield from _anim_benchmarks(clip_frames, tmpdir)
+
+
+def measure(benchmark: Benchmark, *, repeat: int, min_time: float) -> Result:
+    """Time a benchmark.
+
+    Calls are made in `repeat` rounds, each lasting at least `min_time` seconds (and at least one
+    call). The reported time per call is taken from the fastest round and the median round.
+    """
+    benchmark.func(benchmark.setup())  # Warm up
+    rounds = []
+    calls = 0
+    for _ in range(repeat):
+        elapsed = 0
+        round_calls = 0
+        while round_calls == 0 or elapsed < min_time * 1e9:
+            arg = benchmark.setup()
+            start = time.perf_counter_ns()
+            benchmark.func(arg)
+            elapsed += time.perf_counter_ns() - start
+            round_calls += 1
+        rounds.append(elapsed / 1e9 / round_calls)
+        calls += round_calls
+    median = statistics.median(rounds)
+    return Result(
+        min=min(rounds),
+        median=median,
+        calls=calls,
+        megapixels_per_second=benchmark.pixels / 1e6 / median,
+    )
+
+
+def metadata() -> Dict[str, Any]:
+    """Return a description of the environment that the benchmarks ran in."""
+    try:
+        from importlib.metadata import version  # noqa: PLC0415
+
+        webp_version = version("webp")
+    except Exception:  # noqa: BLE001
+        webp_version = "unknown"
+    return {
+        "webp": webp_version,
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+    }
+
+
+def compare(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]], threshold: float) -> List[str]:
+    """Print a comparison against a baseline, and return the names of regressed benchmarks."""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        ratio = result["median"] / base["median"]
+        flag = ""
+        if ratio > threshold:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        elif ratio < 1 / threshold:
+            flag = "  improved"
+        print(f"{name:60s} {base['median'] * 1e3:10.3f} ms -> {result['median'] * 1e3:10.3f} ms  x{ratio:5.2f}{flag}")
+    return regressions
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Run the benchmark suite from the command line."""
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.run", description=__doc__)
+    parser.add_argument("-o", "--output", type=Path, help="write results to this JSON file")
+    parser.add_argument("-b", "--baseline", type=Path, help="compare against results from a previous run")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=1.1,
+        help="slowdown factor (of median time) that counts as a regression (default: %(default)s)",
+    )
+    parser.add_argument("-k", "--filter", default="", help="only run benchmarks whose name matches this regex")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="square image sizes to test")
+    parser.add_argument("--frames", type=int, default=DEFAULT_CLIP_FRAMES, help="animation length (0 to skip)")
+    parser.add_argument("--repeat", type=int, default=5, help="number of timing rounds (default: %(default)s)")
+    parser.add_argument("--min-time", type=float, default=0.1, help="minimum seconds per round (default: %(default)s)")
+    parser.add_argument("--quick", action="store_true", help="small images, short clip, and few rounds")
+    args = parser.parse_args(argv)
+    if args.quick:
+        args.sizes, args.frames, args.repeat, args.min_time = [64], 20, 2, 0.01
+
+    pattern = re.compile(args.filter)
+    results: Dict[str, Dict[str, Any]] = {}
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for benchmark in collect(args.sizes, args.frames, Path(tmpdir)):
+            if not pattern.search(benchmark.name):
+                continue
+            result = measure(benchmark, repeat=args.repeat, min_time=args.min_time)
+            results[benchmark.name] = result._asdict()
+            print(f"{benchmark.name:60s} {result.median * 1e3:10.3f} ms  {result.megapixels_per_second:8.1f} MP/s")
+
+    if args.output is not None:
+        args.output.write_text(json.dumps({"metadata": metadata(), "results": results}, indent=2) + "\n")
+
+    if args.baseline is not None:
+        baseline = json.loads(args.baseline.read_text())["results"]
+        print(f"\nComparison with {args.baseline}:")
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} benchmark(s) regressed by more than x{args.threshold}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,91 @@
+"""Measure how encoding and decoding throughput scales with the number of threads.
+
+Run `python -m benchmarks.threads --help` from the repository root for usage. libwebp calls
+release the GIL, so throughput should grow with the number of threads up to the number of CPU
+cores. On a free-threaded build of CPython, the Python code around those calls runs in parallel
+too, which matters most for small images.
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import webp
+from benchmarks.run import synthetic_image
+
+
+def _gil_enabled() -> bool:
+    is_gil_enabled = getattr(sys, "_is_gil_enabled", None)
+    return True if is_gil_enabled is None else is_gil_enabled()
+
+
+def throughput(task: Callable[[int], Any], num_threads: int, num_tasks: int) -> float:
+    """Return the number of tasks completed per second when run on `num_threads` threads."""
+    with ThreadPoolExecutor(max_workers=num_threads) as executor:
+        list(executor.map(task, range(num_threads)))  # Warm up the threads
+        start = time.perf_counter()
+        list(executor.map(task, range(num_tasks)))
+        return num_tasks / (time.perf_counter() - start)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Run the scaling benchmark from the command line."""
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.threads", description=__doc__)
+    parser.add_argument("-o", "--output", type=Path, help="write results to this JSON file")
+    parser.add_argument("--threads", type=int, nargs="+", help="thread counts (default: powers of 2 up to CPUs)")
+    parser.add_argument("--size", type=int, default=256, help="square image size (default: %(default)s)")
+    parser.add_argument("--tasks", type=int, default=200, help="images per measurement (default: %(default)s)")
+    parser.add_argument("--track-memory", action="store_true", help="enable native memory tracking")
+    args = parser.parse_args(argv)
+    webp.memory.enable_tracking(enabled=args.track_memory)
+
+    cpus = os.cpu_count() or 1
+    thread_counts = args.threads or [2**i for i in range(cpus.bit_length()) if 2**i <= cpus]
+    img = synthetic_image(args.size, args.size)
+    config = webp.FrozenWebPConfig.new(quality=80, method=4)
+    webp_data = webp.WebPPicture.from_numpy(img).encode(config)
+    local = threading.local()
+
+    def encode(_: int) -> None:
+        if not hasattr(local, "encoder"):
+            local.encoder = webp.Encoder(config)
+        local.encoder.encode(img)
+
+    def decode(_: int) -> None:
+        if not hasattr(local, "decoder"):
+            local.decoder = webp.Decoder(webp.WebPColorMode.RGB)
+        local.decoder.decode(webp_data)
+
+    print(
+        f"Python {platform.python_version()}, GIL enabled: {_gil_enabled()}, CPUs: {cpus}, "
+        f"memory tracking: {args.track_memory}"
+    )
+    results: Dict[str, List[Dict[str, float]]] = {}
+    for name, task in (("encode", encode), ("decode", decode)):
+        results[name] = []
+        for num_threads in thread_counts:
+            rate = throughput(task, num_threads, args.tasks)
+            speedup = rate / results[name][0]["images_per_second"] if results[name] else 1.0
+            results[name].append({"threads": num_threads, "images_per_second": rate, "speedup": speedup})
+            print(f"{name:6s} threads={num_threads:3d} {rate:10.1f} images/s  x{speedup:5.2f}")
+
+    if args.output is not None:
+        metadata = {
+            "python": platform.python_version(),
+            "gil_enabled": _gil_enabled(),
+            "cpus": cpus,
+            "memory_tracking": args.track_memory,
+        }
+        args.output.write_text(json.dumps({"metadata": metadata, "results": results}, indent=2) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
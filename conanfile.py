@@ -8,6 +8,10 @@ from conan import ConanFile
 class LibwebpRecipe(ConanFile):
     """Define the Conan recipe for libwebp."""
 
+    # Packed pixels (RGB_565, RGBA_4444) are written with the high byte first, and converted to the
+    # host's byte order by the bindings.
+    default_options = {"libwebp/*:swap_16bit_csp": False}  # noqa: RUF012
+
     def requirements(self) -> None:
         """Declare runtime Conan requirements."""
         assert self.requires is not None  # noqa: S101
@@ -1,6 +1,7 @@
 """Setuptools entry point for building the WebP extension."""
 
 import sys
+import sysconfig
 from pathlib import Path
 
 from setuptools import setup
@@ -9,8 +10,13 @@ sys.path.append(str(Path(__file__).parent))
 
 
 if __name__ == "__main__":
+    options = {}
+    # Free-threaded builds of CPython do not support the limited API, so their wheels are built for
+    # a specific Python version instead.
+    if not sysconfig.get_config_var("Py_GIL_DISABLED"):
+        options["bdist_wheel"] = {"py_limited_api": "cp38"}
     setup(
         zip_safe=False,
         cffi_modules=["webp_build/builder.py:ffibuilder"],
-        options={"bdist_wheel": {"py_limited_api": "cp38"}},
+        options=options,
     )
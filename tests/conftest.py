@@ -1,8 +1,20 @@
 from pathlib import Path
+from typing import Iterator
 
 import PIL.Image
 import pytest
 
+from webp import memory
+
+
+@pytest.fixture
+def memory_tracking() -> Iterator[None]:
+    memory.enable_tracking()
+    try:
+        yield
+    finally:
+        memory.enable_tracking(enabled=False)
+
 
 @pytest.fixture
 def test_data_dir() -> Path:
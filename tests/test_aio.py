@@ -0,0 +1,91 @@
+import asyncio
+import threading
+import time
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+import numpy as np
+import pytest
+from numpy.testing import assert_array_equal
+
+import webp
+from webp import aio
+
+
+class TestAio:
+    def test_encode_decode(self) -> None:
+        rng = np.random.RandomState(0)
+        imgs = [rng.randint(0, 256, size=(16, 16, 3), dtype=np.uint8) for _ in range(8)]
+        executor = aio.CodecExecutor(max_workers=2)
+
+        async def main() -> list:
+            datas = await asyncio.gather(*(aio.encode(img, lossless=True, executor=executor) for img in imgs))
+            return await asyncio.gather(
+                *(aio.decode(data, webp.WebPColorMode.RGB, executor=executor) for data in datas)
+            )
+
+        try:
+            for arr, img in zip(asyncio.run(main()), imgs):
+                assert_array_equal(arr, img)
+        finally:
+            executor.shutdown()
+
+    def test_read_write(self) -> None:
+        img = np.zeros((16, 32, 3), dtype=np.uint8)
+        img[:, :8] = (255, 0, 0)
+
+        with TemporaryDirectory() as tmpdir:
+            file_name = Path(tmpdir) / "image.webp"
+
+            async def main() -> np.ndarray:
+                await aio.write(file_name, img, lossless=True)
+                return await aio.read(file_name, "RGB")
+
+            assert_array_equal(asyncio.run(main()), img)
+
+    def test_backpressure(self) -> None:
+        executor = aio.CodecExecutor(max_workers=2, max_pending=2)
+        lock = threading.Lock()
+        active = 0
+        peak = 0
+
+        def work() -> None:
+            nonlocal active, peak
+            with lock:
+                active += 1
+                peak = max(peak, active)
+            time.sleep(0.01)
+            with lock:
+                active -= 1
+
+        async def main() -> None:
+            await asyncio.gather(*(executor.run(work) for _ in range(10)))
+
+        try:
+            asyncio.run(main())
+        finally:
+            executor.shutdown()
+        assert peak <= 2
+
+    def test_cancel(self) -> None:
+        executor = aio.CodecExecutor(max_workers=1, max_pending=1)
+        event = threading.Event()
+        calls = []
+
+        async def main() -> None:
+            first = asyncio.ensure_future(executor.run(event.wait))
+            second = asyncio.ensure_future(executor.run(calls.append, 1))
+            await asyncio.sleep(0.01)
+            second.cancel()
+            event.set()
+            await first
+            with pytest.raises(asyncio.CancelledError):
+                await second
+            # The slot held by the first call is released once it finishes.
+            await executor.run(calls.append, 2)
+
+        try:
+            asyncio.run(main())
+        finally:
+            executor.shutdown()
+        assert calls == [2]
@@ -0,0 +1,138 @@
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+import numpy as np
+import pytest
+from numpy.testing import assert_array_equal
+
+import webp
+from webp.cache import DecodeCache, EncodeCache, set_decode_cache
+
+
+def _random_image(seed: int) -> np.ndarray:
+    return np.random.RandomState(seed).randint(0, 256, size=(32, 32, 3), dtype=np.uint8)
+
+
+class TestEncodeCache:
+    def test_hit_and_miss(self) -> None:
+        img = _random_image(0)
+
+        with TemporaryDirectory() as tmpdir:
+            cache = EncodeCache(Path(tmpdir) / "cache")
+            file_name = Path(tmpdir) / "image.webp"
+
+            webp.imwrite(file_name, img, cache=cache, lossless=True)
+            first = file_name.read_bytes()
+            webp.imwrite(file_name, img, cache=cache, lossless=True)
+            assert file_name.read_bytes() == first
+            assert_array_equal(webp.imread(file_name, "RGB"), img)
+
+            stats = cache.stats()
+            assert (stats.hits, stats.misses, stats.entries) == (1, 1, 1)
+            assert stats.hit_rate == 0.5
+
+            # A different configuration is a different entry.
+            webp.imwrite(file_name, img, cache=cache, lossless=True, method=0)
+            assert cache.stats().entries == 2
+
+    def test_eviction(self) -> None:
+        with TemporaryDirectory() as tmpdir:
+            config = webp.WebPConfig.new(lossless=True)
+            entry_size = webp.WebPPicture.from_numpy(_random_image(0)).encode(config).size
+            cache = EncodeCache(tmpdir, max_bytes=int(entry_size * 2.5))
+
+            for seed in range(4):
+                webp.WebPPicture.from_numpy(_random_image(seed)).encode(config, cache=cache)
+
+            stats = cache.stats()
+            assert stats.evictions > 0
+            assert stats.size_bytes <= cache.max_bytes
+            # The most recently written entry survives.
+            webp.WebPPicture.from_numpy(_random_image(3)).encode(config, cache=cache)
+            assert cache.stats().hits == 1
+
+    def test_overwrite(self) -> None:
+        with TemporaryDirectory() as tmpdir:
+            cache = EncodeCache(tmpdir, max_bytes=100)
+            for _ in range(10):
+                cache.put("ab", b"x" * 60)
+            cache.put("ab", b"x" * 40)
+            assert cache._size_bytes == 40  # noqa: SLF001
+            assert cache.stats().evictions == 0
+
+
+class TestDecodeCache:
+    def test_imread(self) -> None:
+        img = _random_image(0)
+        cache = DecodeCache()
+        set_decode_cache(cache)
+        try:
+            with TemporaryDirectory() as tmpdir:
+                file_name = Path(tmpdir) / "image.webp"
+                webp.imwrite(file_name, img, lossless=True)
+
+                first = webp.imread(file_name, "RGB")
+                assert webp.imread(file_name, "RGB") is first
+                assert not first.flags.writeable
+                assert_array_equal(first, img)
+                assert (cache.stats().hits, cache.stats().misses) == (1, 1)
+
+                # Rewriting the file invalidates the entry.
+                webp.imwrite(file_name, img[:16], lossless=True)
+                assert webp.imread(file_name, "RGB").shape == (16, 32, 3)
+        finally:
+            set_decode_cache(None)
+
+    def test_decode_limits(self) -> None:
+        img = _random_image(0)
+        webp_data = webp.WebPPicture.from_numpy(img).encode(webp.WebPConfig.new(lossless=True))
+        set_decode_cache(DecodeCache())
+        try:
+            with TemporaryDirectory() as tmpdir:
+                file_name = Path(tmpdir) / "image.webp"
+                webp.imwrite(file_name, img, lossless=True)
+                webp.imread(file_name)
+                with pytest.raises(webp.DecompressionBombError):
+                    webp.imread(file_name, max_pixels=16)
+
+            webp_data.decode()
+            with pytest.raises(webp.DecompressionBombError):
+                webp_data.decode(max_pixels=16)
+            webp.set_decode_limits(max_bytes=16)
+            try:
+                with pytest.raises(webp.DecompressionBombError):
+                    webp_data.decode()
+            finally:
+                webp.set_decode_limits()
+        finally:
+            set_decode_cache(None)
+
+    def test_crop_and_scale(self) -> None:
+        img = _random_image(0)
+        webp_data = webp.WebPPicture.from_numpy(img).encode(webp.WebPConfig.new(lossless=True))
+
+        cropped = webp_data.decode(webp.WebPColorMode.RGB, crop=(4, 8, 16, 12))
+        assert_array_equal(cropped, img[8:20, 4:20])
+        assert webp_data.decode(webp.WebPColorMode.RGB, scale=(8, 4)).shape == (4, 8, 3)
+
+    def test_eviction(self) -> None:
+        img = _random_image(0)
+        webp_data = webp.WebPPicture.from_numpy(img).encode(webp.WebPConfig.new(lossless=True))
+        cache = DecodeCache(max_bytes=img.nbytes * 3 // 2)
+        set_decode_cache(cache)
+        try:
+            for size in (32, 24, 16):
+                webp_data.decode(webp.WebPColorMode.RGB, scale=(size, size))
+            stats = cache.stats()
+            assert stats.evictions == 1
+            assert stats.size_bytes <= cache.max_bytes
+        finally:
+            set_decode_cache(None)
+
+    def test_too_large(self) -> None:
+        cache = DecodeCache(max_bytes=16)
+        small = cache.put("small", np.zeros(16, dtype=np.uint8))
+        assert not small.flags.writeable
+        large = cache.put("large", np.zeros(17, dtype=np.uint8))
+        assert large.flags.writeable
+        assert cache.get("large") is None
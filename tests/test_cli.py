@@ -0,0 +1,100 @@
+import json
+import shutil
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from webp import cli
+
+
+def _make_sources(src_dir: Path, test_data_dir: Path) -> None:
+    (src_dir / "nested").mkdir(parents=True)
+    shutil.copy(test_data_dir / "bars_palette_opaque.png", src_dir / "palette.png")
+    arr = np.random.RandomState(0).randint(0, 256, size=(24, 32, 3), dtype=np.uint8)
+    Image.fromarray(arr).save(src_dir / "nested" / "photo.jpg")
+    (src_dir / "notes.txt").write_text("not an image")
+
+
+class TestCli:
+    @pytest.mark.parametrize("jobs", [1, 2])
+    def test_convert(self, test_data_dir: Path, capsys: pytest.CaptureFixture, jobs: int) -> None:
+        with TemporaryDirectory() as tmpdir:
+            src_dir, out_dir = Path(tmpdir) / "src", Path(tmpdir) / "out"
+            _make_sources(src_dir, test_data_dir)
+
+            args = ["convert", str(src_dir), "-o", str(out_dir), "-j", str(jobs), "-q", "50"]
+            assert cli.main(args) == 0
+            assert "2 converted, 0 skipped, 0 failed" in capsys.readouterr().out
+            assert sorted(p.relative_to(out_dir).as_posix() for p in out_dir.rglob("*")) == [
+                "nested",
+                "nested/photo.webp",
+                "palette.webp",
+            ]
+
+            cli.main(["info", "--json", str(out_dir / "palette.webp"), str(out_dir / "nested" / "photo.webp")])
+            infos = json.loads(capsys.readouterr().out)
+            # Palette images are lossless by default.
+            assert [info["format"] for info in infos] == ["lossless", "lossy"]
+            assert (infos[1]["width"], infos[1]["height"]) == (32, 24)
+
+            # Outputs which are newer than their sources are skipped.
+            assert cli.main(args) == 0
+            assert "0 converted, 2 skipped, 0 failed" in capsys.readouterr().out
+
+    def test_rules_and_journal(self, test_data_dir: Path, capsys: pytest.CaptureFixture) -> None:
+        with TemporaryDirectory() as tmpdir:
+            src_dir, out_dir = Path(tmpdir) / "src", Path(tmpdir) / "out"
+            journal = Path(tmpdir) / "journal.jsonl"
+            _make_sources(src_dir, test_data_dir)
+            # A journal left behind by an interrupted run, ending with a partly written line.
+            journal.write_text(json.dumps({"src": str(src_dir / "palette.png"), "status": "converted"}) + '\n{"src"')
+
+            args = ["convert", str(src_dir), "-o", str(out_dir), "-j", "1", "--journal", str(journal)]
+            assert cli.main([*args, "--rule", "nested/*.jpg:lossless=true,method=0", "--force"]) == 0
+            assert "1 converted, 1 skipped, 0 failed" in capsys.readouterr().out
+            assert not (out_dir / "palette.webp").exists()
+
+            cli.main(["info", "--json", str(out_dir / "nested" / "photo.webp")])
+            assert json.loads(capsys.readouterr().out)[0]["format"] == "lossless"
+            records = [json.loads(line) for line in journal.read_text().splitlines()[2:]]
+            assert [(record["status"], Path(record["dst"]).name) for record in records] == [("converted", "photo.webp")]
+
+            # Every source is now in the journal, so a rerun skips them all without new records.
+            assert cli.main([*args, "--force"]) == 0
+            assert "0 converted, 2 skipped, 0 failed" in capsys.readouterr().out
+            assert len(journal.read_text().splitlines()) == 3
+
+    def test_failure(self, capsys: pytest.CaptureFixture) -> None:
+        with TemporaryDirectory() as tmpdir:
+            src = Path(tmpdir) / "broken.png"
+            src.write_bytes(b"not a png")
+            assert cli.main(["convert", str(src), "-j", "1"]) == 1
+            captured = capsys.readouterr()
+            assert "0 converted, 0 skipped, 1 failed" in captured.out
+            assert "broken.png" in captured.err
+            assert list(Path(tmpdir).iterdir()) == [src]
+
+    def test_bench(self, test_data_dir: Path, capsys: pytest.CaptureFixture) -> None:
+        assert cli.main(["bench", str(test_data_dir / "bars_palette.png"), "--repeat", "2", "-m", "0"]) == 0
+        assert "MP/s" in capsys.readouterr().out
+
+    def test_build_info(self, capsys: pytest.CaptureFixture) -> None:
+        assert cli.main(["build-info"]) == 0
+        assert "encoder_version: " in capsys.readouterr().out
+
+    def test_parse_rule(self) -> None:
+        rule = cli.Rule.parse("mode=P:lossless=true,quality=90.5,preset=photo")
+        assert rule.settings == {"lossless": True, "quality": 90.5, "preset": "photo"}
+        assert rule.matches("a/b.png", Image.new("P", (4, 4)))
+        assert not rule.matches("a/b.png", Image.new("RGB", (4, 4)))
+        assert cli.Rule.parse("*.png:exact=1").matches("a/b.png", Image.new("RGB", (4, 4)))
+
+        rule = cli.Rule.parse("colors<=4:lossless=1")
+        arr = np.zeros((8, 8, 3), dtype=np.uint8)
+        arr[:4, :4] = (1, 2, 3)
+        assert rule.matches("a.png", Image.fromarray(arr))
+        arr[0, :] = np.arange(8)[:, None]
+        assert not rule.matches("a.png", Image.fromarray(arr))
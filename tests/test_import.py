@@ -0,0 +1,40 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+import webp
+from webp import _webp
+
+
+def _run_python(code: str) -> str:
+    # Run from an empty directory, with the package that is being tested on the path.
+    env = dict(os.environ, PYTHONPATH=str(Path(webp.__file__).parent.parent))
+    with TemporaryDirectory() as tmpdir:
+        result = subprocess.run(  # noqa: S603
+            [sys.executable, "-c", code],
+            cwd=tmpdir,
+            env=env,
+            check=True,
+            capture_output=True,
+            text=True,
+        )
+    return result.stdout.strip()
+
+
+class TestImport:
+    def test_pil_is_lazy(self) -> None:
+        code = "import sys, webp; webp.imread; webp.WebPPicture; print('PIL' in sys.modules)"
+        assert _run_python(code) == "False"
+        code = "import sys, webp; webp.load_image; print('PIL' in sys.modules)"
+        assert _run_python(code) == "True"
+
+    def test_public_api(self) -> None:
+        for name in webp.__all__:
+            assert getattr(webp, name) is not None
+        assert webp.save_images.__module__ == "webp._pil"
+
+    def test_cffi_bindings(self) -> None:
+        assert (webp.ffi, webp.lib) == (_webp.ffi, _webp.lib)
+        assert webp.lib.WebPGetDecoderVersion() > 0
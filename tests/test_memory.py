@@ -0,0 +1,58 @@
+import gc
+
+import numpy as np
+import pytest
+
+import webp
+from webp import memory
+
+
+@pytest.mark.usefixtures("memory_tracking")
+class TestMemoryStats:
+    def test_picture_and_data(self) -> None:
+        before = webp.memory_stats()
+        pic = webp.WebPPicture.from_numpy(np.zeros((32, 16, 3), dtype=np.uint8))
+        webp_data = pic.encode(webp.WebPConfig.new(lossless=True))
+
+        stats = webp.memory_stats()
+        assert stats.live_objects["WebPPicture"] == before.live_objects.get("WebPPicture", 0) + 1
+        assert stats.native_bytes["WebPPicture"] >= 32 * 16 * 4
+        assert stats.native_bytes["WebPData"] >= webp_data.size
+        assert stats.peak_native_bytes >= stats.total_native_bytes
+
+        del pic, webp_data
+        stats = webp.memory_stats()
+        assert stats.live_objects == before.live_objects
+        assert stats.total_native_bytes == before.total_native_bytes
+
+    def test_reset_peak(self) -> None:
+        pic = webp.WebPPicture.new(256, 256)  # YUV 4:2:0
+        del pic
+        assert webp.memory_stats().peak_native_bytes >= 256 * 256 * 3 // 2
+        memory.reset_peak()
+        stats = webp.memory_stats()
+        assert stats.peak_native_bytes == stats.total_native_bytes
+
+    def test_late_frees(self) -> None:
+        memory.set_debug(enabled=True)
+        try:
+            pic = webp.WebPPicture.new(8, 8)
+            pic.cycle = pic  # type: ignore[attr-defined]
+            del pic
+            gc.collect()
+            records = memory.late_frees(clear=True)
+            assert [record.class_name for record in records] == ["WebPPicture"]
+            assert records[0].native_bytes == 8 * 8 * 3 // 2
+            assert "test_late_frees" in records[0].created_at
+        finally:
+            memory.set_debug(enabled=False)
+
+    def test_tracking_disabled(self) -> None:
+        memory.enable_tracking(enabled=False)
+        before = webp.memory_stats()
+        pic = webp.WebPPicture.from_numpy(np.zeros((32, 16, 3), dtype=np.uint8))
+        assert webp.memory_stats() == before
+        memory.enable_tracking()
+        pic.import_numpy(np.zeros((16, 16, 4), dtype=np.uint8), pilmode="RGBA")
+        del pic
+        assert webp.memory_stats() == before
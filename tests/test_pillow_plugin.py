@@ -0,0 +1,88 @@
+import io
+from typing import Generator
+
+import numpy as np
+import pytest
+from numpy.testing import assert_array_equal
+from PIL import Image
+
+import webp
+from webp import pillow_plugin
+
+
+@pytest.fixture
+def plugin() -> Generator[None, None, None]:
+    Image.init()
+    saved = (Image.OPEN.get("WEBP"), Image.SAVE.get("WEBP"), Image.SAVE_ALL.get("WEBP"))
+    pillow_plugin.register()
+    yield
+    for registry, value in zip((Image.OPEN, Image.SAVE, Image.SAVE_ALL), saved):
+        if value is None:
+            registry.pop("WEBP", None)
+        else:
+            registry["WEBP"] = value
+
+
+def _save(img: Image.Image, **kwargs: object) -> io.BytesIO:
+    buf = io.BytesIO()
+    img.save(buf, "WEBP", **kwargs)
+    buf.seek(0)
+    return buf
+
+
+class TestPillowPlugin:
+    @pytest.mark.usefixtures("plugin")
+    def test_open_and_save(self) -> None:
+        arr = np.random.RandomState(0).randint(0, 256, size=(24, 32, 4), dtype=np.uint8)
+        buf = _save(Image.fromarray(arr, "RGBA"), lossless=True, exact=True, icc_profile=b"icc")
+
+        with Image.open(buf) as img:
+            assert isinstance(img, pillow_plugin.WebPImageFile)
+            assert (img.mode, img.size) == ("RGBA", (32, 24))
+            assert img.info["icc_profile"] == b"icc"
+            assert_array_equal(np.asarray(img), arr)
+
+    @pytest.mark.usefixtures("plugin")
+    def test_save_config(self) -> None:
+        img = Image.fromarray(np.random.RandomState(0).randint(0, 256, size=(64, 64, 3), dtype=np.uint8))
+        small = len(_save(img, quality=10, method=6).getvalue())
+        large = len(_save(img, quality=95, use_sharp_yuv=1).getvalue())
+        assert small < large
+
+    @pytest.mark.usefixtures("plugin")
+    def test_draft(self) -> None:
+        buf = _save(Image.new("RGB", (400, 200), (255, 0, 0)))
+        with Image.open(buf) as img:
+            assert img.draft("RGB", (100, 100)) == ("RGB", (0, 0, 200, 100))
+            assert img.draft("RGBA", None) == ("RGBA", (0, 0, 200, 100))
+            img.load()
+            assert img.size == (200, 100)
+            assert img.getpixel((10, 10))[0] > 240
+            assert img.getpixel((10, 10))[3] == 255
+
+    @pytest.mark.usefixtures("plugin")
+    def test_animation(self) -> None:
+        frames = [Image.new("RGB", (16, 8), (i * 80, 0, 0)) for i in range(3)]
+        buf = _save(frames[0], save_all=True, append_images=frames[1:], duration=[10, 20, 30], loop=2)
+
+        with Image.open(buf) as img:
+            assert img.is_animated
+            assert img.n_frames == 3
+            assert img.info["loop"] == 2
+            for idx in (2, 0, 1):
+                img.seek(idx)
+                assert img.tell() == idx
+                assert abs(img.getpixel((0, 0))[0] - idx * 80) < 8
+                assert img.info["duration"] == (idx + 1) * 10
+
+    def test_not_registered_on_import(self) -> None:
+        arr = np.zeros((8, 8, 3), dtype=np.uint8)
+        webp_data = webp.WebPPicture.from_numpy(arr).encode(webp.WebPConfig.new(lossless=True))
+        Image.init()
+        with Image.open(io.BytesIO(webp_data.buffer())) as img:
+            assert not isinstance(img, pillow_plugin.WebPImageFile)
+
+    def test_register_old_pillow(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        monkeypatch.setattr(pillow_plugin.PIL, "__version__", "10.0.1")
+        with pytest.raises(webp.WebPError, match=r"Pillow 10\.1"):
+            pillow_plugin.register()
@@ -0,0 +1,82 @@
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+import numpy as np
+import pytest
+from numpy.testing import assert_array_equal
+
+import webp
+from webp.shard import _FOOTER, _INDEX_DTYPE, ShardReader, ShardWriter
+
+
+def _make_images(n: int) -> list:
+    rng = np.random.RandomState(0)
+    return [rng.randint(0, 256, size=(8 + i, 16 + 2 * i, 3), dtype=np.uint8) for i in range(n)]
+
+
+class TestShard:
+    def test_round_trip(self) -> None:
+        imgs = _make_images(5)
+        config = webp.WebPConfig.new(lossless=True)
+
+        with TemporaryDirectory() as tmpdir:
+            file_name = Path(tmpdir) / "images.shard"
+            with ShardWriter(file_name) as writer:
+                for img in imgs:
+                    writer.add(img, config=config)
+                assert len(writer) == 5
+
+            with ShardReader(file_name) as reader:
+                assert len(reader) == 5
+                assert_array_equal(reader.shapes, [img.shape[:2] for img in imgs])
+                assert_array_equal(reader.decode(-1, webp.WebPColorMode.RGB), imgs[-1])
+                decoded = reader.decode_batch(color_mode=webp.WebPColorMode.RGB, max_workers=2)
+                for arr, img in zip(decoded, imgs):
+                    assert_array_equal(arr, img)
+
+    def test_add_data(self) -> None:
+        img = _make_images(1)[0]
+        webp_data = webp.WebPPicture.from_numpy(img).encode(webp.WebPConfig.new(lossless=True))
+
+        with TemporaryDirectory() as tmpdir:
+            file_name = Path(tmpdir) / "images.shard"
+            with ShardWriter(file_name) as writer:
+                writer.add_data(webp_data)
+
+            with ShardReader(file_name) as reader:
+                assert bytes(reader[0].buffer()) == bytes(webp_data.buffer())
+                with pytest.raises(IndexError):
+                    reader[1]
+
+    def test_not_a_shard(self) -> None:
+        with TemporaryDirectory() as tmpdir:
+            file_name = Path(tmpdir) / "bad.shard"
+            file_name.write_bytes(b"\0" * 64)
+            with pytest.raises(webp.WebPError):
+                ShardReader(file_name)
+
+    def test_corrupt_footer(self) -> None:
+        with TemporaryDirectory() as tmpdir:
+            file_name = Path(tmpdir) / "images.shard"
+            with ShardWriter(file_name) as writer:
+                for img in _make_images(2):
+                    writer.add(img)
+            data = file_name.read_bytes()
+            index_offset, count, magic = _FOOTER.unpack_from(data, len(data) - _FOOTER.size)
+            footers = [
+                _FOOTER.pack(len(data), count, magic),
+                _FOOTER.pack(index_offset, count + 1, magic),
+                _FOOTER.pack(index_offset, 2**62, magic),
+                _FOOTER.pack(2**64 - 1, count, magic),
+            ]
+            for footer in footers:
+                file_name.write_bytes(data[: -_FOOTER.size] + footer)
+                with pytest.raises(webp.WebPError, match="corrupt shard footer"):
+                    ShardReader(file_name)
+
+            # An index entry that points past the data region.
+            entry = np.frombuffer(data, dtype=_INDEX_DTYPE, count=1, offset=index_offset).copy()
+            entry["size"] = index_offset
+            file_name.write_bytes(data[:index_offset] + entry.tobytes() + data[index_offset + entry.nbytes :])
+            with pytest.raises(webp.WebPError, match="corrupt shard index"):
+                ShardReader(file_name)
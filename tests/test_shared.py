@@ -0,0 +1,109 @@
+import multiprocessing
+import pickle
+import subprocess
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+import pytest
+from numpy.testing import assert_array_equal
+
+import webp
+from webp import shared
+from webp.shared import SharedImage, SharedMemoryPool, decode_shared
+
+
+def _encode(arr: np.ndarray) -> bytes:
+    return bytes(webp.WebPPicture.from_numpy(arr).encode(webp.WebPConfig.new(lossless=True)).buffer())
+
+
+def _worker_decode(buf: bytes, name: str) -> SharedImage:
+    return decode_shared(webp.WebPData.from_buffer(buf), name, webp.WebPColorMode.RGB)
+
+
+class TestShared:
+    def test_decode_shared(self) -> None:
+        rng = np.random.RandomState(0)
+        img = rng.randint(0, 256, size=(16, 24, 3), dtype=np.uint8)
+        webp_data = webp.WebPData.from_buffer(_encode(img))
+
+        with SharedMemoryPool() as pool:
+            name = pool.acquire(img.nbytes)
+            handle = decode_shared(webp_data, name, webp.WebPColorMode.RGB)
+            handle = pickle.loads(pickle.dumps(handle))  # noqa: S301
+            assert handle.shape == img.shape
+            arr = pool.view(handle)
+            assert_array_equal(arr, img)
+            del arr
+
+            pool.release(handle)
+            assert pool.acquire(img.nbytes) == name
+            assert len(pool) == 1
+
+            handle = decode_shared(webp_data, name, webp.WebPColorMode.RGB_565)
+            assert handle.nbytes == 16 * 24 * 2
+            arr = pool.view(handle)
+            assert_array_equal(arr, webp_data.decode(webp.WebPColorMode.RGB_565))
+            del arr
+
+    def test_block_too_small(self) -> None:
+        img = np.zeros((128, 128, 4), dtype=np.uint8)
+        webp_data = webp.WebPData.from_buffer(_encode(img))
+
+        with SharedMemoryPool() as pool:
+            name = pool.acquire(16)
+            with pytest.raises(webp.WebPError):
+                decode_shared(webp_data, name)
+
+    def test_decode_error_closes_block(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        img = np.random.RandomState(0).randint(0, 256, size=(64, 64, 3), dtype=np.uint8)
+        buf = _encode(img)
+        webp_data = webp.WebPData.from_buffer(buf[: len(buf) // 2])  # Valid header, truncated data
+        closed = []
+
+        class RecordingSharedMemory(SharedMemory):
+            def close(self) -> None:
+                super().close()
+                closed.append(self.name)
+
+        monkeypatch.setattr(shared, "SharedMemory", RecordingSharedMemory)
+        with SharedMemoryPool() as pool:
+            name = pool.acquire(img.nbytes)
+            with pytest.raises(webp.WebPError, match="failed to decode") as exc_info:
+                decode_shared(webp_data, name, webp.WebPColorMode.RGB)
+            # Closed before the error propagated, although the traceback still references the block.
+            assert name in closed
+            del exc_info
+
+    def test_decode_in_worker_process(self) -> None:
+        rng = np.random.RandomState(0)
+        imgs = [rng.randint(0, 256, size=(8, 8 + i, 3), dtype=np.uint8) for i in range(4)]
+
+        with SharedMemoryPool() as pool, ProcessPoolExecutor(
+            max_workers=2, mp_context=multiprocessing.get_context("spawn")
+        ) as executor:
+            names = [pool.acquire(img.nbytes) for img in imgs]
+            handles = list(executor.map(_worker_decode, [_encode(img) for img in imgs], names))
+            for handle, img in zip(handles, imgs):
+                assert_array_equal(pool.view(handle), img)
+
+    def test_attach_from_child_process(self) -> None:
+        # A process outside the pool's multiprocessing tree has its own resource tracker, which
+        # must not unlink the block when the process exits.
+        img = np.random.RandomState(0).randint(0, 256, size=(8, 8, 3), dtype=np.uint8)
+        code = (
+            "import sys, webp\n"
+            "from webp.shared import decode_shared\n"
+            "data = webp.WebPData.from_buffer(sys.stdin.buffer.read())\n"
+            "decode_shared(data, sys.argv[1], webp.WebPColorMode.RGB)\n"
+        )
+        with SharedMemoryPool() as pool:
+            name = pool.acquire(img.nbytes)
+            result = subprocess.run(  # noqa: S603
+                [sys.executable, "-c", code, name], input=_encode(img), capture_output=True, check=True
+            )
+            assert b"leaked" not in result.stderr
+            assert_array_equal(pool.view(SharedImage(name, img.shape)), img)
+            # The block survived the child's exit, so it can still be attached by name.
+            SharedMemory(name=name).close()
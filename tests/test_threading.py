@@ -0,0 +1,71 @@
+import gc
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List
+
+import numpy as np
+import pytest
+from numpy.testing import assert_array_equal
+
+import webp
+
+NUM_THREADS = 8
+
+
+def _random_image(seed: int) -> np.ndarray:
+    return np.random.RandomState(seed).randint(0, 256, size=(24, 32, 3), dtype=np.uint8)
+
+
+def _race(func: Callable[[], object]) -> List[object]:
+    """Call `func` from several threads at once, and return the results or exceptions."""
+    barrier = threading.Barrier(NUM_THREADS)
+    results: List[object] = []
+
+    def call() -> None:
+        barrier.wait()
+        try:
+            results.append(func())
+        except RuntimeError as e:
+            results.append(e)
+
+    threads = [threading.Thread(target=call) for _ in range(NUM_THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+class TestThreading:
+    @pytest.mark.usefixtures("memory_tracking")
+    def test_encode_decode_stress(self) -> None:
+        config = webp.FrozenWebPConfig.new(lossless=True, method=0)
+        shared_data = webp.WebPPicture.from_numpy(_random_image(0)).encode(config)
+        barrier = threading.Barrier(NUM_THREADS)
+        gc.collect()
+        before = webp.memory_stats().live_objects
+
+        def work(seed: int) -> None:
+            img = _random_image(seed)
+            encoder = webp.Encoder(config)
+            decoder = webp.Decoder(webp.WebPColorMode.RGB)
+            barrier.wait()
+            for _ in range(20):
+                assert_array_equal(decoder.decode(encoder.encode(img)), img)
+                # A WebPData and a frozen config may be shared between threads.
+                assert_array_equal(shared_data.decode(webp.WebPColorMode.RGB), _random_image(0))
+                webp.WebPPicture.from_numpy(img).encode(config)
+
+        with ThreadPoolExecutor(max_workers=NUM_THREADS) as executor:
+            for future in [executor.submit(work, seed) for seed in range(NUM_THREADS)]:
+                future.result()
+
+        gc.collect()
+        assert webp.memory_stats().live_objects == before
+
+    def test_ownership_transfer(self) -> None:
+        for _ in range(20):
+            results = _race(webp.WebPMemoryWriter.new().to_webp_data)
+            # Exactly one thread takes ownership of the writer's memory.
+            assert sum(isinstance(result, webp.WebPData) for result in results) == 1
+            assert all(isinstance(result, (webp.WebPData, RuntimeError)) for result in results)
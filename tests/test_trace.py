@@ -0,0 +1,60 @@
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import List
+
+import numpy as np
+
+import webp
+from webp.trace import MetricsAggregator, TraceEvent
+
+
+class TestTrace:
+    def test_events(self) -> None:
+        img = np.zeros((16, 32, 3), dtype=np.uint8)
+        events: List[TraceEvent] = []
+
+        with TemporaryDirectory() as tmpdir, webp.tracing(events.append):
+            file_name = Path(tmpdir) / "image.webp"
+            webp.imwrite(file_name, img, quality=50)
+            webp.imread(file_name, "RGB")
+
+        assert [event.operation for event in events] == ["import", "encode", "write_file", "read_file", "decode"]
+        encode = events[1]
+        assert (encode.width, encode.height) == (32, 16)
+        assert encode.config == {"lossless": 0, "quality": 50.0, "method": 4}
+        assert events[2].bytes_in == encode.bytes_out == events[3].bytes_out
+        decode = events[4]
+        assert decode.mode == "RGB"
+        assert decode.bytes_out == img.nbytes
+        assert all(event.duration_ns >= 0 for event in events)
+
+        # The tracer is removed when the block exits.
+        webp.WebPPicture.from_numpy(img)
+        assert len(events) == 5
+
+    def test_anim_events(self) -> None:
+        imgs = [np.full((8, 8, 4), i, dtype=np.uint8) for i in range(3)]
+        aggregator = MetricsAggregator()
+
+        with TemporaryDirectory() as tmpdir, webp.tracing(aggregator):
+            file_name = Path(tmpdir) / "anim.webp"
+            webp.mimwrite(file_name, imgs, fps=10, lossless=True)
+            webp.mimread(file_name)
+
+        counts = aggregator.counts()
+        assert counts["anim_encode_frame"] == 3
+        assert counts["anim_assemble"] == 1
+        assert counts["anim_decode_frame"] == 3
+
+    def test_prometheus(self) -> None:
+        aggregator = MetricsAggregator(buckets=(0.001, 0.01))
+        for duration_ns in (500_000, 5_000_000, 50_000_000):
+            aggregator(TraceEvent("encode", 8, 8, None, None, 256, 100, 0, duration_ns))
+
+        text = aggregator.to_prometheus()
+        assert 'webp_operation_duration_seconds_bucket{operation="encode",le="0.001"} 1' in text
+        assert 'webp_operation_duration_seconds_bucket{operation="encode",le="0.01"} 2' in text
+        assert 'webp_operation_duration_seconds_bucket{operation="encode",le="+Inf"} 3' in text
+        assert 'webp_operation_duration_seconds_count{operation="encode"} 3' in text
+        assert 'webp_operation_bytes_in_total{operation="encode"} 768' in text
+        assert 'webp_operation_bytes_out_total{operation="encode"} 300' in text
@@ -1,3 +1,4 @@
+import platform
 from pathlib import Path
 from tempfile import TemporaryDirectory
 
@@ -39,6 +40,74 @@ class TestWebP:
                 expected = np.asarray(img, dtype=np.uint8)
                 assert_array_equal(arr, expected)
 
+    def test_decode_out(self) -> None:
+        rng = np.random.RandomState(42)
+        img = rng.randint(0, 256, size=(16, 32, 3), dtype=np.uint8)
+        webp_data = webp.WebPPicture.from_numpy(img).encode(webp.WebPConfig.new(lossless=True))
+
+        out = np.zeros_like(img)
+        arr = webp_data.decode(color_mode=webp.WebPColorMode.RGB, out=out)
+        assert arr is out
+        assert_array_equal(out, img)
+
+        with pytest.raises(webp.WebPError):
+            webp_data.decode(color_mode=webp.WebPColorMode.RGBA, out=out)
+
+    def test_decode_packed(self) -> None:
+        rng = np.random.RandomState(42)
+        img = rng.randint(1, 256, size=(16, 32, 4), dtype=np.uint8)
+        webp_data = webp.WebPPicture.from_numpy(img).encode(webp.WebPConfig.new(lossless=True))
+        r, g, b, a = (img[..., i].astype(np.uint16) for i in range(4))
+
+        arr = webp_data.decode(webp.WebPColorMode.RGB_565)
+        assert arr.shape == (16, 32)
+        assert arr.dtype == np.dtype(np.uint16)
+        assert_array_equal(arr, (r >> 3) << 11 | (g >> 2) << 5 | b >> 3)
+        arr = webp_data.decode(webp.WebPColorMode.RGBA_4444)
+        assert_array_equal(arr, (r >> 4) << 12 | (g >> 4) << 8 | (b >> 4) << 4 | a >> 4)
+
+        out = np.empty((16, 32), dtype=np.uint16)
+        assert webp_data.decode(webp.WebPColorMode.RGB_565, out=out) is out
+        with pytest.raises(webp.WebPError):
+            webp_data.decode(webp.WebPColorMode.RGB_565, out=np.empty((16, 32, 2), dtype=np.uint8))
+
+        dec_buf = webp_data.decode_buffer(webp.WebPColorMode.RGB_565)
+        assert dec_buf.shape == (16, 32)
+        assert_array_equal(dec_buf.to_numpy(), out)
+
+        for color_mode in (webp.WebPColorMode.RGB_565, webp.WebPColorMode.RGBA_4444, webp.WebPColorMode.rgbA_4444):
+            expected = webp_data.decode(color_mode)
+            arr = np.from_dlpack(webp_data.decode_buffer(color_mode))
+            assert arr.dtype == np.dtype(np.uint16)
+            assert_array_equal(arr, expected)
+            # Native uint16 arrays (such as those imported from DLPack) can be decoded into.
+            assert_array_equal(webp_data.decode(color_mode, out=np.from_dlpack(np.zeros_like(expected))), expected)
+
+    def test_decode_into_atlas(self) -> None:
+        rng = np.random.RandomState(0)
+        tiles = [rng.randint(1, 256, size=(8 + i, 16, 4), dtype=np.uint8) for i in range(5)]
+        buffers = [webp.WebPPicture.from_numpy(tile).encode(webp.WebPConfig.new(lossless=True)) for tile in tiles]
+        layout = [(16 * i, i) for i in range(5)]
+
+        for max_workers in [1, 2]:
+            atlas = webp.decode_into_atlas(
+                [bytes(buf.buffer()) for buf in buffers[:3]] + buffers[3:], layout, max_workers=max_workers
+            )
+            assert atlas.shape == (16, 80, 4)
+            for tile, (x, y) in zip(tiles, layout):
+                assert_array_equal(atlas[y : y + tile.shape[0], x : x + 16], tile)
+            assert not atlas[: layout[-1][1]].any(axis=-1)[:, -16:].any()
+
+        out = np.full((20, 80), 7, dtype=np.uint16)
+        assert webp.decode_into_atlas(buffers, layout, color_mode=webp.WebPColorMode.RGB_565, out=out) is out
+        assert_array_equal(out[4:16, 64:80], buffers[4].decode(webp.WebPColorMode.RGB_565))
+        assert (out[16:] == 7).all()
+
+        with pytest.raises(webp.WebPError, match="image 4"):
+            webp.decode_into_atlas(buffers, layout, size=(79, 16))
+        with pytest.raises(webp.WebPError):
+            webp.decode_into_atlas(buffers, layout[:4])
+
     def test_anim(self) -> None:
         imgs = []
         width = 256
@@ -196,6 +265,18 @@ class TestWebP:
             expected = np.asarray(image_bars_rgba, dtype=np.uint8)
             assert_array_equal(actual, expected)
 
+    def test_image_palette_old_pillow(self, image_bars_palette: Image.Image, monkeypatch: pytest.MonkeyPatch) -> None:
+        # Before Pillow 9.1, getpalette() took no arguments and always returned RGB.
+        getpalette = Image.Image.getpalette
+
+        def old_getpalette(img: Image.Image) -> object:
+            return getpalette(img)
+
+        monkeypatch.setattr(Image.Image, "getpalette", old_getpalette)
+        pic = webp.WebPPicture.from_pil(image_bars_palette)
+        actual = pic.encode(webp.WebPConfig.new(lossless=True)).decode(webp.WebPColorMode.RGBA)
+        assert_array_equal(actual, np.asarray(image_bars_palette.convert("RGBA")))
+
     def test_image_palette_opaque(self, image_bars_palette_opaque: Image.Image) -> None:
         with TemporaryDirectory() as tmpdir:
             file_name = Path(tmpdir) / "image.webp"
@@ -222,6 +303,106 @@ class TestWebP:
             expected = np.asarray(image_bars_rgba, dtype=np.uint8)
             assert_array_equal(actual, expected)
 
+    def test_image_palette_alpha(self) -> None:
+        # A palette with per-entry alpha, as produced by quantizing an RGBA image.
+        arr = np.zeros((8, 8, 4), dtype=np.uint8)
+        arr[:, :4] = (255, 0, 0, 255)
+        arr[:, 4:] = (0, 0, 255, 128)
+        img = Image.fromarray(arr, "RGBA").quantize(method=Image.Quantize.FASTOCTREE)
+        assert img.mode == "P"
+
+        webp_data = webp.WebPPicture.from_pil(img).encode(webp.WebPConfig.new(lossless=True))
+        assert_array_equal(webp_data.decode(webp.WebPColorMode.RGBA), np.asarray(img.convert("RGBA")))
+
+    def test_picture_from_palette(self) -> None:
+        indices = np.array([[0, 1], [2, 3]], dtype=np.uint8)
+        palette = np.array([[255, 0, 0, 255], [0, 255, 0, 255], [0, 0, 255, 255]], dtype=np.uint8)
+        webp_data = webp.WebPPicture.from_palette(indices, palette).encode(webp.WebPConfig.new(lossless=True))
+        expected = np.array([[[255, 0, 0, 255], [0, 255, 0, 255]], [[0, 0, 255, 255], [0, 0, 0, 0]]])
+        assert_array_equal(webp_data.decode(webp.WebPColorMode.RGBA), expected)
+
+        with pytest.raises(webp.WebPError):
+            webp.WebPPicture.from_palette(indices, np.zeros((257, 4), dtype=np.uint8))
+
+    def test_recommend_config(self, image_bars_palette: Image.Image) -> None:
+        assert webp.recommend_config(image_bars_palette).lossless
+        few_colors = np.zeros((64, 64, 3), dtype=np.uint8)
+        few_colors[10:20, 10:50] = (200, 30, 30)
+        assert webp.recommend_config(few_colors).lossless
+        assert webp.recommend_config(Image.fromarray(few_colors)).lossless
+        noise = np.random.RandomState(0).randint(0, 256, size=(64, 64, 3), dtype=np.uint8)
+        config = webp.recommend_config(noise, quality=60)
+        assert not config.lossless
+        assert config.quality == 60
+        assert not webp.recommend_config(few_colors, max_colors=1).lossless
+
+    def test_optimize_alpha(self) -> None:
+        rng = np.random.RandomState(0)
+        arr = rng.randint(0, 256, size=(16, 16, 4), dtype=np.uint8)
+        arr[:, :8, 3] = 0
+        arr[:, 8:, 3] = 255
+
+        pic = webp.WebPPicture.from_numpy(arr)
+        assert pic.has_transparency()
+        assert pic.optimize_alpha()
+        # Keep the cleared colours exactly, so that the result shows what optimize_alpha did.
+        webp_data = pic.encode(webp.FrozenWebPConfig.new(lossless=True)._replace(exact=1))
+        expected = arr.copy()
+        expected[:, :8] = 0
+        assert_array_equal(webp_data.decode(webp.WebPColorMode.RGBA), expected)
+
+        opaque = webp.WebPPicture.from_numpy(arr[:, 8:])
+        assert not opaque.has_transparency()
+        assert not opaque.optimize_alpha()
+
+        pic = webp.WebPPicture.from_numpy(arr)
+        pic.cleanup_transparent_area()
+        assert pic.has_transparency()
+
+        with TemporaryDirectory() as tmpdir:
+            file_name = Path(tmpdir) / "image.webp"
+            webp.imwrite(file_name, np.ascontiguousarray(arr[:, 8:]), optimize_alpha=True)
+            dec_config = webp.WebPDecoderConfig.new()
+            dec_config.read_features(webp.WebPData.from_buffer(file_name.read_bytes()))
+            assert not dec_config.input.has_alpha
+
+            # Noisy colours hidden under transparent pixels cost bits in a lossy encode, since
+            # libwebp only smooths them out rather than clearing them.
+            arr = rng.randint(0, 256, size=(64, 64, 4), dtype=np.uint8)
+            arr[:, :32, 3] = 0
+            arr[:, 32:] = (200, 100, 50, 255)
+            sizes = []
+            decoded = []
+            for optimize_alpha in (False, True):
+                webp.imwrite(file_name, arr, optimize_alpha=optimize_alpha, quality=80)
+                sizes.append(file_name.stat().st_size)
+                decoded.append(webp.imread(file_name, "RGBA"))
+            assert sizes[1] < sizes[0]
+            assert not decoded[0][:, :32, 3].any()
+            assert decoded[0][:, :16, :3].any()
+            # Away from the edge of the opaque area, the transparent pixels decode as transparent black.
+            assert not decoded[1][:, :32, 3].any()
+            assert not decoded[1][:, :16].any()
+
+    def test_anim_optimize_alpha(self) -> None:
+        rng = np.random.RandomState(0)
+        frames = []
+        for _ in range(3):
+            # The same visible content, with different colours hidden under transparent pixels.
+            arr = rng.randint(0, 256, size=(16, 16, 4), dtype=np.uint8)
+            arr[..., 3] = 0
+            arr[4:12, 4:12] = (255, 0, 0, 255)
+            frames.append(arr)
+
+        with TemporaryDirectory() as tmpdir:
+            file_name = Path(tmpdir) / "anim.webp"
+            frame_counts = []
+            for optimize_alpha in (False, True):
+                webp.mimwrite(file_name, frames, fps=10, lossless=True, dedupe=True, optimize_alpha=optimize_alpha)
+                webp_data = webp.WebPData.from_buffer(file_name.read_bytes())
+                frame_counts.append(webp.WebPDemuxer.new(webp_data).frame_count)
+            assert frame_counts == [3, 1]
+
     def test_greyscale_save_image(self) -> None:
         width = 256
         height = 64
@@ -236,3 +417,281 @@ class TestWebP:
         with pytest.raises(webp.WebPError) as ex_info:
             webp.WebPPicture.from_numpy(np.ones([2, 2, 2, 2], dtype=np.uint8))
         assert str(ex_info.value) == "unexpected array shape: (2, 2, 2, 2)"
+
+    def test_webp_data_array_interface(self) -> None:
+        img = np.zeros((8, 8, 3), dtype=np.uint8)
+        webp_data = webp.WebPPicture.from_numpy(img).encode()
+
+        arr = np.asarray(webp_data)
+        assert arr.shape == (webp_data.size,)
+        assert arr.tobytes() == bytes(webp_data.buffer())
+        assert np.from_dlpack(webp_data).tobytes() == arr.tobytes()
+
+        readonly_data = webp.WebPData.from_buffer(bytes(webp_data.buffer()))
+        assert not np.asarray(readonly_data).flags.writeable
+
+    def test_decode_buffer(self) -> None:
+        rng = np.random.RandomState(42)
+        img = rng.randint(1, 256, size=(16, 32, 4), dtype=np.uint8)
+        webp_data = webp.WebPPicture.from_numpy(img).encode(webp.WebPConfig.new(lossless=True))
+
+        dec_buf = webp_data.decode_buffer(webp.WebPColorMode.RGBA)
+        assert dec_buf.shape == (16, 32, 4)
+        assert_array_equal(np.asarray(dec_buf), img)
+        assert_array_equal(np.from_dlpack(dec_buf), img)
+
+    def test_picture_from_dlpack(self) -> None:
+        rng = np.random.RandomState(42)
+        img = rng.randint(0, 256, size=(16, 32, 3), dtype=np.uint8)
+        dec_buf = (
+            webp.WebPPicture.from_numpy(img)
+            .encode(webp.WebPConfig.new(lossless=True))
+            .decode_buffer(webp.WebPColorMode.RGB)
+        )
+
+        # Re-encode straight from a DLPack-capable object and decode into another one.
+        webp_data = webp.WebPPicture.from_numpy(dec_buf).encode(webp.WebPConfig.new(lossless=True))
+        out = webp_data.decode_buffer(webp.WebPColorMode.RGB)
+        webp_data.decode(webp.WebPColorMode.RGB, out=out)
+        assert_array_equal(np.asarray(out), img)
+
+    def test_encoder_decoder(self) -> None:
+        rng = np.random.RandomState(42)
+        encoder = webp.Encoder(lossless=True)
+        decoder = webp.Decoder(webp.WebPColorMode.RGBA)
+        for shape in [(16, 32, 3), (16, 32, 4), (8, 8, 4), (16, 32, 4)]:
+            img = rng.randint(1, 256, size=shape, dtype=np.uint8)
+            webp_data = encoder.encode(img)
+            assert_array_equal(webp_data.decode(webp.WebPColorMode.RGBA), decoder.decode(webp_data))
+            expected = webp.WebPPicture.from_numpy(img).encode(encoder.config).decode(webp.WebPColorMode.RGBA)
+            assert_array_equal(decoder.decode(webp_data.buffer()), expected)
+
+        # The encoder's picture can be encoded lossy and then reused.
+        lossy_encoder = webp.Encoder(quality=90)
+        img = rng.randint(0, 256, size=(16, 16, 3), dtype=np.uint8)
+        first = lossy_encoder.encode(img).buffer()
+        assert lossy_encoder.encode(img).buffer() == first
+        assert first == webp.WebPPicture.from_numpy(img).encode(lossy_encoder.config).buffer()
+
+    def test_frozen_config(self) -> None:
+        frozen = webp.FrozenWebPConfig.new(quality=60, method=2)
+        assert webp.FrozenWebPConfig.new(quality=60, method=2) is frozen
+        assert frozen.ptr is webp.FrozenWebPConfig.new(quality=60, method=2).ptr
+        assert {frozen: 1}[webp.WebPConfig.new(quality=60, method=2).freeze()] == 1
+        assert (frozen.quality, frozen.method, frozen.lossless) == (60.0, 2, 0)
+
+        thawed = frozen.thaw()
+        assert thawed.freeze() == frozen
+        thawed.quality = 90
+        assert frozen.quality == 60.0
+
+        img = np.random.RandomState(0).randint(0, 256, size=(16, 16, 3), dtype=np.uint8)
+        pic = webp.WebPPicture.from_numpy(img)
+        assert pic.encode(frozen).buffer() == pic.encode(frozen.thaw()).buffer()
+
+        with pytest.raises(webp.WebPError):
+            _ = frozen._replace(method=7).ptr
+
+        for quality in range(300):
+            _ = frozen._replace(quality=quality / 3).ptr
+        assert len(webp._core._frozen_config_ptrs) == webp._core._FROZEN_CONFIG_CACHE_SIZE  # noqa: SLF001
+
+    def test_anim_dedupe(self) -> None:
+        rng = np.random.RandomState(0)
+        img1 = rng.randint(0, 255, size=(16, 16, 3), dtype=np.uint8)
+        img2 = rng.randint(0, 255, size=(16, 16, 3), dtype=np.uint8)
+
+        with TemporaryDirectory() as tmpdir:
+            file_name = Path(tmpdir) / "anim.webp"
+
+            webp.mimwrite(
+                file_name, [img1, img1, img1 + 1, img2], fps=4, lossless=True, dedupe=True, dedupe_tolerance=1
+            )
+            with file_name.open("rb") as f:
+                dec = webp.WebPAnimDecoder.new(webp.WebPData.from_buffer(f.read()))
+                assert [t for _, t in dec.frames()] == [750, 1000]
+            dec_arrs = webp.mimread(file_name, fps=4, pilmode="RGB")
+            assert len(dec_arrs) == 4
+            assert_array_equal(dec_arrs[2], img1)
+            assert_array_equal(dec_arrs[3], img2)
+
+            # All frames identical, so the animation collapses to a still image.
+            webp.mimwrite(file_name, [img1] * 3, fps=4, lossless=True, dedupe=True)
+            assert len(webp.mimread(file_name, fps=4)) == 1
+
+            # Deduplication is opt-in, so near-duplicate frames are kept by default.
+            webp.mimwrite(file_name, [img1, img1 + 1, img2], fps=4, lossless=True, dedupe_tolerance=1)
+            demux = webp.WebPDemuxer.new(webp.WebPData.from_buffer(file_name.read_bytes()))
+            assert demux.frame_count == 3
+
+    def test_anim_keyframe_options(self) -> None:
+        enc_opts = webp.WebPAnimEncoderOptions.new(kmin=2, kmax=5)
+        assert (enc_opts.kmin, enc_opts.kmax) == (2, 5)
+
+    def test_anim_durations(self) -> None:
+        rng = np.random.RandomState(0)
+        imgs = [rng.randint(0, 256, size=(16, 16, 3), dtype=np.uint8) for _ in range(3)]
+
+        with TemporaryDirectory() as tmpdir:
+            file_name = Path(tmpdir) / "anim.webp"
+
+            for kwargs in [
+                {"arrs": imgs, "durations": [100, 400, 250]},
+                {"arrs": imgs, "timestamps_ms": [0, 100, 500, 750]},
+                {"arrs": list(zip(imgs, [100, 400, 250]))},
+            ]:
+                webp.mimwrite(file_name, lossless=True, **kwargs)
+                with file_name.open("rb") as f:
+                    dec = webp.WebPAnimDecoder.new(webp.WebPData.from_buffer(f.read()))
+                    assert [t for _, t in dec.frames()] == [100, 500, 750]
+
+            pil_imgs = [Image.fromarray(img) for img in imgs]
+            webp.save_images(list(zip(pil_imgs, [100, 400, 250])), file_name, lossless=True)
+            assert len(webp.load_images(file_name, "RGB", fps=10)) == 8
+
+            with pytest.raises(webp.WebPError):
+                webp.mimwrite(file_name, imgs, durations=[100, 200])
+            with pytest.raises(webp.WebPError):
+                webp.mimwrite(file_name, imgs, timestamps_ms=[0, 100, 100, 200])
+
+    def test_mimread_parallel(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        rng = np.random.RandomState(0)
+        frame = rng.randint(0, 256, size=(32, 32, 4), dtype=np.uint8)
+        imgs = []
+        for i in range(24):
+            frame = frame.copy()
+            frame[i : i + 8, 4:20] = rng.randint(0, 256, size=(8, 16, 4))
+            imgs.append(frame)
+
+        with TemporaryDirectory() as tmpdir:
+            file_name = Path(tmpdir) / "anim.webp"
+            webp.mimwrite(file_name, imgs, fps=10, quality=70, kmin=2, kmax=4)
+
+            with file_name.open("rb") as f:
+                demux = webp.WebPDemuxer.new(webp.WebPData.from_buffer(f.read()))
+            assert demux.frame_count == 24
+            assert len(demux.keyframes()) > 1
+
+            for kwargs in [{}, {"fps": 4, "pilmode": "RGB"}]:
+                expected = webp.mimread(file_name, **kwargs)
+                actual = webp.mimread(file_name, max_workers=3, **kwargs)
+                assert len(actual) == len(expected)
+                for actual_arr, expected_arr in zip(actual, expected):
+                    assert_array_equal(actual_arr, expected_arr)
+
+            # A single worker decodes the whole animation in one run, which may use libwebp's thread.
+            new_options = webp.WebPAnimDecoderOptions.new
+            used_threads = []
+
+            def record_options(**kwargs: object) -> webp.WebPAnimDecoderOptions:
+                used_threads.append(kwargs["use_threads"])
+                return new_options(**kwargs)  # type: ignore[arg-type]
+
+            monkeypatch.setattr(webp.WebPAnimDecoderOptions, "new", staticmethod(record_options))
+            for use_threads in (False, True):
+                webp.mimread(file_name, max_workers=1, use_threads=use_threads)
+            assert used_threads == [False, True]
+
+    def test_premultiplied_modes(self) -> None:
+        rng = np.random.RandomState(0)
+        imgs = [rng.randint(0, 256, size=(8, 16, 4), dtype=np.uint8) for _ in range(3)]
+
+        with TemporaryDirectory() as tmpdir:
+            file_name = Path(tmpdir) / "image.webp"
+            webp.imwrite(file_name, imgs[0], lossless=True)
+            rgba = webp.imread(file_name).astype(np.int32)
+            rgb_a = webp.imread(file_name, color_mode=webp.WebPColorMode.rgbA)
+            assert np.abs(rgb_a[..., :3] - rgba[..., :3] * rgba[..., 3:] / 255).max() <= 1
+            for color_mode, order in [(webp.WebPColorMode.bgrA, [2, 1, 0, 3]), (webp.WebPColorMode.Argb, [3, 0, 1, 2])]:
+                assert_array_equal(webp.imread(file_name, color_mode=color_mode), rgb_a[..., order])
+
+            file_name = Path(tmpdir) / "anim.webp"
+            webp.mimwrite(file_name, imgs, fps=10, lossless=True)
+            expected = webp.mimread(file_name, pilmode="RGBa")
+            for color_mode, order in [(webp.WebPColorMode.bgrA, [2, 1, 0, 3]), (webp.WebPColorMode.Argb, [3, 0, 1, 2])]:
+                for kwargs in [{}, {"max_workers": 2}]:
+                    frames = webp.mimread(file_name, color_mode=color_mode, **kwargs)
+                    assert len(frames) == len(expected)
+                    for frame, expected_frame in zip(frames, expected):
+                        assert_array_equal(frame, expected_frame[..., order])
+
+        with pytest.raises(webp.WebPError):
+            webp.WebPAnimDecoderOptions.new(color_mode=webp.WebPColorMode.RGB)
+
+    def test_container_metadata(self) -> None:
+        img = np.random.RandomState(0).randint(0, 256, size=(16, 16, 3), dtype=np.uint8)
+        webp_data = webp.WebPPicture.from_numpy(img).encode(webp.WebPConfig.new(lossless=True))
+        icc_profile = b"\x00" * 128
+        exif = Image.Exif()
+        exif[0x010F] = "pywebp"
+
+        container = webp.WebPContainer.new(webp_data)
+        assert container.exif is None
+        container.icc_profile = icc_profile
+        container.exif = exif.tobytes()
+        container.xmp = b"<x:xmpmeta/>"
+        with TemporaryDirectory() as tmpdir:
+            file_name = Path(tmpdir) / "image.webp"
+            container.save(file_name)
+
+            with Image.open(file_name) as pil_img:
+                assert pil_img.info["icc_profile"] == icc_profile
+                assert pil_img.getexif()[0x010F] == "pywebp"
+
+            container = webp.WebPContainer.load(file_name)
+            assert container.xmp == b"<x:xmpmeta/>"
+            container.strip_metadata()
+            stripped = container.assemble()
+            assert stripped.size < file_name.stat().st_size
+            assert_array_equal(stripped.decode(webp.WebPColorMode.RGB), img)
+
+            stripped_container = webp.WebPContainer.new(stripped.buffer())
+            assert stripped_container.icc_profile == icc_profile
+            assert (stripped_container.exif, stripped_container.xmp) == (None, None)
+
+    def test_decode_limits(self) -> None:
+        img = np.zeros((32, 16, 3), dtype=np.uint8)
+        webp_data = webp.WebPPicture.from_numpy(img).encode(webp.WebPConfig.new(lossless=True))
+
+        with pytest.raises(webp.DecompressionBombError):
+            webp_data.decode(webp.WebPColorMode.RGB, max_pixels=511)
+        with pytest.raises(webp.DecompressionBombError):
+            webp_data.decode(webp.WebPColorMode.RGBA, max_bytes=32 * 16 * 3)
+        assert webp_data.decode(webp.WebPColorMode.RGB, max_pixels=512, max_bytes=32 * 16 * 3).shape == (32, 16, 3)
+
+        with TemporaryDirectory() as tmpdir:
+            file_name = Path(tmpdir) / "anim.webp"
+            webp.mimwrite(file_name, [img, img + 1, img + 2], fps=10, lossless=True, kmin=1, kmax=2)
+            demux = webp.WebPDemuxer.new(webp.WebPData.from_buffer(file_name.read_bytes()))
+            assert len(demux.keyframes()) > 1
+
+            webp.set_decode_limits(max_pixels=1024)
+            try:
+                assert webp.get_decode_limits().max_pixels == 1024
+                # Three frames of 512 pixels each.
+                with pytest.raises(webp.DecompressionBombError):
+                    webp.mimread(file_name)
+                with pytest.raises(webp.DecompressionBombError):
+                    webp.mimread(file_name, max_workers=2)
+                assert len(webp.mimread(file_name, max_pixels=1536)) == 3
+                assert webp_data.decode().shape == (32, 16, 4)
+
+                # Segments decoded in parallel get the caller's limits, not the process-wide ones.
+                webp.set_decode_limits(max_pixels=100)
+                serial = webp.mimread(file_name, max_pixels=1536)
+                parallel = webp.mimread(file_name, max_workers=3, max_pixels=1536)
+                assert len(parallel) == len(serial) == 3
+                for serial_arr, parallel_arr in zip(serial, parallel):
+                    assert_array_equal(parallel_arr, serial_arr)
+            finally:
+                webp.set_decode_limits()
+
+    def test_build_info(self) -> None:
+        info = webp.build_info()
+        assert info.encoder_version.count(".") == 2
+        assert info.decoder_version == info.encoder_version
+        assert info.compiler
+        assert set(info.cpu_features) <= {"sse2", "sse4.1", "avx2", "neon", "mips32", "mips_dsp_r2", "msa"}
+        if platform.machine().lower() in ("x86_64", "amd64"):
+            # SSE2 is part of the x86-64 baseline.
+            assert "sse2" in info.cpu_features
@@ -0,0 +1,8 @@
+"""Entry point for `python -m webp`."""
+
+import sys
+
+from webp.cli import main
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,642 @@
+"""Wrappers for the libwebp animation encoder, decoder, and demuxer."""
+
+import itertools
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Generator, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from webp import memory as _memory
+from webp import trace as _trace
+from webp._core import (
+    RGBA_CHANNELS,
+    AnyWebPConfig,
+    WebPColorMode,
+    WebPData,
+    WebPError,
+    WebPPicture,
+    _check_decode_limits,
+    _picture_nbytes,
+    _Pointer,
+    _WebPData,
+    get_decode_limits,
+)
+from webp._webp import ffi, lib
+
+
+class WebPAnimEncoderOptions:
+    """Represent WebP animation encoder options."""
+
+    def __init__(self, ptr: _Pointer) -> None:
+        """Initialize the wrapper."""
+        self.ptr = ptr
+
+    @property
+    def loop_count(self) -> int:
+        """Return the animation loop count."""
+        return self.ptr.anim_params.loop_count
+
+    @loop_count.setter
+    def loop_count(self, loop_count: int) -> None:
+        """Return the animation loop count."""
+        self.ptr.anim_params.loop_count = loop_count
+
+    @property
+    def minimize_size(self) -> bool:
+        """Return whether size minimization is enabled."""
+        return self.ptr.minimize_size != 0
+
+    @minimize_size.setter
+    def minimize_size(self, minimize_size: bool) -> None:
+        """Return whether size minimization is enabled."""
+        self.ptr.minimize_size = 1 if minimize_size else 0
+
+    @property
+    def allow_mixed(self) -> bool:
+        """Return whether mixed compression is enabled."""
+        return self.ptr.allow_mixed != 0
+
+    @allow_mixed.setter
+    def allow_mixed(self, allow_mixed: bool) -> None:
+        """Return whether mixed compression is enabled."""
+        self.ptr.allow_mixed = 1 if allow_mixed else 0
+
+    @property
+    def kmin(self) -> int:
+        """Return the minimum distance between keyframes."""
+        return self.ptr.kmin
+
+    @kmin.setter
+    def kmin(self, kmin: int) -> None:
+        """Return the minimum distance between keyframes."""
+        self.ptr.kmin = kmin
+
+    @property
+    def kmax(self) -> int:
+        """Return the maximum distance between keyframes."""
+        return self.ptr.kmax
+
+    @kmax.setter
+    def kmax(self, kmax: int) -> None:
+        """Return the maximum distance between keyframes."""
+        self.ptr.kmax = kmax
+
+    @staticmethod
+    def new(
+        *,
+        minimize_size: bool = False,
+        allow_mixed: bool = False,
+        kmin: Optional[int] = None,
+        kmax: Optional[int] = None,
+    ) -> "WebPAnimEncoderOptions":
+        """Create a new wrapper instance.
+
+        Args:
+            minimize_size (bool): Minimize output size (slow).
+            allow_mixed (bool): Allow a mix of lossy and lossless frames.
+            kmin (int, optional): Minimum distance between keyframes. libwebp picks a default
+                based on `kmax` if not given.
+            kmax (int, optional): Maximum distance between keyframes. 0 makes every frame a
+                keyframe. libwebp picks a default if not given.
+        """
+        ptr = ffi.new("WebPAnimEncoderOptions*")
+        if lib.WebPAnimEncoderOptionsInit(ptr) == 0:
+            msg = "version mismatch"
+            raise WebPError(msg)
+        enc_opts = WebPAnimEncoderOptions(ptr)
+        enc_opts.minimize_size = minimize_size
+        enc_opts.allow_mixed = allow_mixed
+        if kmin is not None:
+            enc_opts.kmin = kmin
+        if kmax is not None:
+            enc_opts.kmax = kmax
+        return enc_opts
+
+
+class WebPAnimEncoder:
+    """Encode animated WebP images."""
+
+    def __init__(self, ptr: _Pointer, enc_opts: WebPAnimEncoderOptions) -> None:
+        """Initialize the wrapper."""
+        self.ptr = ptr
+        self.enc_opts = enc_opts
+        _memory.track(self)
+
+    def __del__(self) -> None:
+        """Release owned WebP resources."""
+        _memory.untrack(self)
+        lib.WebPAnimEncoderDelete(self.ptr)
+
+    def encode_frame(self, frame: WebPPicture, timestamp_ms: int, config: Optional[AnyWebPConfig] = None) -> None:
+        """Add a frame to the animation.
+
+        Args:
+            frame (WebPPicture): Frame image.
+            timestamp_ms (int): When the frame should be shown (in milliseconds).
+            config (WebPConfig): Encoder configuration.
+        """
+        # A NULL configuration makes libwebp use its defaults, which match `WebPConfig.new()`.
+        config_ptr = ffi.NULL if config is None else config.ptr
+        tracer = _trace.tracer
+        if tracer is not None:
+            start_ns = time.perf_counter_ns()
+        if lib.WebPAnimEncoderAdd(self.ptr, frame.ptr, timestamp_ms, config_ptr) == 0:
+            raise WebPError("encoding error: " + self.ptr.error_code)
+        if tracer is not None:
+            _trace.emit(
+                tracer,
+                "anim_encode_frame",
+                start_ns,
+                width=frame.ptr.width,
+                height=frame.ptr.height,
+                config=config,
+                bytes_in=_picture_nbytes(frame.ptr),
+            )
+
+    def assemble(self, end_timestamp_ms: int) -> WebPData:
+        """Assemble encoded animation data."""
+        tracer = _trace.tracer
+        if tracer is not None:
+            start_ns = time.perf_counter_ns()
+        if lib.WebPAnimEncoderAdd(self.ptr, ffi.NULL, end_timestamp_ms, ffi.NULL) == 0:
+            raise WebPError("encoding error: " + self.ptr.error_code)
+        _webp_data = _WebPData()
+        if lib.WebPAnimEncoderAssemble(self.ptr, _webp_data.ptr) == 0:
+            msg = "error assembling animation"
+            raise WebPError(msg)
+        webp_data = _webp_data.done()
+        if tracer is not None:
+            _trace.emit(tracer, "anim_assemble", start_ns, bytes_out=webp_data.size)
+        return webp_data
+
+    @staticmethod
+    def new(width: int, height: int, enc_opts: Optional[WebPAnimEncoderOptions] = None) -> "WebPAnimEncoder":
+        """Create a new wrapper instance."""
+        if enc_opts is None:
+            enc_opts = WebPAnimEncoderOptions.new()
+        ptr = lib.WebPAnimEncoderNew(width, height, enc_opts.ptr)
+        anim_enc = WebPAnimEncoder(ptr, enc_opts)
+        # The encoder keeps three ARGB canvases: the current frame, and the previous frame before
+        # and after disposal.
+        _memory.resize(anim_enc, 3 * width * height * 4)
+        return anim_enc
+
+
+# Color modes supported by the animation decoder, keyed by mode value, mapped to the mode that
+# libwebp decodes into. WebPAnimDecoder itself only produces RGBA, BGRA, rgbA, and bgrA, so ARGB
+# and Argb frames have their alpha channel moved to the front while they are copied out of the
+# decoder's canvas (a copy that is made for every frame anyway).
+_ANIM_DECODER_MODES = {
+    lib.MODE_RGBA: lib.MODE_RGBA,
+    lib.MODE_BGRA: lib.MODE_BGRA,
+    lib.MODE_rgbA: lib.MODE_rgbA,
+    lib.MODE_bgrA: lib.MODE_bgrA,
+    lib.MODE_ARGB: lib.MODE_RGBA,
+    lib.MODE_Argb: lib.MODE_rgbA,
+}
+
+
+class WebPAnimDecoderOptions:
+    """Represent WebP animation decoder options."""
+
+    def __init__(self, ptr: _Pointer) -> None:
+        """Initialize the wrapper."""
+        self.ptr = ptr
+        self._color_mode = WebPColorMode(ptr.color_mode)
+
+    @property
+    def color_mode(self) -> WebPColorMode:
+        """Return the decoder color mode."""
+        return self._color_mode
+
+    @color_mode.setter
+    def color_mode(self, color_mode: WebPColorMode) -> None:
+        """Set the decoder color mode.
+
+        Supported modes are RGBA, BGRA, ARGB, and their premultiplied variants rgbA, bgrA, and
+        Argb.
+        """
+        mode = _ANIM_DECODER_MODES.get(color_mode.value)
+        if mode is None:
+            msg = f"unsupported animation color mode: {color_mode!s}"
+            raise WebPError(msg)
+        self.ptr.color_mode = mode
+        self._color_mode = color_mode
+
+    @property
+    def use_threads(self) -> bool:
+        """Return whether threaded decoding is enabled."""
+        return self.ptr.use_threads != 0
+
+    @use_threads.setter
+    def use_threads(self, use_threads: bool) -> None:
+        """Return whether threaded decoding is enabled."""
+        self.ptr.use_threads = 1 if use_threads else 0
+
+    @staticmethod
+    def new(*, use_threads: bool = False, color_mode: WebPColorMode = WebPColorMode.RGBA) -> "WebPAnimDecoderOptions":
+        """Create a new wrapper instance."""
+        ptr = ffi.new("WebPAnimDecoderOptions*")
+        if lib.WebPAnimDecoderOptionsInit(ptr) == 0:
+            msg = "version mismatch"
+            raise WebPError(msg)
+        dec_opts = WebPAnimDecoderOptions(ptr)
+        dec_opts.use_threads = use_threads
+        dec_opts.color_mode = color_mode
+        return dec_opts
+
+
+class WebPAnimInfo:
+    """Represent WebP animation metadata."""
+
+    def __init__(self, ptr: _Pointer) -> None:
+        """Initialize the wrapper."""
+        self.ptr = ptr
+
+    @property
+    def frame_count(self) -> int:
+        """Return the number of animation frames."""
+        return self.ptr.frame_count
+
+    @property
+    def width(self) -> int:
+        """Return the canvas width."""
+        return self.ptr.canvas_width
+
+    @property
+    def height(self) -> int:
+        """Return the canvas height."""
+        return self.ptr.canvas_height
+
+    @property
+    def loop_count(self) -> int:
+        """Return the animation loop count."""
+        return self.ptr.loop_count
+
+    @staticmethod
+    def new() -> "WebPAnimInfo":
+        """Create a new wrapper instance."""
+        ptr = ffi.new("WebPAnimInfo*")
+        return WebPAnimInfo(ptr)
+
+
+class WebPAnimDecoder:
+    """Decode animated WebP images."""
+
+    def __init__(
+        self,
+        ptr: _Pointer,
+        dec_opts: WebPAnimDecoderOptions,
+        anim_info: WebPAnimInfo,
+        webp_data: Optional[WebPData] = None,
+    ) -> None:
+        """Initialize the wrapper."""
+        self.ptr = ptr
+        self.dec_opts = dec_opts
+        self.anim_info = anim_info
+        # The decoder reads from the WebP data without copying it.
+        self.webp_data = webp_data
+        # The decoder keeps two canvases: the current frame, and the previous frame after disposal.
+        _memory.track(self, 2 * anim_info.width * anim_info.height * 4)
+
+    def __del__(self) -> None:
+        """Release owned WebP resources."""
+        _memory.untrack(self)
+        lib.WebPAnimDecoderDelete(self.ptr)
+
+    def has_more_frames(self) -> bool:
+        """Return whether more frames are available."""
+        return lib.WebPAnimDecoderHasMoreFrames(self.ptr) != 0
+
+    def reset(self) -> None:
+        """Reset the decoder to the first frame."""
+        lib.WebPAnimDecoderReset(self.ptr)
+
+    def decode_frame(
+        self,
+        *,
+        out: "Optional[np.ndarray[Any, np.dtype[np.uint8]]]" = None,
+    ) -> Tuple["np.ndarray[Any, np.dtype[np.uint8]]", int]:
+        """Decodes the next frame of the animation.
+
+        Args:
+            out (np.ndarray, optional): Array to copy the frame into. It must have shape
+                (height, width, 4), or (height, width, 3) to drop the last channel (not
+                supported for ARGB and Argb).
+
+        Returns:
+            numpy.array: The frame image.
+            float: The timestamp for the end of the frame.
+        """
+        timestamp_ptr = ffi.new("int*")
+        buf_ptr = ffi.new("uint8_t**")
+        tracer = _trace.tracer
+        if tracer is not None:
+            start_ns = time.perf_counter_ns()
+        if lib.WebPAnimDecoderGetNext(self.ptr, buf_ptr, timestamp_ptr) == 0:
+            msg = "decoding error"
+            raise WebPError(msg)
+        if tracer is not None:
+            _trace.emit(
+                tracer,
+                "anim_decode_frame",
+                start_ns,
+                width=self.anim_info.width,
+                height=self.anim_info.height,
+                mode=self.dec_opts.color_mode.name,
+                bytes_out=self.anim_info.width * self.anim_info.height * 4,
+            )
+        size = self.anim_info.height * self.anim_info.width * 4
+        buf = ffi.buffer(buf_ptr[0], size)
+        canvas = np.frombuffer(buf, dtype=np.uint8).reshape(self.anim_info.height, self.anim_info.width, 4)
+        if self.dec_opts.color_mode.value != self.dec_opts.ptr.color_mode:
+            # Alpha-first modes, decoded by libwebp as RGBA or rgbA.
+            arr = np.empty_like(canvas) if out is None else out
+            arr[..., 0] = canvas[..., 3]
+            arr[..., 1:] = canvas[..., :3]
+        elif out is None:
+            arr = np.copy(canvas)
+        else:
+            np.copyto(out, canvas[..., : out.shape[-1]])
+            arr = out
+        # timestamp_ms contains the _end_ time of this frame
+        timestamp_ms = timestamp_ptr[0]
+        return arr, timestamp_ms
+
+    def frames(
+        self,
+    ) -> Generator[Tuple["np.ndarray[Any, np.dtype[np.uint8]]", int], None, None]:
+        """Yield decoded animation frames."""
+        while self.has_more_frames():
+            arr, timestamp_ms = self.decode_frame()
+            yield arr, timestamp_ms
+
+    @staticmethod
+    def new(
+        webp_data: WebPData,
+        dec_opts: Optional[WebPAnimDecoderOptions] = None,
+        *,
+        max_pixels: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+    ) -> "WebPAnimDecoder":
+        """Create a new wrapper instance.
+
+        Args:
+            webp_data (WebPData): Encoded animation.
+            dec_opts (WebPAnimDecoderOptions, optional): Decoder options.
+            max_pixels (int, optional): Maximum canvas size multiplied by the number of frames.
+                Defaults to the process-wide limit (see `set_decode_limits`).
+            max_bytes (int, optional): Maximum size of all decoded frames in bytes. Defaults to
+                the process-wide limit.
+        """
+        if dec_opts is None:
+            dec_opts = WebPAnimDecoderOptions.new()
+        _check_anim_decode_limits(webp_data, max_pixels, max_bytes)
+        ptr = lib.WebPAnimDecoderNew(webp_data.ptr, dec_opts.ptr)
+        if ptr == ffi.NULL:
+            msg = "failed to create decoder"
+            raise WebPError(msg)
+        anim_info = WebPAnimInfo.new()
+        if lib.WebPAnimDecoderGetInfo(ptr, anim_info.ptr) == 0:
+            msg = "failed to get animation info"
+            raise WebPError(msg)
+        return WebPAnimDecoder(ptr, dec_opts, anim_info, webp_data)
+
+
+def _check_anim_decode_limits(webp_data: WebPData, max_pixels: Optional[int], max_bytes: Optional[int]) -> None:
+    """Check the decode limits for all frames of an animation, using only its headers."""
+    limits = get_decode_limits()
+    if (max_pixels, max_bytes, limits.max_pixels, limits.max_bytes) == (None, None, None, None):
+        return
+    demux = WebPDemuxer.new(webp_data)
+    pixels = demux.canvas_width * demux.canvas_height * demux.frame_count
+    _check_decode_limits(pixels, pixels * RGBA_CHANNELS, max_pixels, max_bytes)
+
+
+class WebPFrameInfo(NamedTuple):
+    """Describe one frame of an animation, as stored in the file."""
+
+    frame_num: int
+    x_offset: int
+    y_offset: int
+    width: int
+    height: int
+    duration: int
+    dispose_method: int
+    blend_method: int
+    has_alpha: bool
+
+
+class WebPDemuxer:
+    """Read the structure of a WebP file without decoding it."""
+
+    def __init__(self, ptr: _Pointer, webp_data: WebPData) -> None:
+        """Initialize the wrapper."""
+        self.ptr = ptr
+        # The demuxer reads from the WebP data without copying it.
+        self.webp_data = webp_data
+        _memory.track(self)
+
+    def __del__(self) -> None:
+        """Release owned WebP resources."""
+        _memory.untrack(self)
+        lib.WebPDemuxDelete(self.ptr)
+
+    @property
+    def canvas_width(self) -> int:
+        """Return the canvas width."""
+        return lib.WebPDemuxGetI(self.ptr, lib.WEBP_FF_CANVAS_WIDTH)
+
+    @property
+    def canvas_height(self) -> int:
+        """Return the canvas height."""
+        return lib.WebPDemuxGetI(self.ptr, lib.WEBP_FF_CANVAS_HEIGHT)
+
+    @property
+    def frame_count(self) -> int:
+        """Return the number of frames."""
+        return lib.WebPDemuxGetI(self.ptr, lib.WEBP_FF_FRAME_COUNT)
+
+    @property
+    def loop_count(self) -> int:
+        """Return the animation loop count."""
+        return lib.WebPDemuxGetI(self.ptr, lib.WEBP_FF_LOOP_COUNT)
+
+    @property
+    def bgcolor(self) -> int:
+        """Return the animation background color."""
+        return lib.WebPDemuxGetI(self.ptr, lib.WEBP_FF_BACKGROUND_COLOR)
+
+    def frames(self) -> Generator[WebPFrameInfo, None, None]:
+        """Yield information about each frame."""
+        it = ffi.new("WebPIterator*")
+        if lib.WebPDemuxGetFrame(self.ptr, 1, it) == 0:
+            return
+        try:
+            while True:
+                yield WebPFrameInfo(
+                    frame_num=it.frame_num,
+                    x_offset=it.x_offset,
+                    y_offset=it.y_offset,
+                    width=it.width,
+                    height=it.height,
+                    duration=it.duration,
+                    dispose_method=it.dispose_method,
+                    blend_method=it.blend_method,
+                    has_alpha=it.has_alpha != 0,
+                )
+                if lib.WebPDemuxNextFrame(it) == 0:
+                    break
+        finally:
+            lib.WebPDemuxReleaseIterator(it)
+
+    def keyframes(self) -> List[int]:
+        """Return the indices of frames that can be decoded without any earlier frame.
+
+        This follows the rules used by libwebp's animation decoder, which clears the canvas
+        before drawing a keyframe.
+        """
+        canvas = (self.canvas_width, self.canvas_height)
+        keyframes = []
+        prev = None
+        prev_is_keyframe = False
+        for i, frame in enumerate(self.frames()):
+            covers_canvas = (frame.width, frame.height) == canvas and (
+                not frame.has_alpha or frame.blend_method == lib.WEBP_MUX_NO_BLEND
+            )
+            if prev is None or covers_canvas:
+                is_keyframe = True
+            else:
+                is_keyframe = prev.dispose_method == lib.WEBP_MUX_DISPOSE_BACKGROUND and (
+                    (prev.width, prev.height) == canvas or prev_is_keyframe
+                )
+            if is_keyframe:
+                keyframes.append(i)
+            prev = frame
+            prev_is_keyframe = is_keyframe
+        return keyframes
+
+    @staticmethod
+    def new(webp_data: WebPData) -> "WebPDemuxer":
+        """Create a new wrapper instance."""
+        ptr = lib.WebPDemux(webp_data.ptr)
+        if ptr == ffi.NULL:
+            msg = "failed to parse WebP data"
+            raise WebPError(msg)
+        return WebPDemuxer(ptr, webp_data)
+
+
+def _anim_segment(src_mux: _Pointer, demux: WebPDemuxer, start: int, stop: int) -> WebPData:
+    """Build a standalone animation from frames `start` to `stop` (exclusive) of another."""
+    mux = lib.WebPMuxNew()
+    try:
+        frame = ffi.new("WebPMuxFrameInfo*")
+        for nth in range(start + 1, stop + 1):
+            if lib.WebPMuxGetFrame(src_mux, nth, frame) != lib.WEBP_MUX_OK:
+                msg = "failed to read animation frame"
+                raise WebPError(msg)
+            err = lib.WebPMuxPushFrame(mux, frame, 1)
+            lib.WebPDataClear(ffi.addressof(frame, "bitstream"))
+            if err != lib.WEBP_MUX_OK:
+                msg = "failed to add animation frame"
+                raise WebPError(msg)
+        params = ffi.new("WebPMuxAnimParams*", {"bgcolor": demux.bgcolor, "loop_count": 1})
+        if (
+            lib.WebPMuxSetAnimationParams(mux, params) != lib.WEBP_MUX_OK
+            or lib.WebPMuxSetCanvasSize(mux, demux.canvas_width, demux.canvas_height) != lib.WEBP_MUX_OK
+        ):
+            msg = "failed to set animation parameters"
+            raise WebPError(msg)
+        _webp_data = _WebPData()
+        if lib.WebPMuxAssemble(mux, _webp_data.ptr) != lib.WEBP_MUX_OK:
+            msg = "error assembling animation"
+            raise WebPError(msg)
+        return _webp_data.done()
+    finally:
+        lib.WebPMuxDelete(mux)
+
+
+def decode_anim_parallel(  # noqa: PLR0913
+    webp_data: WebPData,
+    color_mode: WebPColorMode = WebPColorMode.RGBA,
+    *,
+    channels: Optional[int] = None,
+    max_workers: Optional[int] = None,
+    use_threads: bool = False,
+    max_pixels: Optional[int] = None,
+    max_bytes: Optional[int] = None,
+) -> Tuple["np.ndarray[Any, np.dtype[np.uint8]]", List[int]]:
+    """Decode all frames of an animation using several threads.
+
+    The animation is split at keyframes into segments that do not depend on each other. Each
+    worker decodes a run of segments with its own decoder, writing frames straight into one
+    preallocated array. Animations with few keyframes (which is common for files made with
+    `minimize_size` or a large `kmax`) will not speed up much.
+
+    Args:
+        webp_data (WebPData): Encoded animation.
+        color_mode (WebPColorMode): Output color mode (see `WebPAnimDecoderOptions.color_mode`).
+        channels (int, optional): Number of channels to keep (e.g. 3 to drop alpha). Defaults
+            to all 4.
+        max_workers (int, optional): Number of worker threads. Defaults to the number of CPUs.
+        use_threads (bool): Use libwebp's own decoding thread when the animation is decoded as a
+            single run (see `WebPAnimDecoderOptions.use_threads`). Runs decoded in parallel
+            never do, since the workers already keep the CPUs busy.
+        max_pixels (int, optional): Maximum canvas size multiplied by the number of frames.
+            Defaults to the process-wide limit (see `set_decode_limits`).
+        max_bytes (int, optional): Maximum size of all decoded frames in bytes. Defaults to the
+            process-wide limit.
+
+    Returns:
+        np.ndarray: All frames, with shape (frame_count, height, width, channels).
+        list of int: The end timestamp of each frame, in milliseconds.
+    """
+    demux = WebPDemuxer.new(webp_data)
+    if channels is None:
+        channels = RGBA_CHANNELS
+    pixels = demux.canvas_width * demux.canvas_height * demux.frame_count
+    _check_decode_limits(pixels, pixels * channels, max_pixels, max_bytes)
+    frames = list(demux.frames())
+    end_timestamps = list(itertools.accumulate(frame.duration for frame in frames))
+    out = np.empty((len(frames), demux.canvas_height, demux.canvas_width, channels), dtype=np.uint8)
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+
+    # Group consecutive segments into roughly equal runs of frames, one per worker.
+    bounds = [*demux.keyframes(), len(frames)]
+    target = -(-len(frames) // max_workers)
+    runs = []
+    run_start = 0
+    for bound in bounds[1:]:
+        if bound - run_start >= target or bound == len(frames):
+            runs.append((run_start, bound))
+            run_start = bound
+
+    def decode_run(run_data: WebPData, start: int, stop: int, *, use_threads: bool = False) -> None:
+        dec_opts = WebPAnimDecoderOptions.new(use_threads=use_threads, color_mode=color_mode)
+        # Each segment is smaller than the whole animation, so the caller's limits still hold.
+        dec = WebPAnimDecoder.new(run_data, dec_opts, max_pixels=max_pixels, max_bytes=max_bytes)
+        for i in range(start, stop):
+            dec.decode_frame(out=out[i])
+
+    if len(runs) == 1:
+        decode_run(webp_data, 0, len(frames), use_threads=use_threads)
+        return out, end_timestamps
+
+    src_mux = lib.WebPMuxCreate(webp_data.ptr, 0)
+    if src_mux == ffi.NULL:
+        msg = "failed to parse WebP data"
+        raise WebPError(msg)
+    try:
+        run_datas = [_anim_segment(src_mux, demux, start, stop) for start, stop in runs]
+    finally:
+        lib.WebPMuxDelete(src_mux)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [
+            executor.submit(decode_run, run_data, start, stop) for run_data, (start, stop) in zip(run_datas, runs)
+        ]
+        for future in futures:
+            future.result()
+    return out, end_timestamps
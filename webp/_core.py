@@ -0,0 +1,1644 @@
+"""Wrappers for the libwebp structures used to encode and decode still images."""
+
+import functools
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from enum import Enum
+from os import PathLike
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from webp import memory as _memory
+from webp import trace as _trace
+from webp._webp import ffi, lib
+from webp.cache import get_decode_cache
+
+if TYPE_CHECKING:
+    from PIL import Image
+
+    from webp.cache import EncodeCache
+
+GRAYSCALE_DIMENSIONS = 2
+COLOR_DIMENSIONS = 3
+PACKED_COLOR_BYTES = 2
+RGB_CHANNELS = 3
+RGBA_CHANNELS = 4
+DLPACK_CPU_DEVICE = 1
+
+# Packed pixels (RGB_565, RGBA_4444) are converted from libwebp's high-byte-first order to native
+# uint16 values after decoding (see `_packed_to_native`).
+_PACKED_DTYPE = np.dtype(np.uint16)
+_UINT8_DTYPE = np.dtype(np.uint8)
+
+FilePath = Union[str, PathLike]
+_Pointer = Any
+
+
+class WebPPreset(Enum):
+    """Represent WebP encoder presets."""
+
+    DEFAULT = lib.WEBP_PRESET_DEFAULT  # Default
+    PICTURE = lib.WEBP_PRESET_PICTURE  # Indoor photo, portrait-like
+    PHOTO = lib.WEBP_PRESET_PHOTO  # Outdoor photo with natural lighting
+    DRAWING = lib.WEBP_PRESET_DRAWING  # Drawing with high-contrast details
+    ICON = lib.WEBP_PRESET_ICON  # Small-sized colourful image
+    TEXT = lib.WEBP_PRESET_TEXT  # Text-like
+
+
+class WebPColorMode(Enum):
+    """Represent WebP decoder color modes."""
+
+    RGB = lib.MODE_RGB
+    RGBA = lib.MODE_RGBA
+    BGR = lib.MODE_BGR
+    BGRA = lib.MODE_BGRA
+    ARGB = lib.MODE_ARGB
+    RGBA_4444 = lib.MODE_RGBA_4444
+    RGB_565 = lib.MODE_RGB_565
+    rgbA = lib.MODE_rgbA  # noqa: N815
+    bgrA = lib.MODE_bgrA  # noqa: N815
+    Argb = lib.MODE_Argb
+    rgbA_4444 = lib.MODE_rgbA_4444  # noqa: N815
+    YUV = lib.MODE_YUV
+    YUVA = lib.MODE_YUVA
+    LAST = lib.MODE_LAST
+
+    @property
+    def bytes_per_pixel(self) -> int:
+        """Return the number of bytes per pixel for RGB-family color modes."""
+        bytes_per_pixel = _BYTES_PER_PIXEL.get(self.value)
+        if bytes_per_pixel is None:
+            msg = f"unsupported color mode: {self!s}"
+            raise WebPError(msg)
+        return bytes_per_pixel
+
+    @property
+    def is_packed(self) -> bool:
+        """Return whether each pixel is packed into a single 16-bit value."""
+        return self.value in _PACKED_MODES
+
+    @property
+    def is_premultiplied(self) -> bool:
+        """Return whether color samples are premultiplied by alpha."""
+        return self.value in _PREMULTIPLIED_MODES
+
+    @property
+    def dtype(self) -> "np.dtype[Any]":
+        """Return the numpy dtype of arrays decoded in this color mode.
+
+        Packed modes use native-endian uint16, and all other modes use uint8.
+        """
+        return _PACKED_DTYPE if self.value in _PACKED_MODES else _UINT8_DTYPE
+
+    def array_shape(self, height: int, width: int) -> Tuple[int, ...]:
+        """Return the shape of an array decoded in this color mode.
+
+        Packed modes give (height, width) arrays, and all others (height, width, bytes per pixel).
+        """
+        bytes_per_pixel = self.bytes_per_pixel
+        if self.value in _PACKED_MODES:
+            return (height, width)
+        return (height, width, bytes_per_pixel)
+
+
+# Keyed by mode value, since hashing enum members is comparatively slow.
+_BYTES_PER_PIXEL = {
+    **dict.fromkeys(
+        [lib.MODE_RGBA, lib.MODE_bgrA, lib.MODE_BGRA, lib.MODE_rgbA, lib.MODE_ARGB, lib.MODE_Argb],
+        RGBA_CHANNELS,
+    ),
+    **dict.fromkeys([lib.MODE_RGB, lib.MODE_BGR], RGB_CHANNELS),
+    **dict.fromkeys([lib.MODE_RGB_565, lib.MODE_RGBA_4444, lib.MODE_rgbA_4444], PACKED_COLOR_BYTES),
+}
+_PACKED_MODES = frozenset([lib.MODE_RGB_565, lib.MODE_RGBA_4444, lib.MODE_rgbA_4444])
+_PREMULTIPLIED_MODES = frozenset([lib.MODE_rgbA, lib.MODE_bgrA, lib.MODE_Argb, lib.MODE_rgbA_4444])
+
+
+class BuildInfo(NamedTuple):
+    """How the extension module was built, and which instruction sets it targets."""
+
+    encoder_version: str
+    decoder_version: str
+    mux_version: str
+    demux_version: str
+    profile: str
+    compiler: str
+    compile_flags: str
+    cpu_features: Tuple[str, ...]
+
+
+def _format_version(version: int) -> str:
+    return f"{version >> 16}.{(version >> 8) & 0xFF}.{version & 0xFF}"
+
+
+def build_info() -> BuildInfo:
+    """Return the libwebp versions, build settings, and instruction sets enabled at compile time.
+
+    `cpu_features` lists the instruction sets (such as "sse4.1", "avx2", or "neon") that the
+    extension was compiled for. With the optimized profile, libwebp is compiled with the same flags
+    and always uses those code paths; other builds may still select faster paths at runtime.
+    `profile` is the `PYWEBP_BUILD_PROFILE` the extension was built with, and `compile_flags` are
+    the flags the extension was compiled with.
+    """
+    return BuildInfo(
+        encoder_version=_format_version(lib.WebPGetEncoderVersion()),
+        decoder_version=_format_version(lib.WebPGetDecoderVersion()),
+        mux_version=_format_version(lib.WebPGetMuxVersion()),
+        demux_version=_format_version(lib.WebPGetDemuxVersion()),
+        profile=ffi.string(lib.PyWebPGetBuildProfile()).decode(),
+        compiler=ffi.string(lib.PyWebPGetCompiler()).decode(),
+        compile_flags=ffi.string(lib.PyWebPGetBuildFlags()).decode(),
+        cpu_features=tuple(ffi.string(lib.PyWebPGetCPUFeatures()).decode().split()),
+    )
+
+
+class WebPError(Exception):
+    """Represent an error raised by the WebP bindings."""
+
+
+class DecompressionBombError(WebPError):
+    """Raised when an image to be decoded exceeds the decode limits."""
+
+
+class DecodeLimits(NamedTuple):
+    """Limits on the size of decoded images. None means unlimited."""
+
+    max_pixels: Optional[int] = None
+    max_bytes: Optional[int] = None
+
+
+_decode_limits = DecodeLimits()
+
+
+def set_decode_limits(max_pixels: Optional[int] = None, max_bytes: Optional[int] = None) -> None:
+    """Set process-wide limits on the size of decoded images.
+
+    Limits are checked against the image header before any output memory is allocated, and
+    `DecompressionBombError` is raised if an image exceeds them. For animations, the limits apply
+    to the canvas size multiplied by the number of frames. Both limits are disabled by default.
+
+    Args:
+        max_pixels (int, optional): Maximum number of pixels.
+        max_bytes (int, optional): Maximum size of the decoded output in bytes.
+    """
+    global _decode_limits  # noqa: PLW0603
+    _decode_limits = DecodeLimits(max_pixels, max_bytes)
+
+
+def get_decode_limits() -> DecodeLimits:
+    """Return the process-wide limits on the size of decoded images."""
+    return _decode_limits
+
+
+def _effective_decode_limits(max_pixels: Optional[int], max_bytes: Optional[int]) -> DecodeLimits:
+    """Return the limits that apply to a decode, falling back to the process-wide ones."""
+    limits = _decode_limits
+    return DecodeLimits(
+        limits.max_pixels if max_pixels is None else max_pixels,
+        limits.max_bytes if max_bytes is None else max_bytes,
+    )
+
+
+def _check_decode_limits(
+    pixels: int,
+    nbytes: int,
+    max_pixels: Optional[int],
+    max_bytes: Optional[int],
+) -> None:
+    """Raise if a decode would exceed the given limits, or else the process-wide ones."""
+    max_pixels, max_bytes = _effective_decode_limits(max_pixels, max_bytes)
+    if max_pixels is not None and pixels > max_pixels:
+        msg = f"image has {pixels} pixels, which exceeds the limit of {max_pixels}"
+        raise DecompressionBombError(msg)
+    if max_bytes is not None and nbytes > max_bytes:
+        msg = f"decoded image needs {nbytes} bytes, which exceeds the limit of {max_bytes}"
+        raise DecompressionBombError(msg)
+
+
+class WebPConfig:
+    """Represent WebP encoder configuration."""
+
+    DEFAULT_QUALITY: float = 75.0
+
+    def __init__(self, ptr: _Pointer) -> None:
+        """Initialize the wrapper."""
+        self.ptr = ptr
+
+    @property
+    def lossless(self) -> bool:
+        """Return whether lossless encoding is enabled."""
+        return self.ptr.lossless != 0
+
+    @lossless.setter
+    def lossless(self, lossless: bool) -> None:
+        """Return whether lossless encoding is enabled."""
+        self.ptr.lossless = 1 if lossless else 0
+
+    @property
+    def quality(self) -> float:
+        """Return the encoder quality."""
+        return self.ptr.quality
+
+    @quality.setter
+    def quality(self, quality: float) -> None:
+        """Return the encoder quality."""
+        self.ptr.quality = quality
+
+    @property
+    def method(self) -> int:
+        """Return the encoder method."""
+        return self.ptr.method
+
+    @method.setter
+    def method(self, method: int) -> None:
+        """Return the encoder method."""
+        self.ptr.method = method
+
+    @property
+    def target_size(self) -> int:
+        """Return the target encoded size."""
+        return self.ptr.target_size
+
+    @target_size.setter
+    def target_size(self, target_size: int) -> None:
+        """Return the target encoded size."""
+        self.ptr.target_size = target_size
+
+    @property
+    def passes(self) -> int:
+        """Return the number of analysis passes."""
+        return getattr(self.ptr, "pass")
+
+    @passes.setter
+    def passes(self, passes: int) -> None:
+        """Return the number of analysis passes."""
+        setattr(self.ptr, "pass", passes)
+
+    def validate(self) -> bool:
+        """Return whether the configuration is valid."""
+        return lib.WebPValidateConfig(self.ptr) != 0
+
+    @staticmethod
+    def new(  # noqa: PLR0913
+        preset: WebPPreset = WebPPreset.DEFAULT,
+        quality: Optional[float] = None,
+        *,
+        lossless: bool = False,
+        lossless_preset: Optional[int] = None,
+        method: Optional[int] = None,
+        target_size: Optional[int] = None,
+        passes: Optional[int] = None,
+    ) -> "WebPConfig":
+        """Create a new WebPConfig instance to describe encoder settings.
+
+        1. The preset is loaded, setting default values for quality factor (75.0) and compression
+           method (4).
+
+        2. If `lossless` is True and `lossless_preset` is specified, then the lossless preset with
+           the specified level is loaded. This will replace the default values for quality factor
+           and compression method.
+
+        3. Values for lossless, quality, and method are set using explicitly provided arguments.
+           This allows the caller to explicitly specify these settings and overrides settings from
+           presets.
+
+        Args:
+            preset (WebPPreset): Preset setting.
+            quality (float, optional): Quality factor (0=small but low quality, 100=high quality
+                but big). Overrides presets. Effective default is 75.0.
+            lossless (bool): Set to True for lossless compression.
+            lossless_preset (int, optional): Lossless preset level (0=fast but big, 9=small but
+                slow). Can only be specified when `lossless` is true. Sets the values for quality
+                factor and compression method together. Effective default is 6.
+            method (int, optional): Compression method (0=fast but big, 6=small but slow).
+                Overrides presets. Effective default is 4.
+            target_size (int, optional): Desired target size in bytes. When setting this, you
+                will likely want to set passes to a value greater than 1 also.
+            passes (int, optional): Number of entropy-analysis passes (between 1 and 10 inclusive).
+
+        Returns:
+            WebPConfig: The new WebPConfig instance.
+        """
+        ptr = ffi.new("WebPConfig*")
+        if lib.WebPConfigPreset(ptr, preset.value, WebPConfig.DEFAULT_QUALITY) == 0:
+            msg = "failed to load config options from preset"
+            raise WebPError(msg)
+
+        if lossless_preset is not None:
+            if not lossless:
+                msg = "can only use lossless preset when lossless is True"
+                raise WebPError(msg)
+            if lib.WebPConfigLosslessPreset(ptr, lossless_preset) == 0:
+                msg = "failed to load config options from lossless preset"
+                raise WebPError(msg)
+
+        config = WebPConfig(ptr)
+        config.lossless = lossless
+
+        # Override presets for explicitly specified values.
+        if quality is not None:
+            config.quality = quality
+        if method is not None:
+            config.method = method
+        if target_size is not None:
+            config.target_size = target_size
+        if passes is not None:
+            config.passes = passes
+
+        if not config.validate():
+            msg = "config is not valid"
+            raise WebPError(msg)
+        return config
+
+    def freeze(self) -> "FrozenWebPConfig":
+        """Return an immutable snapshot of this configuration."""
+        return FrozenWebPConfig(*(getattr(self.ptr, name) for name in _CONFIG_FIELDS))
+
+
+# Fields of the WebPConfig struct, in the same order as the fields of FrozenWebPConfig.
+_CONFIG_FIELDS = tuple(name for name, _ in ffi.typeof("WebPConfig").fields)
+
+# Number of frozen configurations whose validated libwebp structs are kept.
+_FROZEN_CONFIG_CACHE_SIZE = 256
+
+
+class FrozenWebPConfig(NamedTuple):
+    """Immutable, hashable encoder configuration.
+
+    A frozen configuration can be passed anywhere a `WebPConfig` is accepted, shared between
+    threads, and used as a dictionary key. Field names match the libwebp `WebPConfig` struct,
+    except that `pass` is called `passes`.
+
+    The underlying libwebp struct is built and validated once per distinct value, then shared by
+    every equal configuration.
+    """
+
+    lossless: int
+    quality: float
+    method: int
+    image_hint: int
+    target_size: int
+    target_PSNR: float  # noqa: N815
+    segments: int
+    sns_strength: int
+    filter_strength: int
+    filter_sharpness: int
+    filter_type: int
+    autofilter: int
+    alpha_compression: int
+    alpha_filtering: int
+    alpha_quality: int
+    passes: int
+    show_compressed: int
+    preprocessing: int
+    partitions: int
+    partition_limit: int
+    emulate_jpeg_size: int
+    thread_level: int
+    low_memory: int
+    near_lossless: int
+    exact: int
+    use_delta_palette: int
+    use_sharp_yuv: int
+    qmin: int
+    qmax: int
+
+    @property
+    def ptr(self) -> _Pointer:
+        """Return the validated libwebp struct for this configuration.
+
+        The struct is shared, and must not be modified.
+        """
+        with _frozen_config_lock:
+            ptr = _frozen_config_ptrs.get(self)
+            if ptr is not None:
+                _frozen_config_ptrs.move_to_end(self)
+                return ptr
+        ptr = ffi.new("WebPConfig*")
+        for name, value in zip(_CONFIG_FIELDS, self):
+            setattr(ptr, name, value)
+        if lib.WebPValidateConfig(ptr) == 0:
+            msg = "config is not valid"
+            raise WebPError(msg)
+        return _cache_frozen_config_ptr(self, ptr)
+
+    def thaw(self) -> WebPConfig:
+        """Return a mutable copy of this configuration."""
+        ptr = ffi.new("WebPConfig*")
+        ptr[0] = self.ptr[0]
+        return WebPConfig(ptr)
+
+    @staticmethod
+    @functools.lru_cache(maxsize=_FROZEN_CONFIG_CACHE_SIZE)
+    def new(*args: Any, **kwargs: Any) -> "FrozenWebPConfig":  # noqa: ANN401
+        """Return a frozen configuration built from encoder settings (see `WebPConfig.new`).
+
+        Results are memoised by argument value, so repeated calls with the same settings do not
+        reload presets or revalidate.
+        """
+        config = WebPConfig.new(*args, **kwargs)
+        frozen = config.freeze()
+        _cache_frozen_config_ptr(frozen, config.ptr)
+        return frozen
+
+
+# Validated structs of recently used frozen configurations, least recently used first. The bound
+# matches the memoisation of `FrozenWebPConfig.new`, so that configurations built there keep their
+# struct for as long as they are memoised.
+_frozen_config_ptrs: "OrderedDict[FrozenWebPConfig, _Pointer]" = OrderedDict()
+_frozen_config_lock = threading.Lock()
+
+
+def _cache_frozen_config_ptr(config: FrozenWebPConfig, ptr: _Pointer) -> _Pointer:
+    """Store the validated struct of a frozen configuration, and return the cached struct."""
+    with _frozen_config_lock:
+        ptr = _frozen_config_ptrs.setdefault(config, ptr)
+        _frozen_config_ptrs.move_to_end(config)
+        while len(_frozen_config_ptrs) > _FROZEN_CONFIG_CACHE_SIZE:
+            _frozen_config_ptrs.popitem(last=False)
+        return ptr
+
+
+# Any object with a `ptr` to a libwebp WebPConfig struct can be used to encode.
+AnyWebPConfig = Union[WebPConfig, FrozenWebPConfig]
+
+# Arguments of `WebPConfig.new`. Other settings are assigned to WebPConfig fields directly.
+_CONFIG_NEW_ARGS = ("preset", "quality", "lossless", "lossless_preset", "method", "target_size", "passes")
+
+
+def _config_from_settings(settings: Dict[str, Any]) -> FrozenWebPConfig:
+    """Build a frozen configuration from `WebPConfig.new` arguments and WebPConfig field values.
+
+    Unknown settings are ignored, and the preset may be given by name.
+    """
+    kwargs = {k: v for k, v in settings.items() if k in _CONFIG_NEW_ARGS}
+    if isinstance(kwargs.get("preset"), str):
+        kwargs["preset"] = WebPPreset[kwargs["preset"].upper()]
+    config = FrozenWebPConfig.new(**kwargs)
+    fields = {
+        k: FrozenWebPConfig.__annotations__[k](v)
+        for k, v in settings.items()
+        if k in FrozenWebPConfig._fields and k not in _CONFIG_NEW_ARGS
+    }
+    return config._replace(**fields) if fields else config
+
+
+# Number of pixels examined at a time when counting colours, so that photos are rejected early.
+_COLOR_COUNT_CHUNK = 1 << 14
+
+
+def _count_colors(arr: "np.ndarray[Any, np.dtype[np.uint8]]", limit: int) -> int:
+    """Return the number of distinct colours in an image, or `limit + 1` if there are more than `limit`."""
+    channels = arr.shape[-1] if len(arr.shape) == COLOR_DIMENSIONS else 1
+    flat = arr.reshape(-1, channels)
+    colors = np.empty(0, dtype=np.uint32)
+    for start in range(0, len(flat), _COLOR_COUNT_CHUNK):
+        chunk = flat[start : start + _COLOR_COUNT_CHUNK].astype(np.uint32)
+        packed = np.zeros(len(chunk), dtype=np.uint32)
+        for channel in range(channels):
+            packed |= chunk[:, channel] << (8 * channel)
+        colors = np.union1d(colors, packed)
+        if len(colors) > limit:
+            return limit + 1
+    return len(colors)
+
+
+def recommend_config(
+    img: Any,  # noqa: ANN401
+    *,
+    max_colors: int = 256,
+    quality: Optional[float] = None,
+    lossless_preset: Optional[int] = None,
+) -> FrozenWebPConfig:
+    """Return encoder settings suited to the content of an image.
+
+    Palette images, and images with at most `max_colors` distinct colours (such as icons, charts,
+    and UI screenshots), are best encoded losslessly: libwebp then stores them with a colour
+    palette, which is usually smaller than lossy encoding and faster to encode. Other images get
+    lossy settings.
+
+    Args:
+        img (PIL.Image or np.ndarray): Image to encode.
+        max_colors (int): Maximum number of distinct colours for lossless encoding.
+        quality (float, optional): Quality factor for lossy encoding.
+        lossless_preset (int, optional): Lossless preset level for lossless encoding (0=fast but
+            big, 9=small but slow).
+
+    Returns:
+        FrozenWebPConfig: The recommended encoder settings.
+    """
+    if getattr(img, "mode", None) == "P" or _count_colors(_as_ndarray(np.asarray(img)), max_colors) <= max_colors:
+        return FrozenWebPConfig.new(lossless=True, lossless_preset=lossless_preset)
+    return FrozenWebPConfig.new(quality=quality)
+
+
+def _as_ndarray(obj: Any) -> "np.ndarray[Any, Any]":  # noqa: ANN401
+    """Return a numpy view of an array-like object without copying.
+
+    Accepts numpy arrays, CPU-resident DLPack tensors, and objects implementing the array interface
+    or buffer protocol.
+    """
+    if isinstance(obj, np.ndarray):
+        return obj
+    if hasattr(obj, "__dlpack__"):
+        try:
+            return np.from_dlpack(obj)
+        except (BufferError, RuntimeError, TypeError, ValueError) as ex:
+            msg = f"cannot import tensor via DLPack (it must be CPU-resident): {ex}"
+            raise WebPError(msg) from ex
+    return np.asarray(obj)
+
+
+def _check_out_array(out: Any, shape: Tuple[int, ...], dtype: "np.dtype[Any]") -> "np.ndarray[Any, Any]":  # noqa: ANN401
+    """Return `out` as an ndarray, checking that it can be decoded into."""
+    out = _as_ndarray(out)
+    if out.shape != shape or out.dtype != dtype:
+        msg = f"output array must be {dtype} with shape {shape}"
+        raise WebPError(msg)
+    if not (out.flags.c_contiguous and out.flags.writeable):
+        msg = "output array must be writable and C-contiguous"
+        raise WebPError(msg)
+    return out
+
+
+def _packed_to_native(output: _Pointer, color_mode: WebPColorMode) -> None:
+    """Convert packed pixels decoded into a WebPDecBuffer to the host's byte order, in place."""
+    if color_mode.value in _PACKED_MODES:
+        rgba = output.u.RGBA
+        lib.PyWebPPackedToNative(rgba.rgba, output.width, output.height, rgba.stride)
+
+
+def _array_interface(
+    address: int, shape: Tuple[int, ...], strides: Tuple[int, ...], *, readonly: bool, typestr: str = "|u1"
+) -> Dict[str, Any]:
+    return {
+        "version": 3,
+        "shape": shape,
+        "strides": strides,
+        "typestr": typestr,
+        "data": (address, readonly),
+    }
+
+
+_PICTURE_IMPORT_FUNCS = {
+    "RGB": lib.WebPPictureImportRGB,
+    "RGBA": lib.WebPPictureImportRGBA,
+}
+
+# Number of entries in an 8-bit palette.
+_PALETTE_SIZE = 256
+
+
+def _pil_palette_rgba(img: "Image.Image") -> bytearray:
+    """Return the palette of a P mode PIL image as RGBA, with the same alpha as `convert("RGBA")`."""
+    try:
+        palette = bytearray(img.getpalette("RGBA") or [])
+    except TypeError:
+        # Pillow < 9.1 only returns the palette as RGB.
+        rgb = np.frombuffer(bytes(img.getpalette() or []), dtype=np.uint8).reshape(-1, RGB_CHANNELS)
+        rgba = np.full((len(rgb), RGBA_CHANNELS), 255, dtype=np.uint8)
+        rgba[:, :RGB_CHANNELS] = rgb
+        palette = bytearray(rgba.tobytes())
+    transparency = img.info.get("transparency")
+    if isinstance(transparency, int):
+        if transparency * RGBA_CHANNELS < len(palette):
+            palette[transparency * RGBA_CHANNELS + 3] = 0
+    elif isinstance(transparency, bytes):
+        palette[3 : RGBA_CHANNELS * len(transparency) : RGBA_CHANNELS] = transparency[: len(palette) // RGBA_CHANNELS]
+    return palette
+
+
+def _pil_has_transparency_data(img: "Image.Image") -> bool:
+    """Return whether a PIL image has an alpha channel or transparency information."""
+    has_transparency_data = getattr(img, "has_transparency_data", None)
+    if has_transparency_data is None:  # Pillow < 10.1
+        return img.mode in ("RGBA", "RGBa", "LA", "La", "PA") or "transparency" in img.info
+    return bool(has_transparency_data)
+
+
+def _read_file(file_path: FilePath) -> bytes:
+    tracer = _trace.tracer
+    if tracer is not None:
+        start_ns = time.perf_counter_ns()
+    with Path(file_path).open("rb") as f:
+        buf = f.read()
+    if tracer is not None:
+        _trace.emit(tracer, "read_file", start_ns, bytes_out=len(buf))
+    return buf
+
+
+def _write_file(file_path: FilePath, buf: Union[bytes, memoryview]) -> None:
+    tracer = _trace.tracer
+    if tracer is not None:
+        start_ns = time.perf_counter_ns()
+    with Path(file_path).open("wb") as f:
+        f.write(buf)
+    if tracer is not None:
+        _trace.emit(tracer, "write_file", start_ns, bytes_in=len(buf))
+
+
+def _picture_nbytes(ptr: _Pointer) -> int:
+    """Return the size of the pixel buffers allocated for a picture."""
+    nbytes = 0
+    if ptr.argb != ffi.NULL:
+        nbytes += ptr.argb_stride * ptr.height * 4
+    if ptr.y != ffi.NULL:
+        nbytes += ptr.y_stride * ptr.height + 2 * ptr.uv_stride * ((ptr.height + 1) // 2)
+    if ptr.a != ffi.NULL:
+        nbytes += ptr.a_stride * ptr.height
+    return nbytes
+
+
+class WebPData:
+    """Represent encoded WebP data.
+
+    The encoded bytes are exposed without copying through the buffer protocol (Python 3.12+),
+    `__array_interface__`, and DLPack, so `np.asarray(webp_data)` or `torch.from_dlpack(webp_data)`
+    both return views of the same memory.
+    """
+
+    def __init__(self, ptr: _Pointer, data_ref: _Pointer, *, readonly: bool = False) -> None:
+        """Initialize the wrapper."""
+        self.ptr = ptr
+        self._data_ref = data_ref
+        self._readonly = readonly
+        _memory.track(self)
+
+    def __del__(self) -> None:
+        """Stop tracking the data, which is released along with `data_ref`."""
+        _memory.untrack(self)
+
+    @property
+    def size(self) -> int:
+        """Return the data size in bytes."""
+        return self.ptr.size
+
+    def buffer(self) -> bytes:
+        """Return the data as bytes."""
+        return ffi.buffer(self._data_ref, self.size)
+
+    def __buffer__(self, flags: int) -> memoryview:
+        """Expose the encoded bytes through the buffer protocol."""
+        view = memoryview(ffi.buffer(self._data_ref, self.size))
+        return view.toreadonly() if self._readonly else view
+
+    @property
+    def __array_interface__(self) -> Dict[str, Any]:
+        """Describe the encoded bytes as a one-dimensional uint8 array."""
+        address = int(ffi.cast("uintptr_t", self.ptr.bytes))
+        return _array_interface(address, (self.size,), (1,), readonly=self._readonly)
+
+    def __dlpack__(self, *args: Any, **kwargs: Any) -> Any:  # noqa: ANN401
+        """Export the encoded bytes as a DLPack capsule."""
+        return np.asarray(self).__dlpack__(*args, **kwargs)
+
+    def __dlpack_device__(self) -> Tuple[int, int]:
+        """Return the DLPack device (always the CPU)."""
+        return (DLPACK_CPU_DEVICE, 0)
+
+    def decode(  # noqa: PLR0913
+        self,
+        color_mode: WebPColorMode = WebPColorMode.RGBA,
+        *,
+        out: "Optional[np.ndarray[Any, np.dtype[np.uint8]]]" = None,
+        crop: Optional[Tuple[int, int, int, int]] = None,
+        scale: Optional[Tuple[int, int]] = None,
+        max_pixels: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+    ) -> "np.ndarray[Any, np.dtype[np.uint8]]":
+        """Decode the WebP data into a numpy array.
+
+        If a decode cache is installed (see `webp.cache.set_decode_cache`) and `out` is not given,
+        results are cached by a digest of the encoded data, mode, crop, scale, and decode limits.
+        The digest is computed over the whole buffer on every call, hit or miss. This costs
+        about 1% of the decode time for lossy images, but around 10% for large lossless ones.
+
+        Args:
+            color_mode (WebPColorMode): Output color mode.
+            out (np.ndarray, optional): Destination array to decode into. Must be a writable,
+                C-contiguous array with the shape and dtype given by `color_mode.array_shape`
+                and `color_mode.dtype`. This can point at memory that is not owned by numpy,
+                such as a shared memory block or a CPU-resident DLPack tensor.
+            crop (tuple of int, optional): Region to decode, as (left, top, width, height).
+            scale (tuple of int, optional): Output size, as (width, height). Scaling is applied
+                after cropping.
+            max_pixels (int, optional): Maximum number of pixels in the image. Defaults to the
+                process-wide limit (see `set_decode_limits`).
+            max_bytes (int, optional): Maximum size of the decoded output in bytes. Defaults to
+                the process-wide limit.
+
+        Returns:
+            np.ndarray: The decoded image data (a view of `out`, if it was provided). Packed
+                modes such as RGB_565 give (height, width) arrays of native-endian uint16 values.
+        """
+        decode_cache = get_decode_cache()
+        if decode_cache is None or out is not None:
+            return self._decode(color_mode, out, crop, scale, max_pixels=max_pixels, max_bytes=max_bytes)
+        # The limits are part of the key, so that an image cached under looser limits is not
+        # returned to a caller whose limits it would exceed.
+        limits = _effective_decode_limits(max_pixels, max_bytes)
+        key = ("data", decode_cache.data_key(self.buffer()), color_mode, crop, scale, limits)
+        arr = decode_cache.get(key)
+        if arr is None:
+            arr = self._decode(color_mode, None, crop, scale, max_pixels=max_pixels, max_bytes=max_bytes)
+            arr = decode_cache.put(key, arr)
+        return arr
+
+    def _decode(  # noqa: PLR0913
+        self,
+        color_mode: WebPColorMode,
+        out: "Optional[np.ndarray[Any, np.dtype[np.uint8]]]",
+        crop: Optional[Tuple[int, int, int, int]],
+        scale: Optional[Tuple[int, int]],
+        dec_config: Optional["WebPDecoderConfig"] = None,
+        *,
+        max_pixels: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+    ) -> "np.ndarray[Any, np.dtype[np.uint8]]":
+        if dec_config is None:
+            dec_config = WebPDecoderConfig.new()
+        dec_config.read_features(self)
+        options = dec_config.ptr.options
+        output = dec_config.ptr.output
+
+        width, height = dec_config.ptr.input.width, dec_config.ptr.input.height
+        options.use_cropping = 0 if crop is None else 1
+        options.use_scaling = 0 if scale is None else 1
+        if crop is not None:
+            options.crop_left, options.crop_top, options.crop_width, options.crop_height = crop
+            width, height = crop[2:]
+        if scale is not None:
+            options.scaled_width, options.scaled_height = scale
+            width, height = scale
+
+        bytes_per_pixel = color_mode.bytes_per_pixel
+        shape = color_mode.array_shape(height, width)
+        dtype = color_mode.dtype
+        _check_decode_limits(
+            dec_config.ptr.input.width * dec_config.ptr.input.height,
+            height * width * bytes_per_pixel,
+            max_pixels,
+            max_bytes,
+        )
+        arr = np.empty(shape, dtype=dtype) if out is None else _check_out_array(out, shape, dtype)
+        output.colorspace = color_mode.value
+        output.u.RGBA.rgba = ffi.cast("uint8_t*", ffi.from_buffer(arr))
+        output.u.RGBA.size = arr.nbytes
+        output.u.RGBA.stride = width * bytes_per_pixel
+        output.is_external_memory = 1
+
+        tracer = _trace.tracer
+        if tracer is not None:
+            start_ns = time.perf_counter_ns()
+        if lib.WebPDecode(self.ptr.bytes, self.ptr.size, dec_config.ptr) != lib.VP8_STATUS_OK:
+            msg = "failed to decode"
+            raise WebPError(msg)
+        lib.WebPFreeDecBuffer(ffi.addressof(dec_config.ptr, "output"))
+        _packed_to_native(output, color_mode)
+        if tracer is not None:
+            _trace.emit(
+                tracer,
+                "decode",
+                start_ns,
+                width=width,
+                height=height,
+                mode=color_mode.name,
+                bytes_in=self.size,
+                bytes_out=arr.nbytes,
+            )
+
+        return arr
+
+    def decode_buffer(
+        self,
+        color_mode: WebPColorMode = WebPColorMode.RGBA,
+        *,
+        max_pixels: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+    ) -> "WebPDecBuffer":
+        """Decode the WebP data into a buffer allocated by libwebp.
+
+        Unlike `decode`, no numpy array is created. The result can be handed to any library that
+        understands the buffer protocol, the array interface, or DLPack. Decode limits are
+        applied as for `decode`.
+        """
+        dec_config = WebPDecoderConfig.new()
+        dec_config.read_features(self)
+        pixels = dec_config.input.width * dec_config.input.height
+        _check_decode_limits(pixels, pixels * color_mode.bytes_per_pixel, max_pixels, max_bytes)
+        dec_config.output.colorspace = color_mode.value
+        tracer = _trace.tracer
+        if tracer is not None:
+            start_ns = time.perf_counter_ns()
+        if lib.WebPDecode(self.ptr.bytes, self.size, dec_config.ptr) != lib.VP8_STATUS_OK:
+            lib.WebPFreeDecBuffer(ffi.addressof(dec_config.ptr, "output"))
+            msg = "failed to decode"
+            raise WebPError(msg)
+        _packed_to_native(dec_config.ptr.output, color_mode)
+        dec_buf = WebPDecBuffer(dec_config, color_mode)
+        if tracer is not None:
+            _trace.emit(
+                tracer,
+                "decode",
+                start_ns,
+                width=dec_buf.width,
+                height=dec_buf.height,
+                mode=color_mode.name,
+                bytes_in=self.size,
+                bytes_out=dec_config.output.u.RGBA.size,
+            )
+        return dec_buf
+
+    @staticmethod
+    def from_buffer(buf: Union[bytes, bytearray, memoryview]) -> "WebPData":
+        """Create WebP data from a byte buffer."""
+        ptr = ffi.new("WebPData*")
+        lib.WebPDataInit(ptr)
+        data_ref = ffi.from_buffer(buf)
+        ptr.size = len(buf)
+        ptr.bytes = ffi.cast("uint8_t*", data_ref)
+        return WebPData(ptr, data_ref, readonly=memoryview(buf).readonly)
+
+
+# Guards transfers of ownership of libwebp memory between wrappers. Without the GIL (or when a
+# wrapper is shared between threads), two callers could otherwise both take ownership of the same
+# buffer and free it twice.
+_ownership_lock = threading.Lock()
+
+
+# This internal class wraps a WebPData struct in its "unfinished" state (ie
+# before bytes and size have been set)
+class _WebPData:
+    def __init__(self) -> None:
+        """Initialize the wrapper."""
+        self.ptr = ffi.new("WebPData*")
+        lib.WebPDataInit(self.ptr)
+
+    # Call this after the struct has been filled in
+    def done(self, free_func: _Pointer = lib.WebPFree) -> WebPData:
+        """Run done."""
+        with _ownership_lock:
+            ptr, self.ptr = self.ptr, None
+        if ptr is None:
+            msg = "_WebPData.done() called after ownership was already transferred"
+            raise RuntimeError(msg)
+        webp_data = WebPData(ptr, ffi.gc(ptr.bytes, free_func))
+        _memory.resize(webp_data, webp_data.size)
+        return webp_data
+
+
+class WebPMemoryWriter:
+    """Wrap a WebP memory writer."""
+
+    def __init__(self, ptr: _Pointer) -> None:
+        """Initialize the wrapper."""
+        self.ptr = ptr
+        _memory.track(self)
+
+    def __del__(self) -> None:
+        # Free memory if we are still responsible for it.
+        """Release owned WebP resources."""
+        _memory.untrack(self)
+        with _ownership_lock:
+            ptr, self.ptr = self.ptr, None
+        if ptr:
+            lib.WebPMemoryWriterClear(ptr)
+
+    def to_webp_data(self) -> WebPData:
+        """Transfer writer memory into WebP data."""
+        with _ownership_lock:
+            ptr, self.ptr = self.ptr, None
+        if ptr is None:
+            msg = "WebPMemoryWriter.to_webp_data() can only be called once"
+            raise RuntimeError(msg)
+        _webp_data = _WebPData()
+        if _webp_data.ptr is None:
+            msg = "failed to initialize WebPData"
+            raise RuntimeError(msg)
+        _webp_data.ptr.bytes = ptr.mem
+        _webp_data.ptr.size = ptr.size
+        return _webp_data.done()
+
+    @staticmethod
+    def new() -> "WebPMemoryWriter":
+        """Create a new wrapper instance."""
+        ptr = ffi.new("WebPMemoryWriter*")
+        lib.WebPMemoryWriterInit(ptr)
+        return WebPMemoryWriter(ptr)
+
+
+class WebPPicture:
+    """Represent a WebP picture."""
+
+    def __init__(self, ptr: _Pointer) -> None:
+        """Initialize the wrapper."""
+        self.ptr = ptr
+        _memory.track(self, _picture_nbytes(ptr))
+
+    def __del__(self) -> None:
+        """Release owned WebP resources."""
+        _memory.untrack(self)
+        lib.WebPPictureFree(self.ptr)
+
+    def encode(self, config: Optional[AnyWebPConfig] = None, *, cache: "Optional[EncodeCache]" = None) -> WebPData:
+        """Encode the picture as WebP data.
+
+        Args:
+            config (WebPConfig, optional): Encoder configuration.
+            cache (EncodeCache, optional): Cache to look up the result in before encoding, and
+                to store the result in afterwards.
+
+        Returns:
+            WebPData: The encoded data.
+        """
+        if config is None:
+            config = FrozenWebPConfig.new()
+        key = None
+        if cache is not None:
+            key = cache.picture_key(self, config)
+            if key is not None:
+                cached = cache.get(key)
+                if cached is not None:
+                    return WebPData.from_buffer(cached)
+        writer = WebPMemoryWriter.new()
+        self.ptr.writer = ffi.addressof(lib, "WebPMemoryWrite")
+        self.ptr.custom_ptr = writer.ptr
+        tracer = _trace.tracer
+        if tracer is not None:
+            start_ns = time.perf_counter_ns()
+            bytes_in = _picture_nbytes(self.ptr)
+        ok = lib.WebPEncode(config.ptr, self.ptr)
+        # Lossy encoding adds YUV planes to an ARGB picture.
+        _memory.resize(self, _picture_nbytes(self.ptr))
+        if ok == 0:
+            raise WebPError("encoding error: " + self.ptr.error_code)
+        webp_data = writer.to_webp_data()
+        if tracer is not None:
+            _trace.emit(
+                tracer,
+                "encode",
+                start_ns,
+                width=self.ptr.width,
+                height=self.ptr.height,
+                config=config,
+                bytes_in=bytes_in,
+                bytes_out=webp_data.size,
+            )
+        if cache is not None and key is not None:
+            cache.put(key, webp_data.buffer())
+        return webp_data
+
+    def has_transparency(self) -> bool:
+        """Return whether any pixel of the picture is not fully opaque."""
+        return lib.WebPPictureHasTransparency(self.ptr) != 0
+
+    def cleanup_transparent_area(self) -> None:
+        """Flatten fully transparent blocks of the picture, so that their hidden colours compress well.
+
+        This is libwebp's own cleanup, which lossy encoding applies anyway unless `exact` is set.
+        """
+        lib.WebPCleanupTransparentArea(self.ptr)
+
+    def clear_transparent_pixels(self) -> None:
+        """Set every fully transparent pixel of an ARGB picture to transparent black."""
+        lib.PyWebPPictureClearTransparentPixels(self.ptr)
+
+    def optimize_alpha(self) -> bool:
+        """Prepare the alpha channel for encoding, and return whether the picture has transparency.
+
+        A fully opaque picture is left untouched, and libwebp encodes it without an alpha channel.
+        Otherwise the hidden colours of fully transparent pixels are cleared, so that they cost
+        neither bytes nor encode time, and so that animation frames which only differ in hidden
+        colours compare equal. This discards those colours, as encoding without `exact` would.
+        """
+        if not self.has_transparency():
+            return False
+        if self.ptr.use_argb:
+            self.clear_transparent_pixels()
+        else:
+            self.cleanup_transparent_area()
+        return True
+
+    def save(
+        self,
+        file_path: FilePath,
+        config: Optional[AnyWebPConfig] = None,
+        *,
+        cache: "Optional[EncodeCache]" = None,
+    ) -> None:
+        """Save the picture to a WebP file."""
+        _write_file(file_path, self.encode(config, cache=cache).buffer())
+
+    @staticmethod
+    def new(width: int, height: int) -> "WebPPicture":
+        """Create a new wrapper instance."""
+        ptr = ffi.new("WebPPicture*")
+        if lib.WebPPictureInit(ptr) == 0:
+            msg = "version mismatch"
+            raise WebPError(msg)
+        ptr.width = width
+        ptr.height = height
+        if lib.WebPPictureAlloc(ptr) == 0:
+            msg = "memory error"
+            raise WebPError(msg)
+        return WebPPicture(ptr)
+
+    @staticmethod
+    def from_numpy(arr: "np.ndarray[Any, np.dtype[np.uint8]]", *, pilmode: Optional[str] = None) -> "WebPPicture":
+        """Create a picture from a numpy array.
+
+        `arr` may also be a CPU-resident DLPack tensor or any object implementing the array
+        interface, in which case its memory is read without an intermediate copy.
+        """
+        ptr = ffi.new("WebPPicture*")
+        if lib.WebPPictureInit(ptr) == 0:
+            msg = "version mismatch"
+            raise WebPError(msg)
+        pic = WebPPicture(ptr)
+        pic.import_numpy(arr, pilmode=pilmode)
+        return pic
+
+    def import_numpy(self, arr: "np.ndarray[Any, np.dtype[np.uint8]]", *, pilmode: Optional[str] = None) -> None:
+        """Replace the contents of the picture with pixels from a numpy array.
+
+        The picture is resized to match the array. Any existing picture memory is released.
+        """
+        arr = _as_ndarray(arr)
+        if len(arr.shape) == COLOR_DIMENSIONS:
+            bytes_per_pixel = arr.shape[-1]
+        elif len(arr.shape) == GRAYSCALE_DIMENSIONS:
+            bytes_per_pixel = 1
+        else:
+            raise WebPError("unexpected array shape: " + repr(arr.shape))
+
+        if pilmode is None:
+            pilmode = {RGB_CHANNELS: "RGB", RGBA_CHANNELS: "RGBA"}.get(bytes_per_pixel)
+            if pilmode is None:
+                raise WebPError("cannot infer color mode from array of shape " + repr(arr.shape))
+        import_func = _PICTURE_IMPORT_FUNCS.get(pilmode)
+        if import_func is None:
+            raise WebPError("unsupported image mode: " + pilmode)
+
+        ptr = self.ptr
+        ptr.height, ptr.width = arr.shape[:2]
+        arr = np.ascontiguousarray(arr)
+        pixels = ffi.cast("uint8_t*", ffi.from_buffer(arr))
+        stride = ptr.width * bytes_per_pixel
+        ptr.use_argb = 1
+        tracer = _trace.tracer
+        if tracer is not None:
+            start_ns = time.perf_counter_ns()
+        ok = import_func(ptr, pixels, stride)
+        _memory.resize(self, _picture_nbytes(ptr))
+        if ok == 0:
+            msg = "memory error"
+            raise WebPError(msg)
+        if tracer is not None:
+            _trace.emit(
+                tracer,
+                "import",
+                start_ns,
+                width=ptr.width,
+                height=ptr.height,
+                mode=pilmode,
+                bytes_in=arr.nbytes,
+                bytes_out=ptr.argb_stride * ptr.height * 4,
+            )
+
+    @staticmethod
+    def from_palette(
+        indices: "np.ndarray[Any, np.dtype[np.uint8]]",
+        palette: "np.ndarray[Any, np.dtype[np.uint8]]",
+    ) -> "WebPPicture":
+        """Create a picture from palette indices and an RGBA palette (see `import_palette`)."""
+        ptr = ffi.new("WebPPicture*")
+        if lib.WebPPictureInit(ptr) == 0:
+            msg = "version mismatch"
+            raise WebPError(msg)
+        pic = WebPPicture(ptr)
+        pic.import_palette(indices, palette)
+        return pic
+
+    def import_palette(
+        self,
+        indices: "np.ndarray[Any, np.dtype[np.uint8]]",
+        palette: "Union[np.ndarray[Any, np.dtype[np.uint8]], bytes, bytearray]",
+    ) -> None:
+        """Replace the contents of the picture with palette-indexed pixels.
+
+        Each index is looked up in the palette while importing, which avoids expanding the image to
+        RGBA first.
+
+        Args:
+            indices (np.ndarray): Palette indices, with shape (height, width).
+            palette (np.ndarray or bytes): Palette colours as RGBA, with shape (colors, 4). At most
+                256 colours. Indices past the end of the palette are transparent black.
+        """
+        indices = np.ascontiguousarray(_as_ndarray(indices), dtype=np.uint8)
+        if len(indices.shape) != GRAYSCALE_DIMENSIONS:
+            raise WebPError("unexpected index array shape: " + repr(indices.shape))
+        if isinstance(palette, (bytes, bytearray)):
+            num_colors, remainder = divmod(len(palette), RGBA_CHANNELS)
+        else:
+            palette = np.ascontiguousarray(palette, dtype=np.uint8)
+            num_colors, remainder = palette.shape[0], palette.size != palette.shape[0] * RGBA_CHANNELS
+        if remainder or num_colors > _PALETTE_SIZE:
+            msg = "palette must hold up to 256 RGBA colours"
+            raise WebPError(msg)
+
+        ptr = self.ptr
+        ptr.height, ptr.width = indices.shape
+        tracer = _trace.tracer
+        if tracer is not None:
+            start_ns = time.perf_counter_ns()
+        ok = lib.PyWebPPictureImportPalette(
+            ptr,
+            ffi.cast("uint8_t*", ffi.from_buffer(indices)),
+            ptr.width,
+            ffi.cast("uint8_t*", ffi.from_buffer(palette)),
+            num_colors,
+        )
+        _memory.resize(self, _picture_nbytes(ptr))
+        if ok == 0:
+            msg = "memory error"
+            raise WebPError(msg)
+        if tracer is not None:
+            _trace.emit(
+                tracer,
+                "import",
+                start_ns,
+                width=ptr.width,
+                height=ptr.height,
+                mode="P",
+                bytes_in=indices.nbytes,
+                bytes_out=ptr.argb_stride * ptr.height * 4,
+            )
+
+    @staticmethod
+    def from_pil(img: "Image.Image") -> "WebPPicture":
+        """Create a picture from a PIL image.
+
+        Palette (P mode) images are imported from their palette indices, without converting them to
+        RGBA first.
+        """
+        if img.mode == "P":
+            return WebPPicture.from_palette(np.asarray(img), _pil_palette_rgba(img))
+        return WebPPicture.from_numpy(np.asarray(img), pilmode=img.mode)
+
+
+class WebPDecoderConfig:
+    """Wrap a WebP decoder configuration."""
+
+    def __init__(self, ptr: _Pointer) -> None:
+        """Initialize the wrapper."""
+        self.ptr = ptr
+
+    @property
+    def input(self) -> _Pointer:
+        """Return decoder input settings."""
+        return self.ptr.input
+
+    @property
+    def output(self) -> _Pointer:
+        """Return decoder output settings."""
+        return self.ptr.output
+
+    @property
+    def options(self) -> _Pointer:
+        """Return decoder options."""
+        return self.ptr.options
+
+    def read_features(self, webp_data: WebPData) -> None:
+        """Read WebP features into this configuration."""
+        input_ptr = ffi.addressof(self.ptr, "input")
+        if lib.WebPGetFeatures(webp_data.ptr.bytes, webp_data.size, input_ptr) != lib.VP8_STATUS_OK:
+            msg = "failed to read features"
+            raise WebPError(msg)
+
+    @staticmethod
+    def new() -> "WebPDecoderConfig":
+        """Create a new wrapper instance."""
+        ptr = ffi.new("WebPDecoderConfig*")
+        if lib.WebPInitDecoderConfig(ptr) == 0:
+            msg = "failed to init decoder config"
+            raise WebPError(msg)
+        return WebPDecoderConfig(ptr)
+
+
+class WebPDecBuffer:
+    """Represent a decoded image held in memory allocated by libwebp.
+
+    The pixels are exposed without copying through the buffer protocol (Python 3.12+),
+    `__array_interface__`, and DLPack.
+    """
+
+    def __init__(self, dec_config: WebPDecoderConfig, color_mode: WebPColorMode) -> None:
+        """Initialize the wrapper."""
+        self._dec_config = dec_config
+        self.color_mode = color_mode
+        _memory.track(self, dec_config.output.u.RGBA.size)
+
+    def __del__(self) -> None:
+        """Release owned WebP resources."""
+        _memory.untrack(self)
+        lib.WebPFreeDecBuffer(ffi.addressof(self._dec_config.ptr, "output"))
+
+    @property
+    def width(self) -> int:
+        """Return the image width."""
+        return self._dec_config.output.width
+
+    @property
+    def height(self) -> int:
+        """Return the image height."""
+        return self._dec_config.output.height
+
+    @property
+    def stride(self) -> int:
+        """Return the number of bytes between the starts of consecutive rows."""
+        return self._dec_config.output.u.RGBA.stride
+
+    @property
+    def shape(self) -> Tuple[int, ...]:
+        """Return the image shape (see `WebPColorMode.array_shape`)."""
+        return self.color_mode.array_shape(self.height, self.width)
+
+    def __buffer__(self, flags: int) -> memoryview:
+        """Expose the pixels through the buffer protocol, with `shape` and native uint16 for packed modes."""
+        rgba = self._dec_config.output.u.RGBA
+        view = memoryview(ffi.buffer(rgba.rgba, rgba.size))
+        if self.stride != self.width * self.color_mode.bytes_per_pixel:
+            return view
+        return view.cast("H" if self.color_mode.is_packed else "B", self.shape)
+
+    @property
+    def __array_interface__(self) -> Dict[str, Any]:
+        """Describe the pixels as an array with `shape` and the color mode's dtype."""
+        address = int(ffi.cast("uintptr_t", self._dec_config.output.u.RGBA.rgba))
+        strides = (self.stride, self.color_mode.bytes_per_pixel, 1)[: len(self.shape)]
+        return _array_interface(address, self.shape, strides, readonly=False, typestr=self.color_mode.dtype.str)
+
+    def __dlpack__(self, *args: Any, **kwargs: Any) -> Any:  # noqa: ANN401
+        """Export the pixels as a DLPack capsule."""
+        return self.to_numpy().__dlpack__(*args, **kwargs)
+
+    def __dlpack_device__(self) -> Tuple[int, int]:
+        """Return the DLPack device (always the CPU)."""
+        return (DLPACK_CPU_DEVICE, 0)
+
+    def to_numpy(self) -> "np.ndarray[Any, np.dtype[Any]]":
+        """Return a numpy view of the pixels, which keeps this buffer alive."""
+        return np.asarray(self)
+
+
+class Decoder:
+    """Reusable context for decoding many still images.
+
+    A decoder keeps its libwebp configuration between calls, which saves a little allocation and
+    Python overhead per image. This matters mostly for small images. A decoder must not be used by
+    more than one thread at a time; create one per thread instead.
+    """
+
+    def __init__(self, color_mode: WebPColorMode = WebPColorMode.RGBA) -> None:
+        """Create a decoder.
+
+        Args:
+            color_mode (WebPColorMode): Output color mode.
+        """
+        _ = color_mode.bytes_per_pixel  # Raises for unsupported color modes
+        self.color_mode = color_mode
+        self.dec_config = WebPDecoderConfig.new()
+
+    def decode(
+        self,
+        data: Union[bytes, bytearray, memoryview, WebPData],
+        *,
+        out: "Optional[np.ndarray[Any, np.dtype[np.uint8]]]" = None,
+    ) -> "np.ndarray[Any, np.dtype[np.uint8]]":
+        """Decode WebP data into a numpy array.
+
+        Args:
+            data (bytes or WebPData): Encoded WebP data.
+            out (np.ndarray, optional): Destination array to decode into (see `WebPData.decode`).
+
+        Returns:
+            np.ndarray: The decoded image data.
+        """
+        webp_data = data if isinstance(data, WebPData) else WebPData.from_buffer(data)
+        return webp_data._decode(self.color_mode, out, None, None, self.dec_config)  # noqa: SLF001
+
+
+def _atlas_inputs(buffers: Sequence[Union[bytes, bytearray, memoryview, WebPData]]) -> Tuple[Any, Any, List[Any]]:
+    """Return C arrays of data pointers and sizes, and the wrapped buffers that must be kept alive."""
+    data = ffi.new("const uint8_t*[]", len(buffers))
+    data_sizes = ffi.new("size_t[]", len(buffers))
+    refs = []
+    for i, buf in enumerate(buffers):
+        if isinstance(buf, WebPData):
+            data[i], data_sizes[i] = buf.ptr.bytes, buf.size
+        else:
+            ref = ffi.from_buffer("uint8_t[]", buf)
+            refs.append(ref)
+            data[i], data_sizes[i] = ref, len(ref)
+    return data, data_sizes, refs
+
+
+def _atlas_size(data: _Pointer, data_sizes: _Pointer, offsets: "np.ndarray[Any, Any]") -> Tuple[int, int]:
+    """Return the (width, height) of the smallest canvas that holds every image."""
+    width, height = 0, 0
+    width_ptr, height_ptr = ffi.new("int*"), ffi.new("int*")
+    for i, (x, y) in enumerate(offsets.tolist()):
+        if lib.WebPGetInfo(data[i], data_sizes[i], width_ptr, height_ptr) == 0:
+            msg = f"failed to read features of image {i}"
+            raise WebPError(msg)
+        width = max(width, x + width_ptr[0])
+        height = max(height, y + height_ptr[0])
+    return width, height
+
+
+def decode_into_atlas(  # noqa: PLR0913
+    buffers: Sequence[Union[bytes, bytearray, memoryview, WebPData]],
+    layout: "Union[Sequence[Tuple[int, int]], np.ndarray[Any, Any]]",
+    *,
+    color_mode: WebPColorMode = WebPColorMode.RGBA,
+    size: Optional[Tuple[int, int]] = None,
+    out: "Optional[np.ndarray[Any, Any]]" = None,
+    max_workers: Optional[int] = None,
+    max_pixels: Optional[int] = None,
+    max_bytes: Optional[int] = None,
+) -> "np.ndarray[Any, Any]":
+    """Decode many still images into a single canvas, such as a sprite atlas.
+
+    Each image is decoded straight into the canvas at its offset, with no intermediate array per
+    image. The batch is split into one run of images per worker thread, and each run is decoded
+    by a single call into libwebp, so the GIL is released once per run rather than once per image.
+    Images must not overlap when `max_workers` is more than 1.
+
+    Args:
+        buffers (list of bytes or WebPData): Encoded still images.
+        layout (list of tuple of int): Top-left corner of each image in the canvas, as (x, y).
+            An (N, 2) integer array is also accepted.
+        color_mode (WebPColorMode): Output color mode.
+        size (tuple of int, optional): Canvas size, as (width, height). Defaults to the smallest
+            canvas that holds every image.
+        out (np.ndarray, optional): Canvas to decode into (see `WebPData.decode`). Pixels that are
+            not covered by any image are left untouched. Overrides `size`.
+        max_workers (int, optional): Number of decoding threads. Defaults to the number of CPUs.
+        max_pixels (int, optional): Maximum number of pixels in the canvas. Defaults to the
+            process-wide limit (see `set_decode_limits`). Every image must fit inside the canvas,
+            so this also bounds each image.
+        max_bytes (int, optional): Maximum size of the canvas in bytes. Defaults to the
+            process-wide limit.
+
+    Returns:
+        np.ndarray: The canvas, zero-filled where no image was decoded (or `out`, if provided).
+    """
+    bytes_per_pixel = color_mode.bytes_per_pixel
+    num_images = len(buffers)
+    offsets = np.ascontiguousarray(layout, dtype=np.intc).reshape(-1, 2)
+    if len(offsets) != num_images:
+        msg = f"layout has {len(offsets)} offsets for {num_images} images"
+        raise WebPError(msg)
+
+    # The wrapped buffers in `_refs` must stay alive until decoding is done.
+    data, data_sizes, _refs = _atlas_inputs(buffers)
+    if out is not None:
+        out = _as_ndarray(out)
+        height, width = out.shape[:2]
+    elif size is not None:
+        width, height = size
+    else:
+        width, height = _atlas_size(data, data_sizes, offsets)
+
+    shape = color_mode.array_shape(height, width)
+    _check_decode_limits(width * height, width * height * bytes_per_pixel, max_pixels, max_bytes)
+    arr = np.zeros(shape, dtype=color_mode.dtype) if out is None else _check_out_array(out, shape, color_mode.dtype)
+
+    canvas = ffi.cast("uint8_t*", ffi.from_buffer(arr))
+    offsets_ptr = ffi.cast("const int*", ffi.from_buffer(offsets))
+
+    def decode_run(start: int, stop: int) -> int:
+        failed = lib.PyWebPDecodeIntoCanvas(
+            data + start,
+            data_sizes + start,
+            offsets_ptr + 2 * start,
+            stop - start,
+            canvas,
+            width,
+            height,
+            width * bytes_per_pixel,
+            bytes_per_pixel,
+            color_mode.value,
+        )
+        return failed if failed < 0 else start + failed
+
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    run_length = -(-num_images // max(1, min(max_workers, num_images)))
+    runs = [(start, min(start + run_length, num_images)) for start in range(0, num_images, run_length)]
+
+    tracer = _trace.tracer
+    if tracer is not None:
+        start_ns = time.perf_counter_ns()
+    if len(runs) <= 1:
+        failures = [decode_run(start, stop) for start, stop in runs]
+    else:
+        with ThreadPoolExecutor(max_workers=len(runs)) as executor:
+            failures = list(executor.map(decode_run, *zip(*runs)))
+    failed = next((i for i in failures if i >= 0), None)
+    if failed is not None:
+        msg = f"failed to decode image {failed} into the atlas (it may not fit inside the canvas)"
+        raise WebPError(msg)
+    if tracer is not None:
+        _trace.emit(
+            tracer,
+            "decode_atlas",
+            start_ns,
+            width=width,
+            height=height,
+            mode=color_mode.name,
+            bytes_in=sum(data_sizes),
+            bytes_out=arr.nbytes,
+        )
+
+    return arr
+
+
+class Encoder:
+    """Reusable context for encoding many still images.
+
+    An encoder keeps its configuration and a single picture between calls, so each image costs
+    one pixel import into the existing picture rather than a fresh picture struct that is
+    allocated, initialized, and freed again. The picture's pixel buffer is still reallocated by
+    libwebp on every import. An encoder must not be used by more than one thread at a time;
+    create one per thread instead.
+    """
+
+    def __init__(
+        self,
+        config: Optional[AnyWebPConfig] = None,
+        **kwargs: Any,  # noqa: ANN401
+    ) -> None:
+        """Create an encoder.
+
+        Args:
+            config (WebPConfig, optional): Encoder configuration. If not given, one is created from
+                `kwargs`.
+            kwargs: Keyword arguments for encoder settings (see `WebPConfig.new`).
+        """
+        if config is None:
+            config = FrozenWebPConfig.new(**kwargs)
+        self.config = config
+        ptr = ffi.new("WebPPicture*")
+        if lib.WebPPictureInit(ptr) == 0:
+            msg = "version mismatch"
+            raise WebPError(msg)
+        self.pic = WebPPicture(ptr)
+
+    def encode(
+        self,
+        arr: "np.ndarray[Any, np.dtype[np.uint8]]",
+        pilmode: Optional[str] = None,
+        *,
+        cache: "Optional[EncodeCache]" = None,
+    ) -> WebPData:
+        """Encode a numpy array image.
+
+        Args:
+            arr (np.ndarray): Image data to encode.
+            pilmode (str, optional): PIL image mode corresponding to the data in `arr`.
+            cache (EncodeCache, optional): Cache of previously encoded images.
+
+        Returns:
+            WebPData: The encoded data.
+        """
+        self.pic.import_numpy(arr, pilmode=pilmode)
+        return self.pic.encode(self.config, cache=cache)
+
+
+class WebPContainer:
+    """Edit the chunks of a WebP file without decoding or re-encoding its images.
+
+    This can be used to attach or remove metadata (ICC profiles, EXIF, and XMP) on existing files
+    at the cost of copying the compressed data once.
+    """
+
+    ICCP = "ICCP"
+    EXIF = "EXIF"
+    XMP = "XMP "
+
+    def __init__(self, ptr: _Pointer, webp_data: WebPData) -> None:
+        """Initialize the wrapper."""
+        self.ptr = ptr
+        # Chunks that have not been replaced still point into the original data.
+        self.webp_data = webp_data
+        _memory.track(self)
+
+    def __del__(self) -> None:
+        """Release owned WebP resources."""
+        _memory.untrack(self)
+        lib.WebPMuxDelete(self.ptr)
+
+    def get_chunk(self, fourcc: str) -> Optional[bytes]:
+        """Return the payload of the first chunk with the given FourCC, or None if it is absent."""
+        chunk_data = ffi.new("WebPData*")
+        err = lib.WebPMuxGetChunk(self.ptr, fourcc.encode("ascii"), chunk_data)
+        if err == lib.WEBP_MUX_NOT_FOUND:
+            return None
+        if err != lib.WEBP_MUX_OK:
+            raise WebPError("failed to get chunk: " + fourcc)
+        return ffi.buffer(chunk_data.bytes, chunk_data.size)[:]
+
+    def set_chunk(self, fourcc: str, data: Union[bytes, bytearray, memoryview]) -> None:
+        """Add or replace a chunk. Image and animation chunks cannot be set this way."""
+        chunk_data = ffi.new("WebPData*")
+        data_ref = ffi.from_buffer(data)
+        chunk_data.bytes = ffi.cast("uint8_t*", data_ref)
+        chunk_data.size = len(data_ref)
+        if lib.WebPMuxSetChunk(self.ptr, fourcc.encode("ascii"), chunk_data, 1) != lib.WEBP_MUX_OK:
+            raise WebPError("failed to set chunk: " + fourcc)
+
+    def delete_chunk(self, fourcc: str) -> bool:
+        """Delete all chunks with the given FourCC, returning whether there were any."""
+        err = lib.WebPMuxDeleteChunk(self.ptr, fourcc.encode("ascii"))
+        if err == lib.WEBP_MUX_NOT_FOUND:
+            return False
+        if err != lib.WEBP_MUX_OK:
+            raise WebPError("failed to delete chunk: " + fourcc)
+        return True
+
+    @property
+    def icc_profile(self) -> Optional[bytes]:
+        """Return the ICC color profile."""
+        return self.get_chunk(self.ICCP)
+
+    @icc_profile.setter
+    def icc_profile(self, icc_profile: Optional[bytes]) -> None:
+        """Set (or, with None, remove) the ICC color profile."""
+        self._set_or_delete(self.ICCP, icc_profile)
+
+    @property
+    def exif(self) -> Optional[bytes]:
+        """Return the EXIF metadata."""
+        return self.get_chunk(self.EXIF)
+
+    @exif.setter
+    def exif(self, exif: Optional[bytes]) -> None:
+        """Set (or, with None, remove) the EXIF metadata."""
+        self._set_or_delete(self.EXIF, exif)
+
+    @property
+    def xmp(self) -> Optional[bytes]:
+        """Return the XMP metadata."""
+        return self.get_chunk(self.XMP)
+
+    @xmp.setter
+    def xmp(self, xmp: Optional[bytes]) -> None:
+        """Set (or, with None, remove) the XMP metadata."""
+        self._set_or_delete(self.XMP, xmp)
+
+    def _set_or_delete(self, fourcc: str, data: Optional[bytes]) -> None:
+        if data is None:
+            self.delete_chunk(fourcc)
+        else:
+            self.set_chunk(fourcc, data)
+
+    def strip_metadata(self, *, icc_profile: bool = False) -> None:
+        """Remove EXIF and XMP metadata, and optionally the ICC color profile."""
+        self.delete_chunk(self.EXIF)
+        self.delete_chunk(self.XMP)
+        if icc_profile:
+            self.delete_chunk(self.ICCP)
+
+    def assemble(self) -> WebPData:
+        """Return the edited file as WebP data."""
+        _webp_data = _WebPData()
+        if lib.WebPMuxAssemble(self.ptr, _webp_data.ptr) != lib.WEBP_MUX_OK:
+            msg = "error assembling WebP data"
+            raise WebPError(msg)
+        return _webp_data.done()
+
+    def save(self, file_path: FilePath) -> None:
+        """Save the edited file."""
+        _write_file(file_path, self.assemble().buffer())
+
+    @staticmethod
+    def new(webp_data: Union[WebPData, bytes, bytearray, memoryview]) -> "WebPContainer":
+        """Parse WebP data (which can also be a buffer such as an mmap) without copying it."""
+        if not isinstance(webp_data, WebPData):
+            webp_data = WebPData.from_buffer(webp_data)
+        ptr = lib.WebPMuxCreate(webp_data.ptr, 0)
+        if ptr == ffi.NULL:
+            msg = "failed to parse WebP data"
+            raise WebPError(msg)
+        return WebPContainer(ptr, webp_data)
+
+    @staticmethod
+    def load(file_path: FilePath) -> "WebPContainer":
+        """Load a WebP file."""
+        return WebPContainer.new(_read_file(file_path))
@@ -0,0 +1,369 @@
+"""Simple API for reading and writing WebP files as numpy arrays."""
+
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+
+from webp._anim import (
+    WebPAnimDecoder,
+    WebPAnimDecoderOptions,
+    WebPAnimEncoder,
+    WebPAnimEncoderOptions,
+    decode_anim_parallel,
+)
+from webp._core import (
+    RGB_CHANNELS,
+    RGBA_CHANNELS,
+    FilePath,
+    FrozenWebPConfig,
+    WebPColorMode,
+    WebPData,
+    WebPError,
+    WebPPicture,
+    _effective_decode_limits,
+    _read_file,
+    _write_file,
+)
+from webp._webp import ffi
+from webp.cache import get_decode_cache
+
+if TYPE_CHECKING:
+    from webp.cache import EncodeCache
+
+
+def imwrite(
+    file_path: FilePath,
+    arr: "np.ndarray[Any, np.dtype[np.uint8]]",
+    pilmode: Optional[str] = None,
+    *,
+    cache: "Optional[EncodeCache]" = None,
+    optimize_alpha: bool = False,
+    **kwargs: Any,  # noqa: ANN401
+) -> None:
+    """Encode numpy array image with WebP and save to file.
+
+    Args:
+        file_path (str): File to save to.
+        arr (np.ndarray): Image data to save.
+        pilmode (str): PIL image mode corresponding to the data in `arr`.
+        cache (EncodeCache, optional): Cache of previously encoded images.
+        optimize_alpha (bool): Clear hidden colours in fully transparent areas before encoding
+            (see `WebPPicture.optimize_alpha`).
+        kwargs: Keyword arguments for encoder settings (see `WebPConfig.new`).
+    """
+    pic = WebPPicture.from_numpy(arr, pilmode=pilmode)
+    if optimize_alpha:
+        pic.optimize_alpha()
+    config = FrozenWebPConfig.new(**kwargs)
+    pic.save(file_path, config, cache=cache)
+
+
+_PILMODE_COLOR_MODES = {
+    "RGBA": WebPColorMode.RGBA,
+    "RGBa": WebPColorMode.rgbA,
+    "RGB": WebPColorMode.RGB,
+}
+
+
+def imread(  # noqa: PLR0913
+    file_path: FilePath,
+    pilmode: str = "RGBA",
+    *,
+    color_mode: Optional[WebPColorMode] = None,
+    crop: Optional[Tuple[int, int, int, int]] = None,
+    scale: Optional[Tuple[int, int]] = None,
+    max_pixels: Optional[int] = None,
+    max_bytes: Optional[int] = None,
+) -> "np.ndarray[Any, np.dtype[np.uint8]]":
+    """Load from file and decode numpy array with WebP.
+
+    If a decode cache is installed (see `webp.cache.set_decode_cache`), results are cached by
+    path, modification time, file size, mode, crop, scale, and decode limits, and returned as
+    read-only arrays.
+
+    Args:
+        file_path (str): File to load from.
+        pilmode (str): Image color mode (RGBA, RGBa, or RGB).
+        color_mode (WebPColorMode, optional): Decode to this libwebp color mode instead of
+            `pilmode`, e.g. `WebPColorMode.Argb` or `WebPColorMode.RGB_565`. Packed modes give
+            (height, width) arrays of native-endian uint16 values.
+        crop (tuple of int, optional): Region to decode, as (left, top, width, height).
+        scale (tuple of int, optional): Output size, as (width, height).
+        max_pixels (int, optional): Maximum number of pixels in the image. Defaults to the
+            process-wide limit (see `set_decode_limits`).
+        max_bytes (int, optional): Maximum size of the decoded output in bytes. Defaults to the
+            process-wide limit.
+
+    Returns:
+        np.ndarray: The decoded image data.
+    """
+    if color_mode is None:
+        color_mode = _PILMODE_COLOR_MODES.get(pilmode)
+        if color_mode is None:
+            raise WebPError("unsupported color mode: " + pilmode)
+
+    decode_cache = get_decode_cache()
+    key = None
+    if decode_cache is not None:
+        path = Path(file_path).absolute()
+        st = path.stat()
+        limits = _effective_decode_limits(max_pixels, max_bytes)
+        key = ("file", str(path), st.st_mtime_ns, st.st_size, color_mode, crop, scale, limits)
+        arr = decode_cache.get(key)
+        if arr is not None:
+            return arr
+
+    webp_data = WebPData.from_buffer(_read_file(file_path))
+    arr = webp_data._decode(color_mode, None, crop, scale, max_pixels=max_pixels, max_bytes=max_bytes)  # noqa: SLF001
+
+    if decode_cache is not None:
+        arr = decode_cache.put(key, arr)
+    return arr
+
+
+def _argb_pixels(pic: WebPPicture) -> "np.ndarray[Any, np.dtype[np.uint8]]":
+    """Return a view of the ARGB samples of a picture, with shape (height, width, 4)."""
+    ptr = pic.ptr
+    buf = ffi.buffer(ptr.argb, ptr.argb_stride * ptr.height * 4)
+    return np.frombuffer(buf, dtype=np.uint8).reshape(ptr.height, ptr.argb_stride, 4)[:, : ptr.width]
+
+
+def _same_frame(pic1: WebPPicture, pic2: WebPPicture, tolerance: int) -> bool:
+    if (pic1.ptr.width, pic1.ptr.height) != (pic2.ptr.width, pic2.ptr.height):
+        return False
+    if not (pic1.ptr.use_argb and pic2.ptr.use_argb):
+        return False
+    pixels1 = _argb_pixels(pic1)
+    pixels2 = _argb_pixels(pic2)
+    if tolerance == 0:
+        return np.array_equal(pixels1, pixels2)
+    diff = np.maximum(pixels1, pixels2) - np.minimum(pixels1, pixels2)
+    return int(diff.max()) <= tolerance
+
+
+def _split_timed_frames(
+    frames: List[Any],
+    durations: Optional[List[float]],
+) -> Tuple[List[Any], Optional[List[float]]]:
+    """Split a list of frames or (frame, duration_ms) pairs into frames and durations."""
+    if not any(isinstance(frame, tuple) for frame in frames):
+        return frames, durations
+    if not all(isinstance(frame, tuple) and len(frame) == 2 for frame in frames):  # noqa: PLR2004
+        msg = "either all or none of the frames must be (frame, duration_ms) pairs"
+        raise WebPError(msg)
+    if durations is not None:
+        msg = "durations cannot be specified when frames are (frame, duration_ms) pairs"
+        raise WebPError(msg)
+    return [frame for frame, _ in frames], [duration for _, duration in frames]
+
+
+def _frame_timestamps(
+    frame_count: int,
+    fps: float,
+    durations: Optional[List[float]],
+    timestamps_ms: Optional[List[int]],
+) -> List[int]:
+    """Return the start time of each frame followed by the end time of the animation."""
+    if durations is not None and timestamps_ms is not None:
+        msg = "durations and timestamps_ms cannot both be specified"
+        raise WebPError(msg)
+    if timestamps_ms is not None:
+        if len(timestamps_ms) != frame_count + 1:
+            msg = f"expected {frame_count + 1} timestamps (one per frame and the end time), got {len(timestamps_ms)}"
+            raise WebPError(msg)
+        timestamps = [int(t) for t in timestamps_ms]
+    elif durations is not None:
+        if len(durations) != frame_count:
+            msg = f"expected {frame_count} durations, got {len(durations)}"
+            raise WebPError(msg)
+        timestamps = [0]
+        elapsed = 0.0
+        for duration in durations:
+            elapsed += duration
+            timestamps.append(round(elapsed))
+    else:
+        return [round((i * 1000) / fps) for i in range(frame_count + 1)]
+    if any(t2 <= t1 for t1, t2 in zip(timestamps, timestamps[1:])):
+        msg = "frame timestamps must be strictly increasing"
+        raise WebPError(msg)
+    return timestamps
+
+
+def _mimwrite_pics(  # noqa: PLR0913
+    file_path: FilePath,
+    pics: List[WebPPicture],
+    fps: float = 30.0,
+    loop_count: Optional[int] = None,
+    *,
+    durations: Optional[List[float]] = None,
+    timestamps_ms: Optional[List[int]] = None,
+    dedupe: bool = False,
+    dedupe_tolerance: int = 0,
+    kmin: Optional[int] = None,
+    kmax: Optional[int] = None,
+    optimize_alpha: bool = False,
+    **kwargs: Any,  # noqa: ANN401
+) -> None:
+    if optimize_alpha:
+        # Before deduplication, so that frames which only differ in hidden colours are folded.
+        for pic in pics:
+            pic.optimize_alpha()
+    enc_opts = WebPAnimEncoderOptions.new(kmin=kmin, kmax=kmax)
+    if loop_count is not None:
+        enc_opts.loop_count = loop_count
+    enc = WebPAnimEncoder.new(pics[0].ptr.width, pics[0].ptr.height, enc_opts)
+    config = FrozenWebPConfig.new(**kwargs)
+    timestamps = _frame_timestamps(len(pics), fps, durations, timestamps_ms)
+    prev_pic = None
+    for pic, t in zip(pics, timestamps):
+        # A repeated frame is skipped, which extends the duration of the previous frame up to the
+        # timestamp of the next distinct frame.
+        if dedupe and prev_pic is not None and _same_frame(prev_pic, pic, dedupe_tolerance):
+            continue
+        enc.encode_frame(pic, t, config)
+        prev_pic = pic
+    anim_data = enc.assemble(timestamps[-1])
+
+    _write_file(file_path, anim_data.buffer())
+
+
+def mimwrite(  # noqa: PLR0913
+    file_path: FilePath,
+    arrs: "List[Union[np.ndarray[Any, np.dtype[np.uint8]], Tuple[np.ndarray[Any, np.dtype[np.uint8]], float]]]",
+    fps: float = 30.0,
+    loop_count: Optional[int] = None,
+    pilmode: Optional[str] = None,
+    *,
+    durations: Optional[List[float]] = None,
+    timestamps_ms: Optional[List[int]] = None,
+    dedupe: bool = False,
+    dedupe_tolerance: int = 0,
+    kmin: Optional[int] = None,
+    kmax: Optional[int] = None,
+    optimize_alpha: bool = False,
+    **kwargs: Any,  # noqa: ANN401
+) -> None:
+    """Encode a sequence of PIL Images with WebP and save to file.
+
+    Frame timing is given by exactly one of `fps`, `durations`, `timestamps_ms`, or
+    (frame, duration_ms) pairs in `arrs`.
+
+    Args:
+        file_path (str): File to save to.
+        arrs (list of np.ndarray): Image data to save, optionally as (frame, duration_ms) pairs.
+        fps (float): Animation speed in frames per second.
+        loop_count (int, optional): Number of times to repeat the animation.
+            0 = infinite.
+        pilmode (str, optional): Image color mode (RGBA or RGB). Will be
+            inferred from the images if not specified.
+        durations (list of float, optional): Duration of each frame in milliseconds.
+        timestamps_ms (list of int, optional): Start time of each frame in milliseconds,
+            followed by the end time of the animation.
+        dedupe (bool): Fold consecutive duplicate frames into a single longer frame before
+            encoding. This changes the number of frames and their timestamps in the file.
+        dedupe_tolerance (int): Maximum per-channel difference for frames to be considered
+            duplicates.
+        kmin (int, optional): Minimum distance between keyframes.
+        kmax (int, optional): Maximum distance between keyframes.
+        optimize_alpha (bool): Clear hidden colours in fully transparent areas of every frame
+            before encoding (see `WebPPicture.optimize_alpha`). This also lets frames which only
+            differ in hidden colours be deduplicated.
+        kwargs: Keyword arguments for encoder settings (see `WebPConfig.new`).
+    """
+    frames, durations = _split_timed_frames(arrs, durations)
+    pics = [WebPPicture.from_numpy(arr, pilmode=pilmode) for arr in frames]
+    _mimwrite_pics(
+        file_path,
+        pics,
+        fps=fps,
+        loop_count=loop_count,
+        durations=durations,
+        timestamps_ms=timestamps_ms,
+        dedupe=dedupe,
+        dedupe_tolerance=dedupe_tolerance,
+        kmin=kmin,
+        kmax=kmax,
+        optimize_alpha=optimize_alpha,
+        **kwargs,
+    )
+
+
+def mimread(  # noqa: PLR0913
+    file_path: FilePath,
+    fps: Optional[float] = None,
+    *,
+    use_threads: bool = True,
+    pilmode: str = "RGBA",
+    color_mode: Optional[WebPColorMode] = None,
+    max_workers: Optional[int] = None,
+    max_pixels: Optional[int] = None,
+    max_bytes: Optional[int] = None,
+) -> List["np.ndarray[Any, np.dtype[np.uint8]]"]:
+    """Load from file and decode a list of numpy arrays with WebP.
+
+    Args:
+        file_path (str): File to load from.
+        pilmode (str): Image color mode (RGBA, RGBa, or RGB).
+        color_mode (WebPColorMode, optional): Decode to this libwebp color mode instead of
+            `pilmode` (see `WebPAnimDecoderOptions.color_mode` for the supported modes).
+        fps (float, optional): Frames will be evenly sampled to meet this particular
+            FPS. If `fps` is None, an ordered sequence of unique frames in the
+            animation will be returned.
+        use_threads (bool): Set to False to disable multi-threaded decoding.
+        max_workers (int, optional): If given, decode independent segments of the animation
+            in parallel on this many threads (see `decode_anim_parallel`). The returned frames
+            are then views into a single array.
+        max_pixels (int, optional): Maximum canvas size multiplied by the number of frames.
+            Defaults to the process-wide limit (see `set_decode_limits`).
+        max_bytes (int, optional): Maximum size of all decoded frames in bytes. Defaults to the
+            process-wide limit.
+
+    Returns:
+        list of np.ndarray: The decoded image data.
+    """
+    drop_alpha = color_mode is None and pilmode == "RGB"
+    if drop_alpha:
+        # NOTE: RGB decoding of animations is currently not supported by
+        # libwebpdemux. Hence we will read RGBA and remove the alpha channel later.
+        color_mode = WebPColorMode.RGBA
+    elif color_mode is None:
+        color_mode = _PILMODE_COLOR_MODES.get(pilmode)
+        if color_mode is None:
+            raise WebPError("unsupported color mode: " + pilmode)
+
+    arrs: List[np.ndarray[Any, np.dtype[np.uint8]]] = []
+
+    webp_data = WebPData.from_buffer(_read_file(file_path))
+    decoded: Iterable[Tuple[np.ndarray[Any, np.dtype[np.uint8]], int]]
+    if max_workers is None:
+        dec_opts = WebPAnimDecoderOptions.new(use_threads=use_threads, color_mode=color_mode)
+        dec = WebPAnimDecoder.new(webp_data, dec_opts, max_pixels=max_pixels, max_bytes=max_bytes)
+        decoded = ((arr[:, :, 0:3] if drop_alpha else arr, t) for arr, t in dec.frames())
+    else:
+        channels = RGB_CHANNELS if drop_alpha else RGBA_CHANNELS
+        all_frames, end_timestamps = decode_anim_parallel(
+            webp_data,
+            color_mode,
+            channels=channels,
+            max_workers=max_workers,
+            use_threads=use_threads,
+            max_pixels=max_pixels,
+            max_bytes=max_bytes,
+        )
+        decoded = zip(all_frames, end_timestamps)
+    eps = 1e-7
+
+    frame = None
+    for frame, frame_end_time in decoded:
+        if fps is None:
+            arrs.append(frame)
+        else:
+            while len(arrs) * (1000 / fps) + eps < frame_end_time:
+                arrs.append(frame)
+    # An animation whose frames are all identical is stored as a still image without any
+    # timing information. Return its single frame rather than nothing.
+    if not arrs and frame is not None:
+        arrs.append(frame)
+
+    return arrs
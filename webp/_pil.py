@@ -0,0 +1,98 @@
+"""Simple API for reading and writing WebP files as PIL images.
+
+This module is imported on first use, so that `import webp` does not have to load Pillow.
+"""
+
+from typing import TYPE_CHECKING, Any, List, Optional, Tuple, Union
+
+from PIL import Image
+
+from webp._core import (
+    FilePath,
+    FrozenWebPConfig,
+    WebPPicture,
+)
+from webp._numpy import (
+    _mimwrite_pics,
+    _split_timed_frames,
+    imread,
+    mimread,
+)
+
+if TYPE_CHECKING:
+    from webp.cache import EncodeCache
+
+
+def save_image(
+    img: Image.Image,
+    file_path: FilePath,
+    *,
+    cache: "Optional[EncodeCache]" = None,
+    optimize_alpha: bool = False,
+    **kwargs: Any,  # noqa: ANN401
+) -> None:
+    """Encode PIL Image with WebP and save to file.
+
+    Args:
+        img (pil.Image): Image to save.
+        file_path (str): File to save to.
+        cache (EncodeCache, optional): Cache of previously encoded images.
+        optimize_alpha (bool): Clear hidden colours in fully transparent areas before encoding
+            (see `WebPPicture.optimize_alpha`).
+        kwargs: Keyword arguments for encoder settings (see `WebPConfig.new`).
+    """
+    pic = WebPPicture.from_pil(img)
+    if optimize_alpha:
+        pic.optimize_alpha()
+    config = FrozenWebPConfig.new(**kwargs)
+    pic.save(file_path, config, cache=cache)
+
+
+def load_image(file_path: FilePath, mode: str = "RGBA") -> Image.Image:
+    """Load from file and decode PIL Image with WebP.
+
+    Args:
+        file_path (str): File to load from.
+        mode (str): Mode for the PIL image (RGBA, RGBa, or RGB).
+
+    Returns:
+        PIL.Image: The decoded Image.
+    """
+    arr = imread(file_path, pilmode=mode)
+    return Image.fromarray(arr, mode)
+
+
+def save_images(
+    imgs: List[Union[Image.Image, Tuple[Image.Image, float]]],
+    file_path: FilePath,
+    **kwargs: Any,  # noqa: ANN401
+) -> None:
+    """Encode a sequence of PIL Images with WebP and save to file.
+
+    Args:
+        imgs (list of pil.Image): Images to save, optionally as (image, duration_ms) pairs.
+        file_path (str): File to save to.
+        kwargs: Keyword arguments for saving the images (see `mimwrite`).
+    """
+    frames, kwargs["durations"] = _split_timed_frames(imgs, kwargs.get("durations"))
+    pics = [WebPPicture.from_pil(img) for img in frames]
+    _mimwrite_pics(file_path, pics, **kwargs)
+
+
+def load_images(
+    file_path: FilePath,
+    mode: str = "RGBA",
+    **kwargs: Any,  # noqa: ANN401
+) -> List[Image.Image]:
+    """Load from file and decode a sequence of PIL Images with WebP.
+
+    Args:
+        file_path (str): File to load from.
+        mode (str): Mode for the PIL image (RGBA, RGBa, or RGB).
+        kwargs: Keyword arguments for loading the images (see `mimread`).
+
+    Returns:
+        list of PIL.Image: The decoded Images.
+    """
+    arrs = mimread(file_path, pilmode=mode, **kwargs)
+    return [Image.fromarray(arr, mode) for arr in arrs]
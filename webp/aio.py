@@ -0,0 +1,189 @@
+"""Asyncio API for encoding and decoding WebP images.
+
+libwebp calls run on a bounded thread pool (the GIL is released while libwebp is working), so a
+large encode no longer blocks the event loop. Each `CodecExecutor` limits how many calls may be
+queued or running at once; further callers wait asynchronously until a slot frees up.
+"""
+
+import asyncio
+import functools
+import os
+import threading
+import weakref
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional, TypeVar, Union
+
+from webp import AnyWebPConfig, FilePath, FrozenWebPConfig, WebPColorMode, WebPData, WebPPicture, imread, imwrite
+
+if TYPE_CHECKING:
+    import numpy as np
+
+_T = TypeVar("_T")
+
+
+class CodecExecutor:
+    """Run blocking WebP calls on a bounded thread pool with backpressure."""
+
+    def __init__(self, max_workers: Optional[int] = None, max_pending: Optional[int] = None) -> None:
+        """Create an executor.
+
+        Args:
+            max_workers (int, optional): Number of worker threads. Defaults to the number of CPUs.
+            max_pending (int, optional): Maximum number of calls that may be queued or running at
+                once. Defaults to four times the number of workers.
+        """
+        if max_workers is None:
+            max_workers = os.cpu_count() or 1
+        if max_pending is None:
+            max_pending = 4 * max_workers
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="webp")
+        self._semaphores: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore] = (
+            weakref.WeakKeyDictionary()
+        )
+        self._lock = threading.Lock()
+
+    def _semaphore(self, loop: asyncio.AbstractEventLoop) -> asyncio.Semaphore:
+        with self._lock:
+            semaphore = self._semaphores.get(loop)
+            if semaphore is None:
+                semaphore = asyncio.Semaphore(self.max_pending)
+                self._semaphores[loop] = semaphore
+            return semaphore
+
+    async def run(self, func: Callable[..., _T], *args: Any, **kwargs: Any) -> _T:  # noqa: ANN401
+        """Run `func(*args, **kwargs)` on the thread pool and await its result.
+
+        If the awaiting task is cancelled before the call starts, the call is dropped. A call that
+        has already started runs to completion, and keeps its slot until then.
+        """
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphore(loop)
+        await semaphore.acquire()
+        try:
+            future = self._executor.submit(functools.partial(func, *args, **kwargs))
+        except BaseException:
+            semaphore.release()
+            raise
+
+        def release(_: "Future[_T]") -> None:
+            if not loop.is_closed():
+                loop.call_soon_threadsafe(semaphore.release)
+
+        future.add_done_callback(release)
+        return await asyncio.wrap_future(future, loop=loop)
+
+    def shutdown(self, *, wait: bool = True) -> None:
+        """Shut down the thread pool."""
+        self._executor.shutdown(wait=wait)
+
+
+_default_executor: Optional[CodecExecutor] = None
+_default_executor_lock = threading.Lock()
+
+
+def configure(max_workers: Optional[int] = None, max_pending: Optional[int] = None) -> CodecExecutor:
+    """Replace the default executor used by this module.
+
+    Args:
+        max_workers (int, optional): Number of worker threads. Defaults to the number of CPUs.
+        max_pending (int, optional): Maximum number of calls that may be queued or running at
+            once. Defaults to four times the number of workers.
+
+    Returns:
+        CodecExecutor: The new default executor.
+    """
+    global _default_executor  # noqa: PLW0603
+    with _default_executor_lock:
+        old_executor = _default_executor
+        _default_executor = CodecExecutor(max_workers, max_pending)
+    if old_executor is not None:
+        old_executor.shutdown(wait=False)
+    return _default_executor
+
+
+def get_executor() -> CodecExecutor:
+    """Return the default executor, creating it if necessary."""
+    global _default_executor  # noqa: PLW0603
+    with _default_executor_lock:
+        if _default_executor is None:
+            _default_executor = CodecExecutor()
+        return _default_executor
+
+
+async def decode(
+    data: Union[bytes, WebPData],
+    color_mode: WebPColorMode = WebPColorMode.RGBA,
+    *,
+    executor: Optional[CodecExecutor] = None,
+) -> "np.ndarray[Any, np.dtype[np.uint8]]":
+    """Decode WebP data into a numpy array without blocking the event loop.
+
+    Args:
+        data (bytes or WebPData): Encoded WebP data.
+        color_mode (WebPColorMode): Output color mode.
+        executor (CodecExecutor, optional): Executor to run on. Defaults to the module executor.
+
+    Returns:
+        np.ndarray: The decoded image data.
+    """
+    webp_data = data if isinstance(data, WebPData) else WebPData.from_buffer(data)
+    return await (executor or get_executor()).run(webp_data.decode, color_mode)
+
+
+def _encode(
+    arr: "np.ndarray[Any, np.dtype[np.uint8]]",
+    pilmode: Optional[str],
+    config: Optional[AnyWebPConfig],
+    kwargs: Dict[str, Any],
+) -> WebPData:
+    if config is None:
+        config = FrozenWebPConfig.new(**kwargs)
+    return WebPPicture.from_numpy(arr, pilmode=pilmode).encode(config)
+
+
+async def encode(
+    arr: "np.ndarray[Any, np.dtype[np.uint8]]",
+    pilmode: Optional[str] = None,
+    *,
+    config: Optional[AnyWebPConfig] = None,
+    executor: Optional[CodecExecutor] = None,
+    **kwargs: Any,  # noqa: ANN401
+) -> WebPData:
+    """Encode a numpy array image without blocking the event loop.
+
+    Args:
+        arr (np.ndarray): Image data to encode.
+        pilmode (str, optional): PIL image mode corresponding to the data in `arr`.
+        config (WebPConfig, optional): Encoder configuration. If not given, one is created from
+            `kwargs`.
+        executor (CodecExecutor, optional): Executor to run on. Defaults to the module executor.
+        kwargs: Keyword arguments for encoder settings (see `WebPConfig.new`).
+
+    Returns:
+        WebPData: The encoded data.
+    """
+    return await (executor or get_executor()).run(_encode, arr, pilmode, config, kwargs)
+
+
+async def read(
+    file_path: FilePath,
+    pilmode: str = "RGBA",
+    *,
+    executor: Optional[CodecExecutor] = None,
+) -> "np.ndarray[Any, np.dtype[np.uint8]]":
+    """Load from file and decode a numpy array without blocking the event loop (see `imread`)."""
+    return await (executor or get_executor()).run(imread, file_path, pilmode)
+
+
+async def write(
+    file_path: FilePath,
+    arr: "np.ndarray[Any, np.dtype[np.uint8]]",
+    pilmode: Optional[str] = None,
+    *,
+    executor: Optional[CodecExecutor] = None,
+    **kwargs: Any,  # noqa: ANN401
+) -> None:
+    """Encode a numpy array and save it to file without blocking the event loop (see `imwrite`)."""
+    await (executor or get_executor()).run(imwrite, file_path, arr, pilmode, **kwargs)
@@ -0,0 +1,273 @@
+"""Caches for WebP encoding and decoding results."""
+
+import contextlib
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Hashable, List, NamedTuple, Optional, Tuple, Union
+
+from webp._webp import ffi
+
+if TYPE_CHECKING:
+    import numpy as np
+
+    from webp import AnyWebPConfig, FilePath, WebPPicture
+
+
+class CacheStats(NamedTuple):
+    """Snapshot of cache counters."""
+
+    hits: int
+    misses: int
+    evictions: int
+    entries: int
+    size_bytes: int
+
+    @property
+    def hit_rate(self) -> float:
+        """Return the fraction of lookups that were hits."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+def config_key(config: "AnyWebPConfig") -> Tuple[Tuple[str, Any], ...]:
+    """Return every field of an encoder configuration as a hashable tuple."""
+    return tuple((name, getattr(config.ptr, name)) for name, _ in ffi.typeof("WebPConfig").fields)
+
+
+class EncodeCache:
+    """Content-addressed on-disk cache of encoded WebP data.
+
+    Entries are keyed by a hash of the source pixels, their shape and mode, and every encoder
+    configuration field. Each entry is a separate file written atomically (via a rename), so a
+    cache directory can be shared by several processes. When the total size exceeds `max_bytes`,
+    the least recently used entries are deleted.
+    """
+
+    SUFFIX = ".webp"
+
+    def __init__(self, directory: "FilePath", max_bytes: int = 1 << 30) -> None:
+        """Open (or create) a cache directory.
+
+        Args:
+            directory (str): Directory to store cache entries in.
+            max_bytes (int): Size budget for all cache entries, in bytes.
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._size_bytes = sum(size for _, size, _ in self._scan())
+
+    @staticmethod
+    def make_key(pixels: Any, shape: Tuple[int, ...], mode: str, config: "AnyWebPConfig") -> str:  # noqa: ANN401
+        """Return the cache key for some source pixels and encoder configuration.
+
+        Args:
+            pixels (buffer): Raw pixel data.
+            shape (tuple of int): Shape of the pixel data.
+            mode (str): Layout of the pixel data (e.g. "RGB" or "ARGB").
+            config (WebPConfig): Encoder configuration.
+
+        Returns:
+            str: Hexadecimal cache key.
+        """
+        h = hashlib.blake2b(digest_size=20)
+        h.update(repr((tuple(shape), mode, config_key(config))).encode())
+        h.update(pixels)
+        return h.hexdigest()
+
+    @staticmethod
+    def picture_key(pic: "WebPPicture", config: "AnyWebPConfig") -> Optional[str]:
+        """Return the cache key for encoding an ARGB picture, or None for other pictures."""
+        ptr = pic.ptr
+        if not ptr.use_argb or ptr.argb == ffi.NULL:
+            return None
+        pixels = ffi.buffer(ptr.argb, ptr.argb_stride * ptr.height * 4)
+        return EncodeCache.make_key(pixels, (ptr.height, ptr.width, ptr.argb_stride), "ARGB", config)
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / (key + self.SUFFIX)
+
+    def _scan(self) -> List[Tuple[int, int, Path]]:
+        entries = []
+        for path in self.directory.glob("*/*" + self.SUFFIX):
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime_ns, st.st_size, path))
+        return entries
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Return the cached data for `key`, or None if it is not cached."""
+        path = self._path(key)
+        try:
+            data = path.read_bytes()
+        except FileNotFoundError:
+            with self._lock:
+                self._misses += 1
+            return None
+        # Record the access time for LRU eviction.
+        with contextlib.suppress(OSError):
+            os.utime(path)
+        with self._lock:
+            self._hits += 1
+        return data
+
+    def put(self, key: str, data: Union[bytes, memoryview]) -> None:
+        """Store data under `key`, evicting old entries if the cache is over budget."""
+        path = self._path(key)
+        path.parent.mkdir(exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=".", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            # Replace under the lock, so that the size of an overwritten entry is not counted twice.
+            with self._lock:
+                try:
+                    old_size = path.stat().st_size
+                except FileNotFoundError:
+                    old_size = 0
+                Path(tmp_name).replace(path)
+                self._size_bytes += len(data) - old_size
+                over_budget = self._size_bytes > self.max_bytes
+        except BaseException:
+            Path(tmp_name).unlink()
+            raise
+        if over_budget:
+            self.evict()
+
+    def evict(self) -> None:
+        """Delete least recently used entries until the cache is within budget."""
+        with self._lock:
+            entries = sorted(self._scan())
+            size_bytes = sum(size for _, size, _ in entries)
+            # Evict down to a low watermark so that eviction does not run on every put.
+            target = self.max_bytes * 9 // 10
+            for _, size, path in entries:
+                if size_bytes <= target:
+                    break
+                path.unlink(missing_ok=True)
+                size_bytes -= size
+                self._evictions += 1
+            self._size_bytes = size_bytes
+
+    def clear(self) -> None:
+        """Delete every cache entry."""
+        with self._lock:
+            for _, _, path in self._scan():
+                path.unlink(missing_ok=True)
+            self._size_bytes = 0
+
+    def stats(self) -> CacheStats:
+        """Return a snapshot of the cache counters."""
+        entries = self._scan()
+        with self._lock:
+            return CacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                entries=len(entries),
+                size_bytes=sum(size for _, size, _ in entries),
+            )
+
+
+class DecodeCache:
+    """In-memory LRU cache of decoded images.
+
+    Cached arrays are marked read-only, since the same array is returned to every caller that
+    hits the entry.
+    """
+
+    def __init__(self, max_bytes: int = 256 << 20) -> None:
+        """Create an empty cache.
+
+        Args:
+            max_bytes (int): Size budget for all cached pixel data, in bytes.
+        """
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[Hashable, np.ndarray[Any, np.dtype[np.uint8]]] = OrderedDict()
+        self._size_bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    @staticmethod
+    def data_key(data: Any) -> bytes:  # noqa: ANN401
+        """Return a digest identifying some encoded WebP data."""
+        return hashlib.blake2b(data, digest_size=20).digest()
+
+    def get(self, key: Hashable) -> "Optional[np.ndarray[Any, np.dtype[np.uint8]]]":
+        """Return the cached array for `key`, or None if it is not cached."""
+        with self._lock:
+            arr = self._entries.get(key)
+            if arr is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return arr
+
+    def put(self, key: Hashable, arr: "np.ndarray[Any, np.dtype[np.uint8]]") -> "np.ndarray[Any, np.dtype[np.uint8]]":
+        """Store an array under `key` and return it.
+
+        Stored arrays are made read-only. An array larger than the whole budget is not stored, and
+        is returned unchanged.
+        """
+        if arr.nbytes > self.max_bytes:
+            return arr
+        arr.flags.writeable = False
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size_bytes -= old.nbytes
+            self._entries[key] = arr
+            self._size_bytes += arr.nbytes
+            while self._size_bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size_bytes -= evicted.nbytes
+                self._evictions += 1
+        return arr
+
+    def clear(self) -> None:
+        """Remove every entry."""
+        with self._lock:
+            self._entries.clear()
+            self._size_bytes = 0
+
+    def stats(self) -> CacheStats:
+        """Return a snapshot of the cache counters."""
+        with self._lock:
+            return CacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                entries=len(self._entries),
+                size_bytes=self._size_bytes,
+            )
+
+
+_decode_cache: Optional[DecodeCache] = None
+
+
+def set_decode_cache(cache: Optional[DecodeCache]) -> None:
+    """Install a process-wide decode cache, or remove it by passing None.
+
+    While a cache is installed, `imread`, `load_image`, and `WebPData.decode` (when no `out` array
+    is given) return read-only arrays that may be shared with other callers.
+    """
+    global _decode_cache  # noqa: PLW0603
+    _decode_cache = cache
+
+
+def get_decode_cache() -> Optional[DecodeCache]:
+    """Return the process-wide decode cache, if one is installed."""
+    return _decode_cache
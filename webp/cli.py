@@ -0,0 +1,479 @@
+"""Command-line tool for converting images to WebP in bulk and inspecting WebP files.
+
+Run `python -m webp --help` for usage. The `convert` subcommand walks the given files and
+directories, encodes every image on a pool of worker processes, and prints a summary at the end.
+It can be interrupted and restarted:
+
+* Outputs are written to a temporary file and renamed into place, so a partial file is never
+  mistaken for a finished one.
+* An output which is newer than its source is skipped, unless `--force` is given.
+* With `--journal`, every finished file is appended to a JSON lines file. Sources which the
+  journal records as converted are skipped without touching the file system again, which makes
+  resuming a run over millions of files cheap.
+
+Encoder settings can be chosen per file with rules of the form `SELECTOR:KEY=VALUE,...`, where
+the selector is a glob matched against the source path relative to the directory being walked,
+`mode=<Pillow mode>`, or `colors<=<N>` for palette images and images with at most N distinct
+colours. Keys are `WebPConfig.new` arguments or `WebPConfig` field names. Later rules take
+precedence. By default, images with at most 256 colours are encoded losslessly (see
+`webp.recommend_config`).
+
+```console
+$ python -m webp convert photos/ -o webp/ -q 80 --rule '*.png:lossless=1' --journal run.jsonl
+$ python -m webp info webp/cat.webp
+$ python -m webp bench photos/cat.jpg -q 80 --repeat 20
+$ python -m webp build-info
+```
+"""
+
+import argparse
+import fnmatch
+import json
+import multiprocessing
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Sequence, Set, TextIO, Tuple
+
+import numpy as np
+from PIL import Image, ImageOps, ImageSequence
+
+from webp._anim import WebPAnimEncoder, WebPAnimEncoderOptions, WebPDemuxer
+from webp._core import (
+    FrozenWebPConfig,
+    WebPColorMode,
+    WebPContainer,
+    WebPData,
+    WebPDecoderConfig,
+    WebPPicture,
+    _config_from_settings,
+    _count_colors,
+    _pil_has_transparency_data,
+    build_info,
+)
+
+DEFAULT_EXTENSIONS = (".png", ".jpg", ".jpeg", ".gif", ".bmp", ".tif", ".tiff")
+
+# Bitstream formats reported by WebPGetFeatures.
+_FORMAT_NAMES = {0: "mixed", 1: "lossy", 2: "lossless"}
+# Number of tasks queued per worker, which bounds memory use while walking huge directories.
+_TASKS_PER_WORKER = 4
+
+
+class Rule(NamedTuple):
+    """Encoder settings which apply to the source files matching a selector."""
+
+    selector: str
+    settings: Dict[str, Any]
+
+    def matches(self, rel_path: str, img: Image.Image) -> bool:
+        """Return whether the rule applies to a source file."""
+        if self.selector.startswith("mode="):
+            return img.mode == self.selector[len("mode=") :]
+        if self.selector.startswith("colors<="):
+            max_colors = int(self.selector[len("colors<=") :])
+            return img.mode == "P" or _count_colors(np.asarray(img), max_colors) <= max_colors
+        return fnmatch.fnmatch(rel_path, self.selector) or fnmatch.fnmatch(Path(rel_path).name, self.selector)
+
+    @staticmethod
+    def parse(text: str) -> "Rule":
+        """Parse a rule of the form `SELECTOR:KEY=VALUE,...`."""
+        selector, sep, assignments = text.rpartition(":")
+        if not sep or not selector:
+            msg = f"invalid rule {text!r}, expected SELECTOR:KEY=VALUE,..."
+            raise argparse.ArgumentTypeError(msg)
+        settings = {}
+        for assignment in assignments.split(","):
+            key, sep, value = assignment.partition("=")
+            if not sep:
+                msg = f"invalid setting {assignment!r} in rule {text!r}"
+                raise argparse.ArgumentTypeError(msg)
+            settings[key.strip()] = _parse_value(value.strip())
+        return Rule(selector, settings)
+
+
+# Low-colour images (icons, charts, screenshots) are smaller and faster to encode losslessly.
+DEFAULT_RULES = (Rule("colors<=256", {"lossless": True}),)
+
+
+class ConvertTask(NamedTuple):
+    """A source file to convert, and how to convert it."""
+
+    src: str
+    dst: str
+    rel_path: str
+    settings: Dict[str, Any]
+    rules: Tuple[Rule, ...]
+
+
+class ConvertResult(NamedTuple):
+    """The outcome of converting (or skipping) one source file."""
+
+    src: str
+    dst: str
+    status: str  # "converted", "skipped", or "failed"
+    bytes_in: int = 0
+    bytes_out: int = 0
+    pixels: int = 0
+    seconds: float = 0.0
+    error: Optional[str] = None
+
+
+def _parse_value(value: str) -> Any:  # noqa: ANN401
+    try:
+        return json.loads(value)
+    except json.JSONDecodeError:
+        return value
+
+
+def walk_sources(paths: Sequence[Path], extensions: Sequence[str]) -> Iterator[Tuple[Path, Path]]:
+    """Yield (source file, path relative to its root) pairs, without listing everything up front."""
+    for path in paths:
+        if not path.is_dir():
+            yield path, Path(path.name)
+            continue
+        for dir_path, dir_names, file_names in os.walk(path):
+            dir_names.sort()
+            for file_name in sorted(file_names):
+                if file_name.lower().endswith(tuple(extensions)):
+                    src = Path(dir_path, file_name)
+                    yield src, src.relative_to(path)
+
+
+def _is_up_to_date(src: Path, dst: Path) -> bool:
+    try:
+        return dst.stat().st_mtime_ns >= src.stat().st_mtime_ns
+    except FileNotFoundError:
+        return False
+
+
+def _encode_image(img: Image.Image, config: FrozenWebPConfig) -> Tuple[WebPData, int]:
+    """Encode a Pillow image, and return the WebP data and the number of pixels encoded."""
+    frames = [frame.copy() for frame in ImageSequence.Iterator(img)]
+    pics = [WebPPicture.from_pil(_convert_mode(frame)) for frame in frames]
+    pixels = sum(pic.ptr.width * pic.ptr.height for pic in pics)
+    if len(pics) == 1:
+        return pics[0].encode(config), pixels
+
+    enc_opts = WebPAnimEncoderOptions.new()
+    enc_opts.loop_count = img.info.get("loop", 0)
+    enc = WebPAnimEncoder.new(img.size[0], img.size[1], enc_opts)
+    timestamp_ms = 0
+    for frame, pic in zip(frames, pics):
+        enc.encode_frame(pic, timestamp_ms, config)
+        timestamp_ms += int(frame.info.get("duration", 100))
+    return enc.assemble(timestamp_ms), pixels
+
+
+def _convert_mode(img: Image.Image) -> Image.Image:
+    if img.mode in ("RGB", "RGBA", "P"):
+        return img
+    return img.convert("RGBA" if _pil_has_transparency_data(img) else "RGB")
+
+
+def convert_file(task: ConvertTask) -> ConvertResult:
+    """Convert one source file to WebP. This runs in a worker process."""
+    start = time.perf_counter()
+    src, dst = Path(task.src), Path(task.dst)
+    tmp = dst.with_name(f".{dst.name}.{os.getpid()}.tmp")
+    try:
+        with Image.open(src) as img:
+            settings = dict(task.settings)
+            for rule in task.rules:
+                if rule.matches(task.rel_path, img):
+                    settings.update(rule.settings)
+            config = _config_from_settings(settings)
+            icc_profile = img.info.get("icc_profile")
+            # Still images are rotated upright, since EXIF metadata is not carried over.
+            oriented = ImageOps.exif_transpose(img) if getattr(img, "n_frames", 1) == 1 else img
+            webp_data, pixels = _encode_image(oriented, config)
+        if icc_profile:
+            container = WebPContainer.new(webp_data)
+            container.icc_profile = icc_profile
+            webp_data = container.assemble()
+        dst.parent.mkdir(parents=True, exist_ok=True)
+        tmp.write_bytes(webp_data.buffer())
+        tmp.replace(dst)
+    except Exception as e:  # noqa: BLE001
+        tmp.unlink(missing_ok=True)
+        return ConvertResult(task.src, task.dst, "failed", seconds=time.perf_counter() - start, error=str(e))
+    return ConvertResult(
+        task.src,
+        task.dst,
+        "converted",
+        bytes_in=src.stat().st_size,
+        bytes_out=webp_data.size,
+        pixels=pixels,
+        seconds=time.perf_counter() - start,
+    )
+
+
+def _read_journal(journal_path: Path) -> Set[str]:
+    """Return the sources which a previous run recorded as converted."""
+    done = set()
+    if journal_path.exists():
+        with journal_path.open() as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # A line cut short when the previous run was killed
+                if record.get("status") in ("converted", "skipped"):
+                    done.add(record["src"])
+    return done
+
+
+def _open_journal(journal_path: Path) -> TextIO:
+    journal = journal_path.open("a")
+    # Start on a new line if the previous run was killed while writing a record.
+    if journal.tell() > 0:
+        with journal_path.open("rb") as f:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                journal.write("\n")
+    return journal
+
+
+def _convert_all(tasks: Iterator[ConvertTask], jobs: int) -> Iterator[ConvertResult]:
+    """Convert files on `jobs` worker processes, yielding results in completion order."""
+    if jobs == 1:
+        yield from map(convert_file, tasks)
+        return
+    pending: Set[Future] = set()
+    # Forking a process which may have started threads (e.g. libwebp's) can deadlock the workers.
+    with ProcessPoolExecutor(max_workers=jobs, mp_context=multiprocessing.get_context("spawn")) as executor:
+        for task in tasks:
+            pending.add(executor.submit(convert_file, task))
+            # Only queue a few tasks per worker, so that the walk streams rather than running ahead.
+            if len(pending) >= jobs * _TASKS_PER_WORKER:
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    yield future.result()
+        for future in pending:
+            yield future.result()
+
+
+class Summary:
+    """Running totals for a conversion run."""
+
+    def __init__(self) -> None:
+        """Initialize the totals."""
+        self.counts = {"converted": 0, "skipped": 0, "failed": 0}
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.pixels = 0
+        self.start = time.perf_counter()
+
+    def add(self, result: ConvertResult) -> None:
+        """Add the outcome of one file."""
+        self.counts[result.status] += 1
+        self.bytes_in += result.bytes_in
+        self.bytes_out += result.bytes_out
+        self.pixels += result.pixels
+
+    def report(self, out: TextIO) -> None:
+        """Print the totals, with throughput and size reduction."""
+        elapsed = time.perf_counter() - self.start
+        converted = self.counts["converted"]
+        print(", ".join(f"{count} {status}" for status, count in self.counts.items()), file=out)
+        if converted:
+            ratio = self.bytes_out / self.bytes_in if self.bytes_in else 0.0
+            print(
+                f"{self.bytes_in / 1e6:.1f} MB -> {self.bytes_out / 1e6:.1f} MB ({ratio:.1%} of input), "
+                f"{self.bytes_out * 8 / self.pixels:.3f} bits/pixel",
+                file=out,
+            )
+        rate = max(elapsed, 1e-9)
+        print(
+            f"{elapsed:.1f} s, {converted / rate:.1f} files/s, {self.pixels / 1e6 / rate:.1f} MP/s, "
+            f"{self.bytes_in / 1e6 / rate:.1f} MB/s in",
+            file=out,
+        )
+
+
+def _base_settings(args: argparse.Namespace) -> Dict[str, Any]:
+    settings: Dict[str, Any] = {"preset": args.preset, "lossless": args.lossless}
+    for key in ("quality", "method", "lossless_preset"):
+        if getattr(args, key) is not None:
+            settings[key] = getattr(args, key)
+    return settings
+
+
+def _plan_tasks(
+    args: argparse.Namespace,
+    settings_and_rules: Tuple[Dict[str, Any], Tuple[Rule, ...]],
+    done: Set[str],
+    record: Callable[[ConvertResult], None],
+) -> Iterator[ConvertTask]:
+    """Yield the source files which need converting, and record the ones which are up to date."""
+    settings, rules = settings_and_rules
+    for src, rel_path in walk_sources(args.sources, args.extensions):
+        dst = (args.output_dir / rel_path if args.output_dir is not None else src).with_suffix(".webp")
+        if str(src) in done or (not args.force and _is_up_to_date(src, dst)):
+            record(ConvertResult(str(src), str(dst), "skipped"))
+            continue
+        yield ConvertTask(str(src), str(dst), rel_path.as_posix(), settings, rules)
+
+
+def cmd_convert(args: argparse.Namespace) -> int:
+    """Convert images to WebP."""
+    rules = (*(() if args.no_default_rules else DEFAULT_RULES), *args.rule)
+    settings = _base_settings(args)
+    done = _read_journal(args.journal) if args.journal is not None else set()
+    journal = _open_journal(args.journal) if args.journal is not None else None
+    summary = Summary()
+
+    def record(result: ConvertResult) -> None:
+        summary.add(result)
+        if result.status == "failed":
+            print(f"{result.src}: {result.error}", file=sys.stderr)
+        elif args.verbose:
+            print(f"{result.src} -> {result.dst} ({result.status})")
+        # Sources resumed from the journal are counted, but already have a record there.
+        if journal is not None and result.src not in done:
+            journal.write(json.dumps(result._asdict()) + "\n")
+            journal.flush()
+
+    try:
+        tasks = _plan_tasks(args, (settings, rules), done, record)
+        for result in _convert_all(tasks, args.jobs or os.cpu_count() or 1):
+            record(result)
+    finally:
+        if journal is not None:
+            journal.close()
+
+    summary.report(sys.stdout)
+    return 1 if summary.counts["failed"] else 0
+
+
+def cmd_info(args: argparse.Namespace) -> int:
+    """Print information about WebP files."""
+    infos = []
+    for path in args.files:
+        webp_data = WebPData.from_buffer(path.read_bytes())
+        dec_config = WebPDecoderConfig.new()
+        dec_config.read_features(webp_data)
+        demux = WebPDemuxer.new(webp_data)
+        container = WebPContainer.new(webp_data)
+        width, height = demux.canvas_width, demux.canvas_height
+        infos.append(
+            {
+                "file": str(path),
+                "width": width,
+                "height": height,
+                "format": _FORMAT_NAMES.get(dec_config.input.format, "unknown"),
+                "has_alpha": bool(dec_config.input.has_alpha),
+                "frames": demux.frame_count,
+                "loop_count": demux.loop_count,
+                "metadata": [name for name in ("icc_profile", "exif", "xmp") if getattr(container, name) is not None],
+                "bytes": webp_data.size,
+                "bits_per_pixel": webp_data.size * 8 / (width * height * demux.frame_count),
+            }
+        )
+    if args.json:
+        print(json.dumps(infos, indent=2))
+    else:
+        for info in infos:
+            details = ", ".join(f"{key}={value}" for key, value in info.items() if key != "file")
+            print(f"{info['file']}: {details}")
+    return 0
+
+
+def cmd_bench(args: argparse.Namespace) -> int:
+    """Measure encoding and decoding speed for images with the given settings."""
+    config = _config_from_settings(_base_settings(args))
+    for path in args.images:
+        with Image.open(path) as img:
+            img_rgb = _convert_mode(img)
+            img_rgb.load()
+        encode_times: List[float] = []
+        for _ in range(args.repeat):
+            # Lossy encoding converts the picture in place, so import a fresh one every time.
+            pic = WebPPicture.from_pil(img_rgb)
+            start = time.perf_counter()
+            webp_data = pic.encode(config)
+            encode_times.append(time.perf_counter() - start)
+        color_mode = WebPColorMode.RGBA if img_rgb.mode == "RGBA" else WebPColorMode.RGB
+        decode_times: List[float] = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            webp_data.decode(color_mode)
+            decode_times.append(time.perf_counter() - start)
+        megapixels = img_rgb.size[0] * img_rgb.size[1] / 1e6
+        encode_s, decode_s = statistics.median(encode_times), statistics.median(decode_times)
+        print(
+            f"{path}: {img_rgb.size[0]}x{img_rgb.size[1]}, {webp_data.size} bytes "
+            f"({webp_data.size * 8 / (megapixels * 1e6):.3f} bits/pixel), "
+            f"encode {encode_s * 1e3:.1f} ms ({megapixels / encode_s:.1f} MP/s), "
+            f"decode {decode_s * 1e3:.1f} ms ({megapixels / decode_s:.1f} MP/s)"
+        )
+    return 0
+
+
+def cmd_build_info(args: argparse.Namespace) -> int:  # noqa: ARG001
+    """Print how the extension was built, and the CPU features which libwebp uses."""
+    for key, value in build_info()._asdict().items():
+        print(f"{key}: {' '.join(value) if isinstance(value, tuple) else value}")
+    return 0
+
+
+def _add_encoder_args(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("-q", "--quality", type=float, help="quality factor, 0 to 100")
+    parser.add_argument("-m", "--method", type=int, help="compression method, 0 (fast) to 6 (small)")
+    parser.add_argument("--preset", default="default", help="encoder preset name (default: %(default)s)")
+    parser.add_argument("--lossless", action="store_true", help="encode losslessly")
+    parser.add_argument("--lossless-preset", type=int, help="lossless preset level, 0 to 9")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Return the argument parser for the command-line tool."""
+    parser = argparse.ArgumentParser(prog="python -m webp", description=__doc__.split("\n\n")[0])
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    convert = subparsers.add_parser("convert", help="convert images to WebP")
+    convert.add_argument("sources", type=Path, nargs="+", help="image files or directories")
+    convert.add_argument("-o", "--output-dir", type=Path, help="output directory (default: next to the sources)")
+    convert.add_argument("-j", "--jobs", type=int, help="number of worker processes (default: number of CPUs)")
+    convert.add_argument("--journal", type=Path, help="append progress to this file, and resume from it")
+    convert.add_argument("--force", action="store_true", help="convert even if the output is up to date")
+    convert.add_argument(
+        "--rule",
+        type=Rule.parse,
+        action="append",
+        default=[],
+        help="per-file settings, as SELECTOR:KEY=VALUE,... (may be repeated)",
+    )
+    convert.add_argument("--no-default-rules", action="store_true", help="do not encode low-colour images losslessly")
+    convert.add_argument(
+        "--extensions",
+        nargs="+",
+        default=DEFAULT_EXTENSIONS,
+        help="file extensions to convert when walking directories",
+    )
+    convert.add_argument("-v", "--verbose", action="store_true", help="print every file")
+    _add_encoder_args(convert)
+    convert.set_defaults(func=cmd_convert)
+
+    info = subparsers.add_parser("info", help="print information about WebP files")
+    info.add_argument("files", type=Path, nargs="+", help="WebP files")
+    info.add_argument("--json", action="store_true", help="print JSON")
+    info.set_defaults(func=cmd_info)
+
+    bench = subparsers.add_parser("bench", help="measure encoding and decoding speed")
+    bench.add_argument("images", type=Path, nargs="+", help="image files")
+    bench.add_argument("--repeat", type=int, default=10, help="number of timed runs (default: %(default)s)")
+    _add_encoder_args(bench)
+    bench.set_defaults(func=cmd_bench)
+
+    build = subparsers.add_parser("build-info", help="print libwebp versions, build flags, and CPU features")
+    build.set_defaults(func=cmd_build_info)
+    return parser
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Run the command-line tool."""
+    args = build_parser().parse_args(argv)
+    return args.func(args)
@@ -0,0 +1,175 @@
+"""Instrumentation of native memory held by the WebP wrapper objects.
+
+Memory allocated by libwebp (picture buffers, encoded output, animation canvases) is invisible to
+`tracemalloc`. The wrapper classes report every object they create and the native bytes that it
+owns to this module, so that `memory_stats` can account for it.
+
+Tracking is off by default, since it takes a process-wide lock whenever a wrapper object is
+created or destroyed. Call `enable_tracking` (or `set_debug`) to turn it on.
+"""
+
+import gc
+import threading
+import traceback
+from collections import Counter
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+
+class MemoryStats(NamedTuple):
+    """Snapshot of live wrapper objects and the native memory that they own."""
+
+    live_objects: Dict[str, int]
+    native_bytes: Dict[str, int]
+    total_native_bytes: int
+    peak_native_bytes: int
+
+
+class LateFree(NamedTuple):
+    """Record of a wrapper object that was only released by the cyclic garbage collector."""
+
+    class_name: str
+    native_bytes: int
+    created_at: Optional[str]
+
+
+# A reentrant lock is needed because a garbage collection triggered while the lock is held can run
+# `__del__` methods, and hence `untrack`, on the same thread.
+_lock = threading.RLock()
+_live_objects: "Counter[str]" = Counter()
+_native_bytes: "Counter[str]" = Counter()
+_objects: Dict[int, Tuple[str, int]] = {}
+_total_bytes = 0
+_peak_bytes = 0
+
+_enabled = False
+_debug = False
+_collecting = False
+_origins: Dict[int, str] = {}
+_late_frees: List[LateFree] = []
+
+
+def track(obj: Any, nbytes: int = 0) -> None:  # noqa: ANN401
+    """Start tracking a wrapper object which owns `nbytes` of native memory."""
+    global _total_bytes, _peak_bytes  # noqa: PLW0603
+    if not _enabled:
+        return
+    name = type(obj).__name__
+    with _lock:
+        _objects[id(obj)] = (name, nbytes)
+        _live_objects[name] += 1
+        _native_bytes[name] += nbytes
+        _total_bytes += nbytes
+        _peak_bytes = max(_peak_bytes, _total_bytes)
+        if _debug:
+            _origins[id(obj)] = "".join(traceback.format_stack(limit=8)[:-2])
+
+
+def resize(obj: Any, nbytes: int) -> None:  # noqa: ANN401
+    """Update the amount of native memory owned by a tracked object."""
+    global _total_bytes, _peak_bytes  # noqa: PLW0603
+    # A tracked object stays in `_objects` until it is untracked, so an empty dict means that
+    # `obj` is not tracked and the lock can be skipped.
+    if not _objects:
+        return
+    with _lock:
+        entry = _objects.get(id(obj))
+        if entry is None:
+            return
+        name, old_nbytes = entry
+        _objects[id(obj)] = (name, nbytes)
+        _native_bytes[name] += nbytes - old_nbytes
+        _total_bytes += nbytes - old_nbytes
+        _peak_bytes = max(_peak_bytes, _total_bytes)
+
+
+def untrack(obj: Any) -> None:  # noqa: ANN401
+    """Stop tracking an object, which is about to release its native memory."""
+    global _total_bytes  # noqa: PLW0603
+    if not _objects:
+        return
+    with _lock:
+        entry = _objects.pop(id(obj), None)
+        if entry is None:
+            return
+        name, nbytes = entry
+        _live_objects[name] -= 1
+        _native_bytes[name] -= nbytes
+        _total_bytes -= nbytes
+        origin = _origins.pop(id(obj), None)
+        if _debug and _collecting:
+            _late_frees.append(LateFree(name, nbytes, origin))
+
+
+def memory_stats() -> MemoryStats:
+    """Return the number of live wrapper objects and their native memory, by class name.
+
+    Native memory includes picture buffers, encoded data returned by libwebp, decoded buffers,
+    and the canvases kept by animation encoders and decoders. Encoded frames that an animation
+    encoder holds until `assemble` is called are not included. Only objects created while
+    tracking is enabled are counted.
+    """
+    with _lock:
+        return MemoryStats(
+            live_objects={name: count for name, count in _live_objects.items() if count},
+            native_bytes={name: nbytes for name, nbytes in _native_bytes.items() if _live_objects[name]},
+            total_native_bytes=_total_bytes,
+            peak_native_bytes=_peak_bytes,
+        )
+
+
+def reset_peak() -> None:
+    """Reset the peak native memory to the current amount."""
+    global _peak_bytes  # noqa: PLW0603
+    with _lock:
+        _peak_bytes = _total_bytes
+
+
+def _gc_callback(phase: str, _info: Dict[str, Any]) -> None:
+    global _collecting  # noqa: PLW0603
+    _collecting = phase == "start"
+
+
+def enable_tracking(*, enabled: bool = True) -> None:
+    """Enable or disable tracking of wrapper objects and their native memory.
+
+    Objects created while tracking is disabled are never counted, even if tracking is enabled
+    later. Disabling tracking does not forget the objects that are already tracked.
+    """
+    global _enabled  # noqa: PLW0603
+    _enabled = enabled
+
+
+def is_tracking() -> bool:
+    """Return whether wrapper objects are currently being tracked."""
+    return _enabled
+
+
+def set_debug(*, enabled: bool = True) -> None:
+    """Enable or disable debug mode.
+
+    In debug mode, the call stack that created each wrapper object is recorded, and objects that
+    are only released by the cyclic garbage collector (rather than as soon as their last reference
+    goes away) are reported by `late_frees`. Such objects are usually part of a reference cycle,
+    and hold on to their native memory for longer than expected. Enabling debug mode also enables
+    tracking.
+    """
+    global _debug  # noqa: PLW0603
+    if enabled:
+        enable_tracking()
+    with _lock:
+        _debug = enabled
+        if not enabled:
+            _origins.clear()
+    if enabled and _gc_callback not in gc.callbacks:
+        gc.callbacks.append(_gc_callback)
+    elif not enabled and _gc_callback in gc.callbacks:
+        gc.callbacks.remove(_gc_callback)
+
+
+def late_frees(*, clear: bool = False) -> List[LateFree]:
+    """Return the objects that were released late since debug mode was enabled."""
+    with _lock:
+        records = list(_late_frees)
+        if clear:
+            _late_frees.clear()
+        return records
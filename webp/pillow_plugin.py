@@ -0,0 +1,250 @@
+"""Pillow plugin which reads and writes WebP files using these bindings.
+
+After calling `register`, `PIL.Image.open` and `Image.save(..., "WEBP")` go through `WebPData.decode`
+and `WebPPicture.encode` instead of Pillow's own WebP support, so they benefit from the decode
+cache, tracing, decode limits, and every encoder setting.
+
+```python
+import webp.pillow_plugin
+
+webp.pillow_plugin.register()
+img = Image.open("image.webp")
+img.draft("RGB", (256, 256))  # Decode at a reduced size
+img.save("out.webp", quality=90, method=6, use_sharp_yuv=1)
+```
+"""
+
+import math
+from typing import IO, Any, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import PIL
+from PIL import Image, ImageFile
+
+from webp._anim import WebPAnimDecoder, WebPAnimDecoderOptions, WebPAnimEncoder, WebPAnimEncoderOptions, WebPDemuxer
+from webp._core import (
+    FrozenWebPConfig,
+    WebPColorMode,
+    WebPContainer,
+    WebPData,
+    WebPDecoderConfig,
+    WebPError,
+    WebPPicture,
+    _config_from_settings,
+    _pil_has_transparency_data,
+)
+
+FORMAT = "WEBP"
+
+# The plugin sets the image mode and size through attributes that Pillow only provides from 10.1.
+_MIN_PILLOW_VERSION = (10, 1)
+
+# Pillow's defaults for its own WebP plugin, which differ from libwebp's.
+_PILLOW_DEFAULTS = {"quality": 80}
+
+
+def _accept(prefix: bytes) -> bool:
+    return prefix[:4] == b"RIFF" and prefix[8:12] == b"WEBP"
+
+
+class WebPImageFile(ImageFile.ImageFile):
+    """Pillow image file backed by WebP data decoded with libwebp."""
+
+    format = FORMAT
+    format_description = "WebP image"
+
+    def _open(self) -> None:
+        if self.fp is None:
+            msg = "no file to read from"
+            raise SyntaxError(msg)
+        self._webp_data = WebPData.from_buffer(self.fp.read())
+        dec_config = WebPDecoderConfig.new()
+        dec_config.read_features(self._webp_data)
+        demux = WebPDemuxer.new(self._webp_data)
+
+        self._size = (demux.canvas_width, demux.canvas_height)
+        self._mode = "RGBA" if dec_config.input.has_alpha else "RGB"
+        self.n_frames = demux.frame_count
+        self.is_animated = self.n_frames > 1
+        self.info["loop"] = demux.loop_count
+        bgcolor = demux.bgcolor
+        self.info["background"] = ((bgcolor >> 16) & 0xFF, (bgcolor >> 8) & 0xFF, bgcolor & 0xFF, bgcolor >> 24)
+        container = WebPContainer.new(self._webp_data)
+        for key, value in (("icc_profile", container.icc_profile), ("exif", container.exif), ("xmp", container.xmp)):
+            if value is not None:
+                self.info[key] = value
+
+        self._frame = 0
+        self._loaded_frame = -1
+        self._scale: Optional[Tuple[int, int]] = None
+        self._anim_decoder: Optional[WebPAnimDecoder] = None
+        self._anim_frame = 0
+        self._anim_timestamp = 0
+
+    def draft(
+        self, mode: Optional[str], size: Optional[Tuple[int, int]]
+    ) -> Optional[Tuple[str, Tuple[int, int, int, int]]]:
+        """Configure the image to be decoded in a different mode, or at a reduced size.
+
+        The decoder scales the image while decoding, which is much faster than decoding at full size
+        and resizing afterwards. The size is no smaller than `size`. Only still images that have not
+        been loaded yet can be changed, and only between the RGB and RGBA modes.
+        """
+        if self.is_animated or self._loaded_frame >= 0:
+            return None
+        if mode in ("RGB", "RGBA"):
+            self._mode = mode
+        width, height = self.size
+        scale = 1.0 if size is None else max(size[0] / width, size[1] / height)
+        if scale < 1:
+            self._scale = (max(1, math.ceil(width * scale)), max(1, math.ceil(height * scale)))
+            self._size = self._scale
+        return self.mode, (0, 0, *self.size)
+
+    def seek(self, frame: int) -> None:
+        """Select the frame to load."""
+        if not self._seek_check(frame):
+            return
+        self._frame = frame
+
+    def tell(self) -> int:
+        """Return the index of the current frame."""
+        return self._frame
+
+    def _decode_anim_frame(self) -> "np.ndarray[Any, np.dtype[np.uint8]]":
+        # Frames are composited onto a canvas, so they must be decoded in order.
+        if self._anim_decoder is None:
+            dec_opts = WebPAnimDecoderOptions.new(color_mode=WebPColorMode.RGBA)
+            self._anim_decoder = WebPAnimDecoder.new(self._webp_data, dec_opts)
+        if self._frame < self._anim_frame:
+            self._anim_decoder.reset()
+            self._anim_frame = 0
+            self._anim_timestamp = 0
+        while True:
+            arr, timestamp_ms = self._anim_decoder.decode_frame()
+            self.info["timestamp"] = self._anim_timestamp
+            self.info["duration"] = timestamp_ms - self._anim_timestamp
+            self._anim_timestamp = timestamp_ms
+            self._anim_frame += 1
+            if self._anim_frame > self._frame:
+                return arr if self.mode == "RGBA" else arr[..., :3]
+
+    def load(self) -> Any:  # noqa: ANN401
+        """Decode the current frame, if it has not been decoded yet."""
+        if self._loaded_frame != self._frame:
+            if self.is_animated:
+                arr = self._decode_anim_frame()
+            else:
+                color_mode = WebPColorMode.RGBA if self.mode == "RGBA" else WebPColorMode.RGB
+                arr = self._webp_data.decode(color_mode, scale=self._scale)
+            self.im = Image.core.new(self.mode, self.size)
+            self.frombytes(np.ascontiguousarray(arr))
+            self._loaded_frame = self._frame
+        return Image.Image.load(self)
+
+    def load_seek(self, pos: int) -> None:
+        """Do nothing, since the whole file is read when it is opened."""
+
+
+def _encoder_config(encoderinfo: Dict[str, Any]) -> FrozenWebPConfig:
+    """Build an encoder configuration from the keyword arguments given to `Image.save`."""
+    return _config_from_settings({**_PILLOW_DEFAULTS, **encoderinfo})
+
+
+def _convert_frame(im: Image.Image) -> Image.Image:
+    if im.mode in ("RGB", "RGBA", "P"):
+        return im
+    return im.convert("RGBA" if _pil_has_transparency_data(im) else "RGB")
+
+
+def _add_metadata(webp_data: WebPData, encoderinfo: Dict[str, Any]) -> Union[bytes, memoryview]:
+    icc_profile = encoderinfo.get("icc_profile")
+    exif = encoderinfo.get("exif")
+    xmp = encoderinfo.get("xmp")
+    if not (icc_profile or exif or xmp):
+        return webp_data.buffer()
+    container = WebPContainer.new(webp_data)
+    if icc_profile:
+        container.icc_profile = icc_profile
+    if exif:
+        if isinstance(exif, Image.Exif):
+            exif = exif.tobytes()
+        container.exif = exif[6:] if exif.startswith(b"Exif\x00\x00") else exif
+    if xmp:
+        container.xmp = xmp.encode() if isinstance(xmp, str) else xmp
+    return container.assemble().buffer()
+
+
+def _save(im: Image.Image, fp: IO[bytes], filename: Union[str, bytes]) -> None:  # noqa: ARG001
+    config = _encoder_config(im.encoderinfo)
+    pic = WebPPicture.from_pil(_convert_frame(im))
+    if im.encoderinfo.get("optimize_alpha"):
+        pic.optimize_alpha()
+    webp_data = pic.encode(config)
+    fp.write(_add_metadata(webp_data, im.encoderinfo))
+
+
+def _save_all(im: Image.Image, fp: IO[bytes], filename: Union[str, bytes]) -> None:
+    encoderinfo = im.encoderinfo
+    images: List[Image.Image] = [im, *encoderinfo.get("append_images", [])]
+    if sum(getattr(image, "n_frames", 1) for image in images) == 1:
+        _save(im, fp, filename)
+        return
+
+    lossless = encoderinfo.get("lossless", False)
+    enc_opts = WebPAnimEncoderOptions.new(
+        minimize_size=encoderinfo.get("minimize_size", False),
+        allow_mixed=encoderinfo.get("allow_mixed", False),
+        # The same defaults as Pillow, which come from gif2webp.
+        kmin=encoderinfo.get("kmin", 9 if lossless else 3),
+        kmax=encoderinfo.get("kmax", 17 if lossless else 5),
+    )
+    enc_opts.loop_count = encoderinfo.get("loop", 0)
+    background = encoderinfo.get("background", im.info.get("background", (0, 0, 0, 0)))
+    if isinstance(background, (tuple, list)) and len(background) == 4:  # noqa: PLR2004
+        r, g, b, a = background
+        enc_opts.ptr.anim_params.bgcolor = (a << 24) | (r << 16) | (g << 8) | b
+    config = _encoder_config(encoderinfo)
+    duration = encoderinfo.get("duration", im.info.get("duration", 0))
+
+    enc = WebPAnimEncoder.new(im.size[0], im.size[1], enc_opts)
+    timestamp = 0.0
+    frame_idx = 0
+    current_frame = im.tell()
+    try:
+        for image in images:
+            for idx in range(getattr(image, "n_frames", 1)):
+                image.seek(idx)
+                pic = WebPPicture.from_pil(_convert_frame(image))
+                if encoderinfo.get("optimize_alpha"):
+                    pic.optimize_alpha()
+                enc.encode_frame(pic, round(timestamp), config)
+                timestamp += duration[frame_idx] if isinstance(duration, (list, tuple)) else duration
+                frame_idx += 1
+    finally:
+        im.seek(current_frame)
+    webp_data = enc.assemble(round(timestamp))
+    fp.write(_add_metadata(webp_data, encoderinfo))
+
+
+def _pillow_version() -> Tuple[int, ...]:
+    version = getattr(PIL, "__version__", None) or getattr(PIL, "PILLOW_VERSION", "0")
+    return tuple(int(part) for part in version.split(".")[:2] if part.isdigit())
+
+
+def register() -> None:
+    """Make Pillow use these bindings to open and save WebP images.
+
+    This replaces Pillow's own WebP plugin for the rest of the process. Requires Pillow 10.1 or
+    later, unlike the rest of the bindings.
+    """
+    if _pillow_version() < _MIN_PILLOW_VERSION:
+        msg = f"the Pillow plugin requires Pillow {'.'.join(map(str, _MIN_PILLOW_VERSION))} or later"
+        raise WebPError(msg)
+    # Load Pillow's own plugins first, so that they do not replace this one later.
+    Image.init()
+    Image.register_open(FORMAT, WebPImageFile, _accept)
+    Image.register_save(FORMAT, _save)
+    Image.register_save_all(FORMAT, _save_all)
+    Image.register_extension(FORMAT, ".webp")
+    Image.register_mime(FORMAT, "image/webp")
@@ -0,0 +1,235 @@
+"""Indexed multi-image WebP shards.
+
+A shard is a single file holding many WebP bitstreams back to back, followed by an index of
+offsets, sizes, and image dimensions. Reading a shard memory-maps the file once, so random access
+to any image is a slice of the mapping rather than a separate file open.
+
+Layout (all integers little-endian)::
+
+    header:  magic (8 bytes) | version (uint32) | reserved (uint32)
+    data:    WebP bitstream 0 | WebP bitstream 1 | ...
+    index:   one (offset uint64, size uint64, width uint32, height uint32) record per image
+    footer:  index offset (uint64) | image count (uint64) | magic (8 bytes)
+"""
+
+import mmap
+import struct
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from types import TracebackType
+from typing import Any, BinaryIO, Iterator, List, Optional, Sequence, Type
+
+import numpy as np
+
+from webp import AnyWebPConfig, FilePath, WebPColorMode, WebPData, WebPDecoderConfig, WebPError, WebPPicture
+
+SHARD_MAGIC = b"WEBPSHRD"
+SHARD_VERSION = 1
+
+_HEADER = struct.Struct("<8sII")
+_FOOTER = struct.Struct("<QQ8s")
+_INDEX_DTYPE = np.dtype([("offset", "<u8"), ("size", "<u8"), ("width", "<u4"), ("height", "<u4")])
+
+
+class ShardWriter:
+    """Write WebP images into a shard file."""
+
+    def __init__(self, file_path: FilePath) -> None:
+        """Open a new shard file for writing."""
+        self._file: Optional[BinaryIO] = Path(file_path).open("wb")  # noqa: SIM115
+        self._file.write(_HEADER.pack(SHARD_MAGIC, SHARD_VERSION, 0))
+        self._offset = _HEADER.size
+        self._records: List[Any] = []
+
+    def __len__(self) -> int:
+        """Return the number of images written so far."""
+        return len(self._records)
+
+    def __enter__(self) -> "ShardWriter":  # noqa: PYI034
+        """Enter the runtime context."""
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        """Finish the shard when leaving the runtime context."""
+        self.close()
+
+    def add_data(self, webp_data: WebPData) -> int:
+        """Append an already-encoded WebP bitstream to the shard.
+
+        Args:
+            webp_data (WebPData): Encoded WebP data.
+
+        Returns:
+            int: Index of the image within the shard.
+        """
+        if self._file is None:
+            msg = "shard writer is closed"
+            raise WebPError(msg)
+        dec_config = WebPDecoderConfig.new()
+        dec_config.read_features(webp_data)
+        self._file.write(webp_data.buffer())
+        self._records.append((self._offset, webp_data.size, dec_config.input.width, dec_config.input.height))
+        self._offset += webp_data.size
+        return len(self._records) - 1
+
+    def add_picture(self, pic: WebPPicture, config: Optional[AnyWebPConfig] = None) -> int:
+        """Encode a picture and append it to the shard.
+
+        Args:
+            pic (WebPPicture): Picture to encode.
+            config (WebPConfig, optional): Encoder configuration.
+
+        Returns:
+            int: Index of the image within the shard.
+        """
+        return self.add_data(pic.encode(config))
+
+    def add(
+        self,
+        arr: "np.ndarray[Any, np.dtype[np.uint8]]",
+        pilmode: Optional[str] = None,
+        config: Optional[AnyWebPConfig] = None,
+    ) -> int:
+        """Encode a numpy array image and append it to the shard.
+
+        Args:
+            arr (np.ndarray): Image data to encode.
+            pilmode (str, optional): PIL image mode corresponding to the data in `arr`.
+            config (WebPConfig, optional): Encoder configuration.
+
+        Returns:
+            int: Index of the image within the shard.
+        """
+        return self.add_picture(WebPPicture.from_numpy(arr, pilmode=pilmode), config)
+
+    def close(self) -> None:
+        """Write the index and footer, then close the file."""
+        if self._file is None:
+            return
+        index = np.array(self._records, dtype=_INDEX_DTYPE)
+        self._file.write(index.tobytes())
+        self._file.write(_FOOTER.pack(self._offset, len(self._records), SHARD_MAGIC))
+        self._file.close()
+        self._file = None
+
+
+class ShardReader:
+    """Random access to the images stored in a shard file.
+
+    Images are served as zero-copy slices of a read-only memory map. `WebPData` objects returned
+    by the reader must be released before calling `close`.
+    """
+
+    def __init__(self, file_path: FilePath) -> None:
+        """Memory-map a shard file for reading."""
+        with Path(file_path).open("rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        try:
+            self.index = self._read_index()
+        except WebPError:
+            self._mmap.close()
+            raise
+
+    def _read_index(self) -> "np.ndarray[Any, Any]":
+        """Validate the header and footer, and return a copy of the index."""
+        file_size = len(self._mmap)
+        if file_size < _HEADER.size + _FOOTER.size:
+            msg = "file is too small to be a WebP shard"
+            raise WebPError(msg)
+        magic, version, _ = _HEADER.unpack_from(self._mmap, 0)
+        index_offset, count, footer_magic = _FOOTER.unpack_from(self._mmap, file_size - _FOOTER.size)
+        if magic != SHARD_MAGIC or footer_magic != SHARD_MAGIC:
+            msg = "not a WebP shard"
+            raise WebPError(msg)
+        if version != SHARD_VERSION:
+            msg = f"unsupported shard version: {version}"
+            raise WebPError(msg)
+        if not _HEADER.size <= index_offset <= index_offset + count * _INDEX_DTYPE.itemsize <= file_size - _FOOTER.size:
+            msg = "corrupt shard footer: index does not fit in the file"
+            raise WebPError(msg)
+
+        index = np.frombuffer(self._mmap, dtype=_INDEX_DTYPE, count=count, offset=index_offset).copy()
+        # Every bitstream must lie within the data region, between the header and the index.
+        ends = index["offset"] + index["size"]
+        if np.any(index["offset"] < _HEADER.size) or np.any(ends > index_offset) or np.any(ends < index["offset"]):
+            msg = "corrupt shard index: image data lies outside the data region"
+            raise WebPError(msg)
+        return index
+
+    def __len__(self) -> int:
+        """Return the number of images in the shard."""
+        return len(self.index)
+
+    def __getitem__(self, i: int) -> WebPData:
+        """Return the encoded data for the image at index `i` without copying."""
+        n = len(self.index)
+        if i < 0:
+            i += n
+        if not 0 <= i < n:
+            msg = "shard index out of range"
+            raise IndexError(msg)
+        offset = int(self.index["offset"][i])
+        size = int(self.index["size"][i])
+        return WebPData.from_buffer(memoryview(self._mmap)[offset : offset + size])
+
+    def __iter__(self) -> Iterator[WebPData]:
+        """Yield the encoded data for each image in order."""
+        for i in range(len(self)):
+            yield self[i]
+
+    def __enter__(self) -> "ShardReader":  # noqa: PYI034
+        """Enter the runtime context."""
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        """Close the shard when leaving the runtime context."""
+        self.close()
+
+    @property
+    def shapes(self) -> "np.ndarray[Any, np.dtype[np.uint32]]":
+        """Return an (N, 2) array of (height, width) for every image."""
+        return np.stack([self.index["height"], self.index["width"]], axis=-1)
+
+    def decode(self, i: int, color_mode: WebPColorMode = WebPColorMode.RGBA) -> "np.ndarray[Any, np.dtype[np.uint8]]":
+        """Decode the image at index `i` into a numpy array."""
+        return self[i].decode(color_mode=color_mode)
+
+    def decode_batch(
+        self,
+        indices: Optional[Sequence[int]] = None,
+        color_mode: WebPColorMode = WebPColorMode.RGBA,
+        max_workers: Optional[int] = None,
+    ) -> "List[np.ndarray[Any, np.dtype[np.uint8]]]":
+        """Decode several images in parallel.
+
+        libwebp runs without holding the GIL, so decoding scales across threads.
+
+        Args:
+            indices (list of int, optional): Images to decode. Defaults to every image in the shard.
+            color_mode (WebPColorMode): Output color mode.
+            max_workers (int, optional): Number of decoding threads. Set to 1 to decode serially.
+
+        Returns:
+            list of np.ndarray: The decoded images, in the order of `indices`.
+        """
+        if indices is None:
+            indices = range(len(self))
+        if max_workers == 1:
+            return [self.decode(i, color_mode) for i in indices]
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(lambda i: self.decode(i, color_mode), indices))
+
+    def close(self) -> None:
+        """Release the memory map."""
+        self._mmap.close()
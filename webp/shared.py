@@ -0,0 +1,166 @@
+"""Decode WebP images directly into shared memory.
+
+This is intended for multi-process data loaders. The parent process owns a `SharedMemoryPool` and
+hands block names to its workers. Each worker decodes straight into a block with
+`decode_shared` and sends back a small picklable `SharedImage` handle, which the parent turns
+into a numpy array with `SharedMemoryPool.view` without copying any pixels.
+"""
+
+import os
+import sys
+import threading
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from types import TracebackType
+from typing import Any, Dict, List, Optional, Tuple, Type, Union
+
+import numpy as np
+
+from webp import WebPColorMode, WebPData, WebPDecoderConfig, WebPError
+
+
+def _attach(name: str) -> SharedMemory:
+    """Attach to an existing shared memory block without taking ownership of it."""
+    if sys.version_info >= (3, 13):
+        return SharedMemory(name=name, track=False)
+    # Before Python 3.13, attaching registers the block with this process's resource tracker,
+    # which unlinks it (warning of a leak) when the process exits. A tracker inherited from the
+    # process that created the block is left alone, since unregistering there would also drop
+    # the creator's registration.
+    private_tracker = os.name == "posix" and resource_tracker._resource_tracker._fd is None  # noqa: SLF001
+    shm = SharedMemory(name=name)
+    if private_tracker:
+        resource_tracker.unregister(shm._name, "shared_memory")  # noqa: SLF001
+    return shm
+
+
+class SharedImage:
+    """Picklable handle to a decoded image stored in a shared memory block."""
+
+    def __init__(self, name: str, shape: Tuple[int, ...], dtype: str = "|u1") -> None:
+        """Initialize the handle."""
+        self.name = name
+        self.shape = shape
+        self.dtype = dtype
+
+    @property
+    def nbytes(self) -> int:
+        """Return the size of the image data in bytes."""
+        return int(np.prod(self.shape)) * np.dtype(self.dtype).itemsize
+
+    def __repr__(self) -> str:
+        """Return a string representation of the handle."""
+        return f"SharedImage(name={self.name!r}, shape={self.shape!r}, dtype={self.dtype!r})"
+
+
+class SharedMemoryPool:
+    """Allocate and recycle shared memory blocks.
+
+    Blocks are grouped into power-of-two size classes, so a released block can be reused by any
+    later image of a similar size. The pool unlinks all of its blocks when closed, and should only
+    be used from the process that created it.
+    """
+
+    def __init__(self, min_block_size: int = 4096) -> None:
+        """Create an empty pool."""
+        self.min_block_size = min_block_size
+        self._lock = threading.Lock()
+        self._blocks: Dict[str, SharedMemory] = {}
+        self._free: Dict[int, List[str]] = {}
+
+    def __len__(self) -> int:
+        """Return the number of blocks owned by the pool."""
+        return len(self._blocks)
+
+    def __enter__(self) -> "SharedMemoryPool":  # noqa: PYI034
+        """Enter the runtime context."""
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        """Close the pool when leaving the runtime context."""
+        self.close()
+
+    def _size_class(self, nbytes: int) -> int:
+        size = self.min_block_size
+        while size < nbytes:
+            size *= 2
+        return size
+
+    def acquire(self, nbytes: int) -> str:
+        """Return the name of a block with room for at least `nbytes` bytes."""
+        size = self._size_class(nbytes)
+        with self._lock:
+            free = self._free.get(size)
+            if free:
+                return free.pop()
+            shm = SharedMemory(create=True, size=size)
+            self._blocks[shm.name] = shm
+            return shm.name
+
+    def release(self, block: Union[str, SharedImage]) -> None:
+        """Return a block to the pool so that it can be reused."""
+        name = block.name if isinstance(block, SharedImage) else block
+        with self._lock:
+            shm = self._blocks[name]
+            self._free.setdefault(self._size_class(shm.size), []).append(name)
+
+    def view(self, image: SharedImage) -> "np.ndarray[Any, np.dtype[Any]]":
+        """Return a numpy array backed by the block holding `image`.
+
+        The array is only valid until the block is released back to the pool.
+        """
+        shm = self._blocks[image.name]
+        return np.ndarray(image.shape, dtype=image.dtype, buffer=shm.buf)
+
+    def close(self) -> None:
+        """Unlink every block owned by the pool.
+
+        Arrays returned by `view` must be released before calling this method.
+        """
+        with self._lock:
+            for shm in self._blocks.values():
+                shm.close()
+                shm.unlink()
+            self._blocks.clear()
+            self._free.clear()
+
+
+def decode_shared(
+    webp_data: WebPData,
+    name: str,
+    color_mode: WebPColorMode = WebPColorMode.RGBA,
+) -> SharedImage:
+    """Decode WebP data directly into an existing shared memory block.
+
+    Args:
+        webp_data (WebPData): Encoded WebP data.
+        name (str): Name of the shared memory block to decode into (see
+            `SharedMemoryPool.acquire`).
+        color_mode (WebPColorMode): Output color mode.
+
+    Returns:
+        SharedImage: Handle describing the decoded image.
+    """
+    dec_config = WebPDecoderConfig.new()
+    dec_config.read_features(webp_data)
+    shape = color_mode.array_shape(dec_config.input.height, dec_config.input.width)
+
+    image = SharedImage(name, shape, color_mode.dtype.str)
+    shm = _attach(name)
+    if image.nbytes > shm.size:
+        shm.close()
+        msg = f"shared memory block is too small ({shm.size} < {image.nbytes} bytes)"
+        raise WebPError(msg)
+    arr: np.ndarray[Any, np.dtype[Any]] = np.ndarray(shape, dtype=color_mode.dtype, buffer=shm.buf)
+    try:
+        webp_data.decode(color_mode, out=arr)
+    finally:
+        # The array holds an export of the mapping, which must be released before closing it.
+        del arr
+        shm.close()
+    return image
@@ -0,0 +1,187 @@
+"""Timing hooks for encode, decode, and file I/O calls.
+
+A tracer is any callable that accepts a `TraceEvent`. While one is installed (see `set_tracer`
+and `tracing`), every picture import, encode, decode, animation frame, and file read or write
+made by this package reports an event to it. When no tracer is installed, the only cost is a
+check of a module attribute.
+"""
+
+import contextlib
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Callable, Dict, Generator, List, NamedTuple, Optional, Sequence, Tuple
+
+if TYPE_CHECKING:
+    from webp import AnyWebPConfig
+
+
+class TraceEvent(NamedTuple):
+    """Description and timing of a single traced operation."""
+
+    operation: str
+    width: int
+    height: int
+    mode: Optional[str]
+    config: Optional[Dict[str, Any]]
+    bytes_in: int
+    bytes_out: int
+    start_ns: int
+    duration_ns: int
+
+
+Tracer = Callable[[TraceEvent], None]
+
+# Read directly by the instrumented code, which is why this is not hidden behind a getter.
+tracer: Optional[Tracer] = None
+
+
+def set_tracer(callback: Optional[Tracer]) -> Optional[Tracer]:
+    """Install a process-wide tracer, or remove it by passing None.
+
+    Returns:
+        The previously installed tracer, if any.
+    """
+    global tracer  # noqa: PLW0603
+    previous = tracer
+    tracer = callback
+    return previous
+
+
+@contextlib.contextmanager
+def tracing(callback: Tracer) -> Generator[Tracer, None, None]:
+    """Install a tracer for the duration of a `with` block.
+
+    The tracer is process-wide, so it also receives events from other threads while the block
+    is running.
+    """
+    previous = set_tracer(callback)
+    try:
+        yield callback
+    finally:
+        set_tracer(previous)
+
+
+def config_summary(config: "Optional[AnyWebPConfig]") -> Optional[Dict[str, Any]]:
+    """Return the encoder settings that matter most for performance."""
+    if config is None:
+        return None
+    ptr = config.ptr
+    return {"lossless": ptr.lossless, "quality": ptr.quality, "method": ptr.method}
+
+
+def emit(  # noqa: PLR0913
+    callback: Tracer,
+    operation: str,
+    start_ns: int,
+    *,
+    width: int = 0,
+    height: int = 0,
+    mode: Optional[str] = None,
+    config: "Optional[AnyWebPConfig]" = None,
+    bytes_in: int = 0,
+    bytes_out: int = 0,
+) -> None:
+    """Report an operation that started at `start_ns` (from `time.perf_counter_ns`) and just ended."""
+    duration_ns = time.perf_counter_ns() - start_ns
+    callback(
+        TraceEvent(
+            operation=operation,
+            width=width,
+            height=height,
+            mode=mode,
+            config=config_summary(config),
+            bytes_in=bytes_in,
+            bytes_out=bytes_out,
+            start_ns=start_ns,
+            duration_ns=duration_ns,
+        )
+    )
+
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class _OperationMetrics:
+    def __init__(self, num_buckets: int) -> None:
+        self.bucket_counts = [0] * num_buckets
+        self.count = 0
+        self.sum_seconds = 0.0
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+
+class MetricsAggregator:
+    """Tracer which aggregates events into latency histograms and byte counters per operation.
+
+    Install an aggregator with `set_tracer(aggregator)`, and periodically export its contents
+    with `to_prometheus`.
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS, prefix: str = "webp") -> None:
+        """Create an empty aggregator.
+
+        Args:
+            buckets (sequence of float): Upper bounds of the latency histogram buckets, in seconds.
+            prefix (str): Prefix for the exported metric names.
+        """
+        self.buckets = tuple(sorted(buckets))
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, _OperationMetrics] = {}
+
+    def __call__(self, event: TraceEvent) -> None:
+        """Record an event."""
+        seconds = event.duration_ns / 1e9
+        with self._lock:
+            metrics = self._metrics.get(event.operation)
+            if metrics is None:
+                metrics = _OperationMetrics(len(self.buckets))
+                self._metrics[event.operation] = metrics
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    metrics.bucket_counts[i] += 1
+                    break
+            metrics.count += 1
+            metrics.sum_seconds += seconds
+            metrics.bytes_in += event.bytes_in
+            metrics.bytes_out += event.bytes_out
+
+    def counts(self) -> Dict[str, int]:
+        """Return the number of recorded events for each operation."""
+        with self._lock:
+            return {operation: metrics.count for operation, metrics in self._metrics.items()}
+
+    def reset(self) -> None:
+        """Discard all recorded events."""
+        with self._lock:
+            self._metrics.clear()
+
+    def to_prometheus(self) -> str:
+        """Return the aggregated metrics in the Prometheus text exposition format."""
+        duration = f"{self.prefix}_operation_duration_seconds"
+        bytes_in = f"{self.prefix}_operation_bytes_in_total"
+        bytes_out = f"{self.prefix}_operation_bytes_out_total"
+        with self._lock:
+            snapshot: List[Tuple[str, _OperationMetrics]] = sorted(self._metrics.items())
+            lines = [
+                f"# HELP {duration} Time spent in WebP operations.",
+                f"# TYPE {duration} histogram",
+            ]
+            for operation, metrics in snapshot:
+                cumulative = 0
+                for bound, count in zip(self.buckets, metrics.bucket_counts):
+                    cumulative += count
+                    lines.append(f'{duration}_bucket{{operation="{operation}",le="{bound:g}"}} {cumulative}')
+                lines.append(f'{duration}_bucket{{operation="{operation}",le="+Inf"}} {metrics.count}')
+                lines.append(f'{duration}_sum{{operation="{operation}"}} {metrics.sum_seconds!r}')
+                lines.append(f'{duration}_count{{operation="{operation}"}} {metrics.count}')
+            for name, help_text, attr in (
+                (bytes_in, "Bytes consumed by WebP operations.", "bytes_in"),
+                (bytes_out, "Bytes produced by WebP operations.", "bytes_out"),
+            ):
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} counter")
+                lines.extend(
+                    f'{name}{{operation="{operation}"}} {getattr(metrics, attr)}' for operation, metrics in snapshot
+                )
+        return "\n".join(lines) + "\n"
@@ -5,14 +5,17 @@ import os
 import platform
 import shutil
 import subprocess
+import sysconfig
 from importlib.resources import read_text
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Tuple
 
 from cffi import FFI
 
 import webp_build
 
+BUILD_PROFILES = ("release", "optimized")
+
 # Mapping from Conan architectures to Python machine types
 CONAN_ARCHS = {
     "x86_64": ["amd64", "x86_64", "x64"],
@@ -46,9 +49,48 @@ def get_arch() -> str:
     raise RuntimeError(msg)
 
 
-def install_libwebp(arch: str) -> Dict[Any, Any]:
-    """Install libwebp using Conan."""
+def get_build_profile() -> str:
+    """Get the build profile from the `PYWEBP_BUILD_PROFILE` environment variable.
+
+    * `release` (the default) links the prebuilt libwebp supplied by Conan, and compiles the
+      extension with Python's default flags. This is what wheels are built with.
+    * `optimized` builds libwebp from source with `-O3`, link-time optimisation, and flags tuned
+      for the build machine's CPU (`-march=native`, or `PYWEBP_ARCH_FLAGS` if set). The result
+      may not run on older CPUs, so it is meant for builds which are deployed to known hardware.
+    """
+    profile = os.getenv("PYWEBP_BUILD_PROFILE", "") or "release"
+    if profile not in BUILD_PROFILES:
+        msg = f"Unknown build profile {profile!r}, expected one of {', '.join(BUILD_PROFILES)}"
+        raise RuntimeError(msg)
+    return profile
+
+
+def optimization_flags(arch: str) -> Tuple[List[str], List[str]]:
+    """Return the (compile, link) flags used by the `optimized` build profile."""
+    if platform.system() == "Windows":
+        return ["/O2", "/GL"], ["/LTCG"]
+
+    env_arch_flags = os.getenv("PYWEBP_ARCH_FLAGS")
+    if env_arch_flags is not None:
+        arch_flags = env_arch_flags.split()
+    elif arch in ("x86", "x86_64"):
+        arch_flags = ["-march=native"]
+    elif arch == "armv8":
+        arch_flags = ["-mcpu=native"]
+    else:
+        # Cannot tune for a single CPU when building for several architectures (e.g. universal2).
+        arch_flags = []
+    flags = ["-O3", "-flto", *arch_flags]
+    return flags, flags
+
+
+def install_libwebp(arch: str, cflags: Optional[List[str]] = None) -> Dict[Any, Any]:
+    """Install libwebp using Conan.
+
+    If `cflags` are given, libwebp is built from source with those compiler flags.
+    """
     settings: List[str] = []
+    conf: List[str] = []
 
     if platform.system() == "Windows":
         settings.append("os=Windows")
@@ -71,6 +113,11 @@ def install_libwebp(arch: str) -> Dict[Any, Any]:
         # Need to compile libwebp if musllinux
         build.append("libwebp*")
 
+    if cflags is not None:
+        build.append("libwebp*")
+        settings.append("build_type=Release")
+        conf.append(f"tools.build:cflags={json.dumps(cflags)}")
+
     if not shutil.which("cmake") and (
         platform.architecture()[0] == "32bit"
         or platform.machine().lower() not in (CONAN_ARCHS["armv8"] + CONAN_ARCHS["x86"])
@@ -92,6 +139,7 @@ def install_libwebp(arch: str) -> Dict[Any, Any]:
             "install",
             *[x for s in settings for x in ("-s", s)],
             *[x for b in build for x in ("-b", b)],
+            *[x for c in conf for x in ("-c", c)],
             "-of",
             str(conan_output),
             "--deployer=direct_deploy",
@@ -133,36 +181,53 @@ def create_ffibuilder() -> FFI:
     cffi_settings: Dict[str, List[str]] = {
         "extra_objects": [],
         "extra_compile_args": [],
+        "extra_link_args": [],
         "include_dirs": [],
         "libraries": [],
     }
 
     arch = get_arch()
-    webp_build.logger.info(f"Detected system architecture as {arch}")
+    profile = get_build_profile()
+    webp_build.logger.info(f"Detected system architecture as {arch}, building with the {profile} profile")
     if platform.system() == "Darwin":
         if arch == "x86_64":
             cffi_settings["extra_compile_args"].append("-mmacosx-version-min=10.9")
         else:
             cffi_settings["extra_compile_args"].append("-mmacosx-version-min=11.0")
 
+    libwebp_cflags = None
+    if profile == "optimized":
+        libwebp_cflags, link_flags = optimization_flags(arch)
+        cffi_settings["extra_compile_args"].extend(libwebp_cflags)
+        cffi_settings["extra_link_args"].extend(link_flags)
+
     if arch == "universal2":
-        conan_info = install_libwebp("x86_64")
+        conan_info = install_libwebp("x86_64", libwebp_cflags)
         cffi_settings = fetch_cffi_settings(conan_info, cffi_settings)
-        conan_info = install_libwebp("armv8")
+        conan_info = install_libwebp("armv8", libwebp_cflags)
         cffi_settings = fetch_cffi_settings(conan_info, cffi_settings)
     else:
-        conan_info = install_libwebp(arch)
+        conan_info = install_libwebp(arch, libwebp_cflags)
         cffi_settings = fetch_cffi_settings(conan_info, cffi_settings)
 
     webp_build.logger.info(f"{cffi_settings=}")
 
+    # Record how the extension was built, for `webp.build_info()`.
+    build_flags = " ".join([*(sysconfig.get_config_var("CFLAGS") or "").split(), *cffi_settings["extra_compile_args"]])
+    source = (
+        f"#define PYWEBP_BUILD_PROFILE {json.dumps(profile)}\n"
+        f"#define PYWEBP_BUILD_FLAGS {json.dumps(build_flags)}\n"
+        f"{read_text(webp_build, 'source.c')}"
+    )
+
     # Specify C sources to be built by CFFI
     ffibuilder = FFI()
     ffibuilder.set_source(
         "webp._webp",
-        read_text(webp_build, "source.c"),
+        source,
         extra_objects=cffi_settings["extra_objects"],
         extra_compile_args=cffi_settings["extra_compile_args"],
+        extra_link_args=cffi_settings["extra_link_args"],
         include_dirs=cffi_settings["include_dirs"],
         libraries=cffi_settings["libraries"],
     )
@@ -39,6 +39,48 @@ typedef enum VP8StatusCode {
   VP8_STATUS_NOT_ENOUGH_DATA
 } VP8StatusCode;
 
+typedef enum WebPMuxError {
+  WEBP_MUX_OK = 1,
+  WEBP_MUX_NOT_FOUND = 0,
+  WEBP_MUX_INVALID_ARGUMENT = -1,
+  WEBP_MUX_BAD_DATA = -2,
+  WEBP_MUX_MEMORY_ERROR = -3,
+  WEBP_MUX_NOT_ENOUGH_DATA = -4
+} WebPMuxError;
+
+typedef enum WebPChunkId {
+  WEBP_CHUNK_VP8X,
+  WEBP_CHUNK_ICCP,
+  WEBP_CHUNK_ANIM,
+  WEBP_CHUNK_ANMF,
+  WEBP_CHUNK_DEPRECATED,
+  WEBP_CHUNK_ALPHA,
+  WEBP_CHUNK_IMAGE,
+  WEBP_CHUNK_EXIF,
+  WEBP_CHUNK_XMP,
+  WEBP_CHUNK_UNKNOWN,
+  WEBP_CHUNK_NIL
+} WebPChunkId;
+
+typedef enum WebPMuxAnimDispose {
+  WEBP_MUX_DISPOSE_NONE,
+  WEBP_MUX_DISPOSE_BACKGROUND
+} WebPMuxAnimDispose;
+
+typedef enum WebPMuxAnimBlend {
+  WEBP_MUX_BLEND,
+  WEBP_MUX_NO_BLEND
+} WebPMuxAnimBlend;
+
+typedef enum WebPFormatFeature {
+  WEBP_FF_FORMAT_FLAGS,
+  WEBP_FF_CANVAS_WIDTH,
+  WEBP_FF_CANVAS_HEIGHT,
+  WEBP_FF_LOOP_COUNT,
+  WEBP_FF_BACKGROUND_COLOR,
+  WEBP_FF_FRAME_COUNT
+} WebPFormatFeature;
+
 struct WebPData {
   const uint8_t* bytes;
   size_t size;
@@ -55,6 +97,12 @@ struct WebPPicture {
   int use_argb;
   int width;
   int height;
+  uint8_t* y, *u, *v;
+  int y_stride, uv_stride;
+  uint8_t* a;
+  int a_stride;
+  uint32_t* argb;
+  int argb_stride;
   WebPWriterFunction writer;
   void* custom_ptr;
   ...;
@@ -101,6 +149,11 @@ struct WebPDecBuffer {
 typedef struct WebPDecBuffer WebPDecBuffer;
 
 struct WebPDecoderOptions {
+  int use_cropping;
+  int crop_left, crop_top;
+  int crop_width, crop_height;
+  int use_scaling;
+  int scaled_width, scaled_height;
   int use_threads;
   ...;
 };
@@ -131,6 +184,19 @@ struct WebPConfig {
   int alpha_filtering;
   int alpha_quality;
   int pass;
+  int show_compressed;
+  int preprocessing;
+  int partitions;
+  int partition_limit;
+  int emulate_jpeg_size;
+  int thread_level;
+  int low_memory;
+  int near_lossless;
+  int exact;
+  int use_delta_palette;
+  int use_sharp_yuv;
+  int qmin;
+  int qmax;
   ...;
 };
 typedef struct WebPConfig WebPConfig;
@@ -176,13 +242,43 @@ struct WebPAnimInfo {
 };
 typedef struct WebPAnimInfo WebPAnimInfo;
 
+struct WebPMuxFrameInfo {
+  WebPData bitstream;
+  int x_offset;
+  int y_offset;
+  int duration;
+  WebPChunkId id;
+  WebPMuxAnimDispose dispose_method;
+  WebPMuxAnimBlend blend_method;
+  ...;
+};
+typedef struct WebPMuxFrameInfo WebPMuxFrameInfo;
+
+struct WebPIterator {
+  int frame_num;
+  int num_frames;
+  int x_offset, y_offset;
+  int width, height;
+  int duration;
+  WebPMuxAnimDispose dispose_method;
+  int complete;
+  WebPData fragment;
+  int has_alpha;
+  WebPMuxAnimBlend blend_method;
+  ...;
+};
+typedef struct WebPIterator WebPIterator;
+
 // Opaque objects
+typedef struct WebPDemuxer WebPDemuxer;
 typedef struct WebPMux WebPMux;
 typedef struct WebPAnimEncoder WebPAnimEncoder;
 typedef struct WebPAnimDecoder WebPAnimDecoder;
 
 int WebPPictureInit(WebPPicture* picture);
 int WebPPictureAlloc(WebPPicture* picture);
+int WebPPictureHasTransparency(const WebPPicture* picture);
+void WebPCleanupTransparentArea(WebPPicture* picture);
 int WebPPictureImportRGB(WebPPicture* picture, const uint8_t* rgb,
   int rgb_stride);
 int WebPPictureImportRGBA(WebPPicture* picture, const uint8_t* rgba,
@@ -190,6 +286,7 @@ int WebPPictureImportRGBA(WebPPicture* picture, const uint8_t* rgba,
 void WebPPictureFree(WebPPicture* picture);
 
 int WebPInitDecoderConfig(WebPDecoderConfig* config);
+int WebPGetInfo(const uint8_t* data, size_t data_size, int* width, int* height);
 VP8StatusCode WebPGetFeatures(const uint8_t* data, size_t data_size,
   WebPBitstreamFeatures* features);
 VP8StatusCode WebPDecode(const uint8_t* data, size_t data_size,
@@ -228,3 +325,39 @@ int WebPAnimDecoderHasMoreFrames(const WebPAnimDecoder* dec);
 int WebPAnimDecoderGetNext(WebPAnimDecoder* dec, uint8_t** buf, int* timestamp);
 void WebPAnimDecoderReset(WebPAnimDecoder* dec);
 void WebPAnimDecoderDelete(WebPAnimDecoder* dec);
+
+WebPDemuxer* WebPDemux(const WebPData* data);
+void WebPDemuxDelete(WebPDemuxer* dmux);
+uint32_t WebPDemuxGetI(const WebPDemuxer* dmux, WebPFormatFeature feature);
+int WebPDemuxGetFrame(const WebPDemuxer* dmux, int frame_number, WebPIterator* iter);
+int WebPDemuxNextFrame(WebPIterator* iter);
+void WebPDemuxReleaseIterator(WebPIterator* iter);
+
+WebPMux* WebPMuxNew(void);
+WebPMux* WebPMuxCreate(const WebPData* bitstream, int copy_data);
+void WebPMuxDelete(WebPMux* mux);
+WebPMuxError WebPMuxSetChunk(WebPMux* mux, const char fourcc[4], const WebPData* chunk_data, int copy_data);
+WebPMuxError WebPMuxGetChunk(const WebPMux* mux, const char fourcc[4], WebPData* chunk_data);
+WebPMuxError WebPMuxDeleteChunk(WebPMux* mux, const char fourcc[4]);
+WebPMuxError WebPMuxGetFrame(const WebPMux* mux, uint32_t nth, WebPMuxFrameInfo* frame);
+WebPMuxError WebPMuxPushFrame(WebPMux* mux, const WebPMuxFrameInfo* frame, int copy_data);
+WebPMuxError WebPMuxSetAnimationParams(WebPMux* mux, const WebPMuxAnimParams* params);
+WebPMuxError WebPMuxSetCanvasSize(WebPMux* mux, int width, int height);
+WebPMuxError WebPMuxAssemble(WebPMux* mux, WebPData* assembled_data);
+
+int WebPGetEncoderVersion(void);
+int WebPGetDecoderVersion(void);
+int WebPGetMuxVersion(void);
+int WebPGetDemuxVersion(void);
+
+const char* PyWebPGetBuildProfile(void);
+const char* PyWebPGetBuildFlags(void);
+const char* PyWebPGetCompiler(void);
+const char* PyWebPGetCPUFeatures(void);
+int PyWebPPictureImportPalette(WebPPicture* picture, const uint8_t* indices, int stride,
+                               const uint8_t* palette, int num_colors);
+void PyWebPPictureClearTransparentPixels(WebPPicture* picture);
+void PyWebPPackedToNative(uint8_t* rows, int width, int height, int stride);
+int PyWebPDecodeIntoCanvas(const uint8_t* const* data, const size_t* data_sizes, const int* offsets,
+                           int num_images, uint8_t* canvas, int canvas_width, int canvas_height,
+                           int stride, int bytes_per_pixel, WEBP_CSP_MODE colorspace);
@@ -14,3 +14,181 @@ void WebPMemoryWriterClear(WebPMemoryWriter* writer) {
   free(writer->mem);
 }
 #endif
+
+/* Set by webp_build/builder.py, which prepends them to this file. */
+#ifndef PYWEBP_BUILD_PROFILE
+#define PYWEBP_BUILD_PROFILE "unknown"
+#endif
+#ifndef PYWEBP_BUILD_FLAGS
+#define PYWEBP_BUILD_FLAGS ""
+#endif
+
+const char* PyWebPGetBuildProfile(void) {
+  return PYWEBP_BUILD_PROFILE;
+}
+
+const char* PyWebPGetBuildFlags(void) {
+  return PYWEBP_BUILD_FLAGS;
+}
+
+const char* PyWebPGetCompiler(void) {
+#if defined(__clang__)
+  return "clang " __clang_version__;
+#elif defined(__GNUC__)
+  return "gcc " __VERSION__;
+#elif defined(_MSC_VER)
+#define PYWEBP_STR(x) #x
+#define PYWEBP_XSTR(x) PYWEBP_STR(x)
+  return "msvc " PYWEBP_XSTR(_MSC_FULL_VER);
+#else
+  return "unknown";
+#endif
+}
+
+/* Instruction sets enabled at compile time, tested like libwebp's WEBP_USE_* macros in
+   src/dsp/cpu.h (which is not one of the installed headers). libwebp uses these code paths
+   unconditionally when it is compiled with the same flags, as in the optimized build profile. */
+#if defined(__SSE2__) || defined(_M_X64) || (defined(_M_IX86_FP) && _M_IX86_FP >= 2)
+#define PYWEBP_FEATURE_SSE2 " sse2"
+#else
+#define PYWEBP_FEATURE_SSE2 ""
+#endif
+#if defined(__SSE4_1__)
+#define PYWEBP_FEATURE_SSE41 " sse4.1"
+#else
+#define PYWEBP_FEATURE_SSE41 ""
+#endif
+#if defined(__AVX2__)
+#define PYWEBP_FEATURE_AVX2 " avx2"
+#else
+#define PYWEBP_FEATURE_AVX2 ""
+#endif
+#if defined(__ARM_NEON__) || defined(__ARM_NEON) || defined(__aarch64__) || defined(_M_ARM64)
+#define PYWEBP_FEATURE_NEON " neon"
+#else
+#define PYWEBP_FEATURE_NEON ""
+#endif
+#if defined(__mips__) && !defined(__mips64) && defined(__mips_isa_rev) && __mips_isa_rev >= 1 && \
+    __mips_isa_rev < 6
+#define PYWEBP_FEATURE_MIPS32 " mips32"
+#else
+#define PYWEBP_FEATURE_MIPS32 ""
+#endif
+#if defined(__mips_dspr2) || (defined(__mips_dsp_rev) && __mips_dsp_rev >= 2)
+#define PYWEBP_FEATURE_MIPS_DSP_R2 " mips_dsp_r2"
+#else
+#define PYWEBP_FEATURE_MIPS_DSP_R2 ""
+#endif
+#if defined(__mips_msa) && defined(__mips_isa_rev) && __mips_isa_rev >= 5
+#define PYWEBP_FEATURE_MSA " msa"
+#else
+#define PYWEBP_FEATURE_MSA ""
+#endif
+
+/* Return the instruction sets above, separated by spaces. */
+const char* PyWebPGetCPUFeatures(void) {
+  return PYWEBP_FEATURE_SSE2 PYWEBP_FEATURE_SSE41 PYWEBP_FEATURE_AVX2 PYWEBP_FEATURE_NEON
+      PYWEBP_FEATURE_MIPS32 PYWEBP_FEATURE_MIPS_DSP_R2 PYWEBP_FEATURE_MSA;
+}
+
+/* Import 8-bit palette indices into an ARGB picture. The palette holds up to 256 RGBA colours,
+   and indices past its end are transparent black. The picture's width and height must be set
+   beforehand. */
+int PyWebPPictureImportPalette(WebPPicture* picture, const uint8_t* indices, int stride,
+                               const uint8_t* palette, int num_colors) {
+  uint32_t argb[256] = {0};
+  int i, x, y;
+  for (i = 0; i < num_colors && i < 256; ++i) {
+    const uint8_t* rgba = palette + 4 * i;
+    argb[i] = ((uint32_t)rgba[3] << 24) | ((uint32_t)rgba[0] << 16) | ((uint32_t)rgba[1] << 8) | rgba[2];
+  }
+  picture->use_argb = 1;
+  if (!WebPPictureAlloc(picture)) {
+    return 0;
+  }
+  for (y = 0; y < picture->height; ++y) {
+    const uint8_t* src = indices + (size_t)y * stride;
+    uint32_t* dst = picture->argb + (size_t)y * picture->argb_stride;
+    for (x = 0; x < picture->width; ++x) {
+      dst[x] = argb[src[x]];
+    }
+  }
+  return 1;
+}
+
+/* Set every fully transparent pixel of an ARGB picture to transparent black. */
+void PyWebPPictureClearTransparentPixels(WebPPicture* picture) {
+  int x, y;
+  if (!picture->use_argb || picture->argb == NULL) {
+    return;
+  }
+  for (y = 0; y < picture->height; ++y) {
+    uint32_t* argb = picture->argb + (size_t)y * picture->argb_stride;
+    for (x = 0; x < picture->width; ++x) {
+      if ((argb[x] >> 24) == 0) {
+        argb[x] = 0;
+      }
+    }
+  }
+}
+
+/* libwebp writes packed pixels (RGB_565, RGBA_4444, rgbA_4444) as 16-bit values with the high
+   byte first, since it is built without WEBP_SWAP_16BIT_CSP (see conanfile.py). */
+int PyWebPIsPackedMode(WEBP_CSP_MODE colorspace) {
+  return colorspace == MODE_RGB_565 || colorspace == MODE_RGBA_4444 || colorspace == MODE_rgbA_4444;
+}
+
+/* Convert rows of packed pixels from libwebp's byte order to the host's, in place. */
+void PyWebPPackedToNative(uint8_t* rows, int width, int height, int stride) {
+  const uint16_t one = 1;
+  int x, y;
+  if (*(const uint8_t*)&one == 0) {
+    return; /* Big-endian host: already native. */
+  }
+  for (y = 0; y < height; ++y) {
+    uint8_t* row = rows + (size_t)y * stride;
+    for (x = 0; x < width; ++x) {
+      const uint8_t high = row[2 * x];
+      row[2 * x] = row[2 * x + 1];
+      row[2 * x + 1] = high;
+    }
+  }
+}
+
+/* Decode a batch of still images into one canvas, with image i's top-left corner at
+   (offsets[2 * i], offsets[2 * i + 1]). Each image is written straight into the canvas rows using
+   libwebp's external memory output. Returns the index of the first image that could not be
+   decoded or does not fit inside the canvas, or -1 if every image was decoded. */
+int PyWebPDecodeIntoCanvas(const uint8_t* const* data, const size_t* data_sizes, const int* offsets,
+                           int num_images, uint8_t* canvas, int canvas_width, int canvas_height,
+                           int stride, int bytes_per_pixel, WEBP_CSP_MODE colorspace) {
+  WebPDecoderConfig config;
+  int i;
+  if (!WebPInitDecoderConfig(&config)) {
+    return 0;
+  }
+  for (i = 0; i < num_images; ++i) {
+    const int x = offsets[2 * i];
+    const int y = offsets[2 * i + 1];
+    WebPRGBABuffer* rgba = &config.output.u.RGBA;
+    if (WebPGetFeatures(data[i], data_sizes[i], &config.input) != VP8_STATUS_OK) {
+      return i;
+    }
+    if (x < 0 || y < 0 || config.input.width > canvas_width - x ||
+        config.input.height > canvas_height - y) {
+      return i;
+    }
+    config.output.colorspace = colorspace;
+    config.output.is_external_memory = 1;
+    rgba->rgba = canvas + (size_t)y * stride + (size_t)x * bytes_per_pixel;
+    rgba->stride = stride;
+    rgba->size = (size_t)(config.input.height - 1) * stride + (size_t)config.input.width * bytes_per_pixel;
+    if (WebPDecode(data[i], data_sizes[i], &config) != VP8_STATUS_OK) {
+      return i;
+    }
+    if (PyWebPIsPackedMode(colorspace)) {
+      PyWebPPackedToNative(rgba->rgba, config.input.width, config.input.height, stride);
+    }
+  }
+  return -1;
+}